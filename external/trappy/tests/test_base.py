@@ -266,3 +266,43 @@ class TestBase(utils_tests.SetupDirectory):
         self.assertEqual(Base.string_cast_int("42"), 42)
         self.assertEqual(Base.string_cast_int("0xdeadbeef"), 3735928559)
         self.assertEqual(Base.string_cast_int("deadbeef"), "deadbeef")
+
+    def test_parse_irregular_lines(self):
+        """TestBase: Lines not following the fields of the first lines of an event are parsed"""
+
+        in_data = """     kworker/4:1-397   [004]   720.741315: my_event: state=1900000 cpu_id=4
+     kworker/4:1-397   [004]   720.741316: my_event: state=1400000 cpu_id=0 extra=foo
+     kworker/4:1-397   [004]   720.741317: my_event: state=0x10 cpu_id=-1
+     kworker/4:1-397   [004]   720.741318: my_event: cpu_id=2 state=010"""
+
+        with open("trace.txt", "w") as fout:
+            fout.write(in_data)
+
+        trace = trappy.FTrace(events=['my_event'])
+        dfr = trace.my_event.data_frame
+
+        self.assertListEqual(dfr["state"].tolist(),
+                             [1900000, 1400000, 16, "010"])
+        self.assertListEqual(dfr["cpu_id"].tolist(), [4, 0, -1, 2])
+        self.assertListEqual(dfr["__line"].tolist(), [0, 1, 2, 3])
+        self.assertEqual(dfr["extra"].iloc[1], "foo")
+
+    def test_optimize_dataframe_categories(self):
+        """TestBase: String columns with few unique values are stored as categories"""
+
+        in_data = """     kworker/4:1-397   [004]   720.741315: my_event: name=foo id=a1
+     kworker/4:1-397   [004]   720.741316: my_event: name=foo id=a2
+     kworker/4:1-397   [004]   720.741317: my_event: name=bar id=a3
+     kworker/4:1-397   [004]   720.741318: my_event: name=foo id=a4"""
+
+        with open("trace.txt", "w") as fout:
+            fout.write(in_data)
+
+        trace = trappy.FTrace(events=['my_event'])
+        dfr = trace.my_event.data_frame
+
+        self.assertEqual(dfr["name"].dtype.name, "category")
+        self.assertEqual(dfr["__comm"].dtype.name, "category")
+        self.assertListEqual(dfr["name"].tolist(), ["foo", "foo", "bar", "foo"])
+        # Too many unique values
+        self.assertEqual(dfr["id"].dtype.name, "object")
@@ -143,6 +143,30 @@ class TestCaching(utils_tests.SetupDirectory):
         self.assertNotEqual(read_metadata()["md5sum"], md5sum_inc,
                             "The invalid ftrace cache wasn't overwritten")
 
+    def test_cache_stat_checked_first(self):
+        """Test the checksum is only computed when the trace stat changed"""
+        GenericFTrace.disable_cache = False
+        trappy.FTrace()
+
+        metadata_path = os.path.join(".trace.txt.cache", "metadata.json")
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+        self.assertIn("stat", metadata)
+
+        # A wrong checksum goes unnoticed as long as the stat did not change
+        metadata["md5sum"] = "0" * len(metadata["md5sum"])
+        with open(metadata_path, "w") as f:
+            json.dump(metadata, f)
+
+        trace = trappy.FTrace()
+        self.assertTrue(trace.sched_wakeup.cached)
+
+        # Touching the trace makes the checksum be verified
+        stat = os.stat("trace.txt")
+        os.utime("trace.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        trace = trappy.FTrace()
+        self.assertFalse(trace.sched_wakeup.cached)
+
     def test_cache_dynamic_events(self):
         """Test that caching works if new event parsers have been registered"""
 
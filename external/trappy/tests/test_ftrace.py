@@ -389,6 +389,74 @@ class TestFTrace(BaseTestThermal):
         self.assertEqual(len(trace.tracing_mark_write.data_frame), 1)
         self.assertEqual(len(trace.cpu_frequency.data_frame), 1)
 
+    def test_parse_unique_word_in_fields(self):
+        """Check that unique words ending with a colon are only matched in the event names"""
+
+        in_data = """     sh-1379  [002]   353.397813: cpu_idle:             state=1 cpu_id=2
+     sh-1379  [002]   353.397814: sched_wakeup:         comm=cpu_frequency: pid=12 prio=120 success=1 target_cpu=002
+     sh-1379  [002]   353.397815: cpu_frequency:        state=450000 cpu_id=5"""
+
+        with open("trace.txt", "w") as fout:
+            fout.write(in_data)
+
+        trace = trappy.FTrace(events=["cpu_idle", "cpu_frequency"])
+
+        self.assertEqual(len(trace.cpu_idle.data_frame), 1)
+        self.assertEqual(len(trace.cpu_frequency.data_frame), 1)
+        self.assertEqual(trace.cpu_frequency.data_frame["__line"].iloc[0], 2)
+
+    def test_parse_overlapping_unique_words(self):
+        """Check that unique words overlapping each other in a line are all found"""
+
+        class MyFallback(trappy.base.Base):
+            unique_word = "my_event"
+            name = "my_fallback"
+
+            def __init__(self):
+                super(MyFallback, self).__init__(fallback=True)
+
+        in_data = """     sh-1379  [002]   353.397813: my_event_ext:         a=1
+     sh-1379  [002]   353.397814: my_event:             a=2"""
+
+        with open("trace.txt", "w") as fout:
+            fout.write(in_data)
+
+        trappy.FTrace.register_parser(MyFallback, "all")
+        parser = trappy.register_dynamic_ftrace("EventExt", "event_ext")
+        try:
+            trace = trappy.FTrace(normalize_time=False)
+        finally:
+            trappy.unregister_dynamic_ftrace(parser)
+            trappy.FTrace.unregister_parser(MyFallback)
+
+        # "event_ext" is more specific than the fallback, even though
+        # "my_event" is found first in the line
+        self.assertEqual(trace.event_ext.data_frame["a"].tolist(), [1])
+        self.assertEqual(trace.my_fallback.data_frame["a"].tolist(), [2])
+
+    def test_parse_filters(self):
+        """Check that events can be filtered on their special fields while parsing"""
+
+        in_data = """     sh-1379  [002]   353.397813: cpu_idle:             state=1 cpu_id=2
+     sh-1379  [003]   353.397814: cpu_idle:             state=1 cpu_id=3
+     ls-1380  [002]   353.397815: cpu_idle:             state=2 cpu_id=2
+     sh-1379  [002]   353.397816: cpu_idle:             state=3 cpu_id=2"""
+
+        with open("trace.txt", "w") as fout:
+            fout.write(in_data)
+
+        trace = trappy.FTrace(events=["cpu_idle"], normalize_time=False,
+                              filters={"__cpu": [2], "__comm": ["sh"]})
+
+        dfr = trace.cpu_idle.data_frame
+        self.assertListEqual(dfr["state"].tolist(), [1, 3])
+        self.assertListEqual(dfr["__line"].tolist(), [0, 3])
+        # The time range is still the one of the whole trace
+        self.assertEqual(trace.basetime, 353.397813)
+
+        with self.assertRaises(ValueError):
+            trappy.FTrace(events=["cpu_idle"], filters={"state": [1]})
+
     def test_ftrace_metadata(self):
         """FTrace class correctly populates metadata"""
         trace = trappy.FTrace()
@@ -424,6 +492,18 @@ class TestFTraceRawDat(utils_tests.SetupDirectory):
         self.assertTrue(hasattr(trace, "sched_switch"))
         self.assertTrue(len(trace.sched_switch.data_frame) > 0)
 
+    def test_raw_dat_stream_report(self):
+        """Test parsing the output of trace-cmd report through a pipe"""
+
+        trace = trappy.FTrace()
+        streamed_trace = trappy.FTrace(stream_report=True)
+
+        self.assertEqual(streamed_trace._version, trace._version)
+        self.assertEqual(streamed_trace._cpus, trace._cpus)
+        self.assertEqual(streamed_trace.basetime, trace.basetime)
+        pd.testing.assert_frame_equal(streamed_trace.sched_switch.data_frame,
+                                      trace.sched_switch.data_frame)
+
 class TestFTraceRawBothTxt(utils_tests.SetupDirectory):
 
     def __init__(self, *args, **kwargs):
@@ -23,6 +23,8 @@ from builtins import range
 from builtins import object
 from past.builtins import basestring
 import re
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 import warnings
 
@@ -92,6 +94,37 @@ def trace_parser_explode_array(string, array_lengths):
 
     return string
 
+# Characters that can appear in a column of decimal integers, once joined
+# with newlines
+_DECIMAL_COLUMN_CHARS = {ord(c): None for c in '0123456789-\n'}
+_LEADING_ZERO_RE = re.compile(r'[\n-]0[0-9]')
+
+def _parse_decimal_column(values):
+    """Convert a list of strings to an array of int64 if they are all decimal
+    integers that :meth:`Base.string_cast_int` would convert, otherwise
+    return None.
+
+    :param values: The values of a field for all lines of an event
+    :type values: list(str)
+    """
+    joined = '\n'.join(values)
+    if (
+        # Only digits and minus signs
+        not joined or joined.translate(_DECIMAL_COLUMN_CHARS) or
+        # No empty value
+        '\n\n' in joined or joined[0] == '\n' or joined[-1] == '\n' or
+        # Minus signs only at the beginning of a value, followed by a digit
+        joined.count('-') != joined.count('\n-') + joined.startswith('-') or
+        '-\n' in joined or '--' in joined or joined[-1] == '-' or
+        # int(x, base=0) rejects leading zeros
+        _LEADING_ZERO_RE.search('\n' + joined) or
+        # Values that may not fit in int64
+        max(map(len, values)) > 18
+    ):
+        return None
+
+    return np.fromstring(joined, sep='\n', dtype=np.int64)
+
 class Base(object):
     """Base class to parse trace.dat dumps.
 
@@ -265,26 +298,169 @@ class Base(object):
 
             yield data_dict
 
+    # Number of lines of an event looked at to infer its fields
+    SCHEMA_INFERENCE_LINES = 10
+
+    def _infer_fields(self):
+        """Infer the list of fields of the event from its first lines
+
+        :returns: The list of field names in the order they appear in the
+            lines, or None if no line looks like a regular sequence of
+            key=value fields.
+        """
+        for data_str in self.data_array[:self.SCHEMA_INFERENCE_LINES]:
+            fields = data_str.split(' ')
+            keys = [field.split('=', 1)[0] for field in fields]
+            if (
+                all('=' in field for field in fields) and
+                all(keys) and
+                len(set(keys)) == len(keys)
+            ):
+                return keys
+
+        return None
+
+    def generate_parsed_columns(self):
+        """Extract the fields of all the lines at once
+
+        A regex is built from the fields found in the first lines and used to
+        extract each field of every line. Lines that do not match it are
+        parsed with :meth:`generate_data_dict`.
+
+        :returns: A tuple (columns, unmatched) where columns is a dict of
+            field names to arrays, only containing the lines matched by the
+            regex, and unmatched the list of indices of the other lines. None
+            is returned if the fields cannot be inferred.
+        """
+        # Subclasses with their own parser may not follow the key=value
+        # format
+        if type(self).generate_data_dict != Base.generate_data_dict:
+            return None
+
+        keys = self._infer_fields()
+        if not keys:
+            return None
+
+        regex = re.compile(' '.join(
+            r'{}=(\S*)'.format(re.escape(key))
+            for key in keys
+        ))
+
+        # All lines are matched in one go, which is the common case.
+        # Otherwise, find which ones did not match.
+        multiline_regex = re.compile('^' + regex.pattern + '$', re.MULTILINE)
+        data = '\n'.join(self.data_array)
+        values = multiline_regex.findall(data)
+        if len(values) == len(self.data_array):
+            unmatched = []
+        else:
+            # Map the offset of each match back to the index of its line
+            line_starts = np.cumsum(
+                [0] + [len(data_str) + 1 for data_str in self.data_array[:-1]]
+            )
+            matches = list(multiline_regex.finditer(data))
+            matched = np.zeros(len(self.data_array), dtype=bool)
+            matched[np.searchsorted(
+                line_starts,
+                [match.start() for match in matches],
+            )] = True
+            unmatched = np.flatnonzero(~matched).tolist()
+            values = [match.groups() for match in matches]
+
+        if not values:
+            return None
+
+        if len(keys) == 1:
+            values = [(value,) for value in values]
+
+        columns = {}
+        for key, column in zip(keys, zip(*values)):
+            array = _parse_decimal_column(column)
+            if array is None:
+                # Non-integer columns usually have few distinct values, such
+                # as task names
+                cast = {x: self.string_cast_int(x) for x in set(column)}
+                array = pd.Series([cast[x] for x in column])
+            columns[key] = array
+
+        return (columns, unmatched)
+
+    def _create_columnar_dataframe(self, time_idx):
+        """Create the :mod:`pandas.DataFrame` using
+        :meth:`generate_parsed_columns`, or return None if that is not
+        possible.
+        """
+        parsed = self.generate_parsed_columns()
+        if parsed is None:
+            return None
+
+        columns, unmatched = parsed
+        special_columns = (
+            ("__comm", self.comm_array),
+            ("__pid", self.pid_array),
+            ("__cpu", self.cpu_array),
+            ("__line", self.line_array),
+        )
+
+        if unmatched:
+            matched = np.ones(len(time_idx), dtype=bool)
+            matched[unmatched] = False
+            matched_idx = np.arange(len(time_idx))[matched]
+        else:
+            matched_idx = slice(None)
+
+        data = OrderedDict(
+            (name, pd.Series(array).values[matched_idx])
+            for name, array in special_columns
+        )
+        data.update(
+            (key, pd.Series(array).values)
+            for key, array in columns.items()
+        )
+        df = pd.DataFrame(data, index=time_idx[matched_idx])
+
+        if unmatched:
+            def make_data_dict(i):
+                data_dict = {name: array[i] for name, array in special_columns}
+                data_dict.update(self.generate_data_dict(self.data_array[i]))
+                return data_dict
+
+            unmatched_df = pd.DataFrame(
+                [make_data_dict(i) for i in unmatched],
+                index=time_idx[unmatched],
+            )
+            # Restore the original order of the lines
+            order = np.argsort(
+                np.concatenate([matched_idx, unmatched]),
+                kind='stable',
+            )
+            df = pd.concat([df, unmatched_df], sort=False).iloc[order]
+
+        return df
+
     def optimize_dataframe(self):
         """Optimize memory footprint by setting minimal data types required by
            each column"""
-        for col in self.data_frame.columns:
-            if self.data_frame[col].dtype.kind == 'i':
-                self.data_frame[col].apply(pd.to_numeric, downcast='signed')
+        df = self.data_frame
+        for col in df.columns:
+            # Integer and float columns are left alone: downcasting them
+            # depending on the values found in one trace makes arithmetic on
+            # them prone to overflows.
+            if df[col].dtype.kind != 'O':
                 continue
-            if self.data_frame[col].dtype.kind == 'f':
-                self.data_frame[col].apply(pd.to_numeric, downcast='float')
+
+            # Strings are stored as Python objects. Categories would turn
+            # missing values into NaN, so only complete columns are converted.
+            if pd.api.types.infer_dtype(df[col], skipna=False) != 'string':
                 continue
-            if self.data_frame[col].dtype.kind == 'S':
-                # Convert string objects (pointer) to categories, only when we have
-                # a relatively limited number of unique values (50% of the rows)
-                num_unique_values = len(self.data_frame[col].unique())
-                num_total_values = len(self.data_frame[col])
-                if num_unique_values / num_total_values > 0.5:
-                    continue
-                self.data_frame.loc[:,col] = self.data_frame[col].astype('category')
-            else:
+
+            # Convert string objects (pointer) to categories, only when we have
+            # a relatively limited number of unique values (50% of the rows)
+            num_unique_values = df[col].nunique()
+            num_total_values = len(df[col])
+            if num_unique_values / num_total_values > 0.5:
                 continue
+            df[col] = df[col].astype('category')
 
     def create_dataframe(self):
         """Create the final :mod:`pandas.DataFrame`"""
@@ -299,7 +475,10 @@ class Base(object):
                 self.data_array[idx] = expl_val
 
         time_idx = pd.Index(self.time_array, name="Time")
-        self.data_frame = pd.DataFrame(self.generate_parsed_data(), index=time_idx)
+        data_frame = self._create_columnar_dataframe(time_idx)
+        if data_frame is None:
+            data_frame = pd.DataFrame(self.generate_parsed_data(), index=time_idx)
+        self.data_frame = data_frame
         self.data_frame = handle_duplicate_index(self.data_frame)
         self.optimize_dataframe()
 
@@ -22,6 +22,7 @@ from __future__ import unicode_literals
 from builtins import zip
 from builtins import next
 from builtins import str
+import contextlib
 import io
 import itertools
 import json
@@ -32,6 +33,7 @@ import hashlib
 import shutil
 import warnings
 import math
+import subprocess
 
 from tempfile import NamedTemporaryFile
 import numpy as np
@@ -64,7 +66,7 @@ def _plot_freq_hists(allfreqs, what, axis, title):
 SPECIAL_FIELDS_RE = re.compile(
                         r"^\s*(?P<comm>.*)-(?P<pid>\d+)(?:\s+\(.*\))"\
                         r"?\s+\[(?P<cpu>\d+)\](?:\s+....)?\s+"\
-                        r"(?P<timestamp>[0-9]+(?P<us>\.[0-9]+)?): (\w+:\s+)+(?P<data>.+)"
+                        r"(?P<timestamp>[0-9]+(?P<us>\.[0-9]+)?): (?P<event>(?:\w+:\s+)+)(?P<data>.+)"
 )
 
 class GenericFTrace(BareTrace):
@@ -79,10 +81,29 @@ subclassed by FTrace (for parsing FTrace coming from trace-cmd) and SysTrace."""
 
     disable_cache = False
 
+    # Timestamp assumed to precede the first line of the trace. Timestamps are
+    # made unique relatively to it, which allows parsing a trace in several
+    # pieces.
+    initial_timestamp = 0
+
+    filterable_fields = ("__cpu", "__pid", "__comm")
+    """Fields that can be used to filter the events while parsing them"""
+
     def __init__(self, name="", normalize_time=True, scope="all",
-                 events=[], window=(0, None), abs_window=(0, None)):
+                 events=[], window=(0, None), abs_window=(0, None),
+                 filters=None):
         super(GenericFTrace, self).__init__(name)
 
+        filters = filters or {}
+        unknown_fields = set(filters.keys()) - set(self.filterable_fields)
+        if unknown_fields:
+            raise ValueError("Cannot filter events on fields: {}".format(
+                ", ".join(sorted(unknown_fields))))
+        self.filters = {
+            field: set(values)
+            for field, values in filters.items()
+        }
+
         self.__add_events(listify(events))
 
         if scope == "thermal":
@@ -209,6 +230,26 @@ subclassed by FTrace (for parsing FTrace coming from trace-cmd) and SysTrace."""
 
         return metadata
 
+    def _get_trace_stat(self):
+        """
+        Metadata of the trace file that change when it is modified, to avoid
+        computing the checksum of the trace when they did not change.
+        """
+        stat = os.stat(self.trace_path)
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "inode": stat.st_ino,
+        }
+
+    def _get_trace_md5sum(self):
+        md5 = hashlib.md5()
+        with open(self.trace_path, 'rb') as f:
+            # Read by chunks to avoid loading the whole trace in memory
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                md5.update(chunk)
+        return md5.hexdigest()
+
     def _is_cache_valid(self, cache_metadata):
         for key in ["md5sum", "basetime", "endtime"]:
             if key not in cache_metadata.keys():
@@ -216,8 +257,12 @@ subclassed by FTrace (for parsing FTrace coming from trace-cmd) and SysTrace."""
                 warnings.warn(warnstr)
                 return False
 
-        with open(self.trace_path, 'rb') as f:
-            trace_md5sum = hashlib.md5(f.read()).hexdigest()
+        # The trace is assumed to be unchanged if none of its stat metadata
+        # changed, which is much faster than computing its checksum
+        if cache_metadata.get("stat") == self._get_trace_stat():
+            return True
+
+        trace_md5sum = self._get_trace_md5sum()
 
         if cache_metadata["md5sum"] != trace_md5sum:
             warnstr = "Cached data is from another trace, invalidating cache."
@@ -264,9 +309,8 @@ subclassed by FTrace (for parsing FTrace coming from trace-cmd) and SysTrace."""
         # Additionnal metadata can be saved by overriding this method
         metadata = {}
 
-        metadata["md5sum"] = hashlib.md5(
-            open(self.trace_path, 'rb').read()
-        ).hexdigest()
+        metadata["md5sum"] = self._get_trace_md5sum()
+        metadata["stat"] = self._get_trace_stat()
         metadata["basetime"] = self.basetime
         metadata["endtime"] = self.endtime
         return metadata
@@ -282,6 +326,18 @@ subclassed by FTrace (for parsing FTrace coming from trace-cmd) and SysTrace."""
             shutil.rmtree(cache_path)
             return
 
+        # Record the current stat metadata of the trace, so that its checksum
+        # is not computed again next time
+        stat = self._get_trace_stat()
+        if metadata.get("stat") != stat:
+            metadata["stat"] = stat
+            metadata_path = os.path.join(cache_path, 'metadata.json')
+            try:
+                with open(metadata_path, 'w') as f:
+                    json.dump(metadata, f)
+            except OSError:
+                pass
+
         # Load metadata
         self._load_metadata_from_cache(metadata)
         self.max_window = self._calc_max_window()
@@ -313,7 +369,8 @@ subclassed by FTrace (for parsing FTrace coming from trace-cmd) and SysTrace."""
             self._normalize_time()
 
     def _do_parse(self):
-        if not self.__class__.disable_cache:
+        # The cache cannot store a filtered subset of the events
+        if not self.__class__.disable_cache and not self.filters:
             self._load_cache()
 
             # Check if cache data is enough
@@ -327,7 +384,7 @@ subclassed by FTrace (for parsing FTrace coming from trace-cmd) and SysTrace."""
         self.finalize_objects()
 
         # Update (or create) cache directory
-        if not self.__class__.disable_cache:
+        if not self.__class__.disable_cache and not self.filters:
             self._update_cache()
 
         self._apply_user_parameters()
@@ -385,20 +442,65 @@ subclassed by FTrace (for parsing FTrace coming from trace-cmd) and SysTrace."""
                     return trace_class
         return trace_class
 
-    def __populate_data(self, fin, cls_for_unique_word):
-        """Append to trace data from a txt trace"""
+    def __populate_data(self, fin, cls_for_event_word, cls_for_unique_word):
+        """Append to trace data from a txt trace
+
+        :param cls_for_event_word: Classes with a unique word that can be
+            found in the event names at the beginning of a line, such as
+            ``"sched_switch:"``, indexed by their unique word.
+        :type cls_for_event_word: dict(str, trappy.base.Base)
+
+        :param cls_for_unique_word: Other classes, that have to be looked for
+            in the whole line, indexed by their unique word.
+        :type cls_for_unique_word: dict(str, trappy.base.Base)
+        """
+        # Class parsing each distinct event names prefix, such as
+        # "sched_switch: " or "print: 0xffff...: my_event: ". There are only a
+        # handful of them, so the unique words only need to be looked for once
+        # per prefix instead of once per line.
+        cls_for_event = {}
+        # All the unique words are looked for at once. The lookahead makes the
+        # regex try every position of the line, so that unique words
+        # overlapping each other (e.g. "my_event" and "event_ext" in
+        # "my_event_ext") are all found. Unique words are not substrings of
+        # each other, but the longest one is tried first anyway so that the
+        # most specific one wins if that happens.
+        if cls_for_unique_word:
+            unique_word_re = re.compile('(?=({}))'.format('|'.join(
+                re.escape(unique_word)
+                for unique_word in sorted(cls_for_unique_word.keys(), key=len, reverse=True)
+            )))
+        else:
+            unique_word_re = None
+
+        cpus = self.filters.get("__cpu")
+        pids = self.filters.get("__pid")
+        comms = self.filters.get("__comm")
 
         actual_trace = itertools.dropwhile(self.trace_hasnt_started(), fin)
         actual_trace = itertools.takewhile(self.trace_hasnt_finished(),
                                            actual_trace)
 
-        timestamp = 0
+        timestamp = self.initial_timestamp
         for line in actual_trace:
-            trace_class = self.__get_trace_class(line, cls_for_unique_word)
             line = line.rstrip()
 
             fields_match = SPECIAL_FIELDS_RE.match(line)
             if fields_match:
+                event = fields_match.group('event')
+                try:
+                    trace_class = cls_for_event[event]
+                except KeyError:
+                    trace_class = self.__get_trace_class(
+                        event, cls_for_event_word)
+                    cls_for_event[event] = trace_class
+
+                if unique_word_re and not (trace_class and not trace_class.fallback):
+                    for match in unique_word_re.finditer(line):
+                        trace_class = cls_for_unique_word[match.group(1)]
+                        if not trace_class.fallback:
+                            break
+
                 comm = fields_match.group('comm')
                 pid = int(fields_match.group('pid'))
                 cpu = int(fields_match.group('cpu'))
@@ -432,7 +534,11 @@ subclassed by FTrace (for parsing FTrace coming from trace-cmd) and SysTrace."""
                     # Now that we know the basetime, we can derive max_window
                     self.max_window = self._calc_max_window()
 
-                if trace_class:
+                if trace_class and (
+                    (cpus is None or cpu in cpus) and
+                    (pids is None or pid in pids) and
+                    (comms is None or comm in comms)
+                ):
                     data_str = fields_match.group('data')
 
                     # Remove empty arrays from the trace
@@ -495,15 +601,38 @@ is part of the trace.
                                            cls_for_unique_word[unique_word]))
             cls_for_unique_word[unique_word] = trace_class
 
+        # Most unique words end with a colon, and can therefore only appear in
+        # the event names at the beginning of the line.
+        cls_for_event_word = {
+            unique_word: trace_class
+            for unique_word, trace_class in cls_for_unique_word.items()
+            if unique_word.endswith(':')
+        }
+        cls_for_unique_word = {
+            unique_word: trace_class
+            for unique_word, trace_class in cls_for_unique_word.items()
+            if unique_word not in cls_for_event_word
+        }
+
         try:
-            with io.open(trace_file, 'r', encoding='utf-8') as fin:
+            with self._open_trace_file(trace_file) as fin:
                 self.lines = 0
                 self.__populate_data(
-                    fin, cls_for_unique_word)
+                    fin, cls_for_event_word, cls_for_unique_word)
         except FTraceParseError as e:
             raise ValueError('Failed to parse ftrace file {}:\n{}'.format(
                 trace_file, str(e)))
 
+    def _open_trace_file(self, trace_file):
+        """Open the trace file to parse.
+
+        :returns: a context manager yielding an iterable of lines.
+
+        Subclasses can override this method to parse only a part of the
+        file.
+        """
+        return io.open(trace_file, 'r', encoding='utf-8')
+
     def __getattr__(self, attr):
         """Raises useful exception when trying to access deprecated
         attributes."""
@@ -780,6 +909,16 @@ class FTrace(GenericFTrace):
         represent timestamps that are not normalized, (i.e. the ones
         you find in the trace file). The window is inclusive.
 
+    :param filters: a dict mapping "__cpu", "__pid" or "__comm" to a list of
+        values. Only the events with one of these values for each of the
+        fields are kept, and the other lines are not parsed. The cache is not
+        used when filters are given.
+
+    :param stream_report: If True and the trace is a .dat file, the output
+        of "trace-cmd report" is parsed as it is produced through a pipe,
+        instead of being written to a temporary text file first. This lets
+        trace-cmd and the parser run concurrently.
+
 
     :type path: str
     :type name: str
@@ -788,6 +927,8 @@ class FTrace(GenericFTrace):
     :type events: list
     :type window: tuple
     :type abs_window: tuple
+    :type filters: dict
+    :type stream_report: bool
 
     This is a simple example:
     ::
@@ -797,33 +938,55 @@ class FTrace(GenericFTrace):
 
     """
 
+    report_pipe_bufsize = 1024 * 1024
+    """Size of the buffer used to read the output of "trace-cmd report" when
+    streaming it. The pipe itself is bounded, so trace-cmd will block when the
+    parser lags behind."""
+
     def __init__(self, path=".", name="", normalize_time=True, scope="all",
-                 events=[], window=(0, None), abs_window=(0, None)):
+                 events=[], window=(0, None), abs_window=(0, None),
+                 filters=None, stream_report=False):
 
         self.raw_events = []
+        self.stream_report = stream_report
         self.trace_path = self.__process_path(path)
 
         super(FTrace, self).__init__(name, normalize_time, scope, events,
-                                     window, abs_window)
+                                     window, abs_window, filters=filters)
 
     def _parsing_setup(self):
         super(FTrace, self)._parsing_setup()
 
+        if self.__is_streamed():
+            # The metadata are populated from the header of the report while
+            # it is parsed, see _open_trace_file()
+            return
+
         if self.read_from_dat:
             self.file_to_parse = self.__generate_trace_txt(self.trace_path)
 
         # file_to_parse is already set to trace_path in the superclass,
         # so no "else" is needed here
 
-        self.__populate_trace_metadata(self.__get_trace_metadata())
+        with io.open(self.file_to_parse, 'r', encoding='utf-8') as fin:
+            self.__populate_trace_metadata(self.__get_trace_metadata(fin))
 
     def _parsing_teardown(self):
         super(FTrace, self)._parsing_teardown()
 
         # Remove the .txt trace if it was generated from a .dat
-        if self.read_from_dat:
+        if self.read_from_dat and not self.__is_streamed():
             os.remove(self.file_to_parse)
 
+    def _open_trace_file(self, trace_file):
+        if self.__is_streamed():
+            return self.__stream_trace_report(trace_file)
+        else:
+            return super(FTrace, self)._open_trace_file(trace_file)
+
+    def __is_streamed(self):
+        return self.read_from_dat and self.stream_report
+
     def _load_metadata_from_cache(self, metadata):
         super(FTrace, self)._load_metadata_from_cache(metadata)
 
@@ -873,19 +1036,14 @@ class FTrace(GenericFTrace):
 
         return trace_to_read
 
-    def __generate_trace_txt(self, trace_dat):
-        """Run "trace-cmd report [ -r raw_event ]* trace_dat > tempfile"
+    def __get_trace_cmd_report_cmd(self, trace_dat):
+        """Build the "trace-cmd report [ -r raw_event ]* trace_dat" command
 
-        The resulting trace is stored in files with extension ".txt". If
-        fname is "my_trace.dat", the trace is stored in "my_trace.txt". The
-        contents of the destination file is overwritten if it exists.
         Trace events which require unformatted output (raw_event == True)
         are added to the command line with one '-r <event>' each event and
         trace-cmd then prints those events without formatting.
 
         """
-        from subprocess import check_call
-
         cmd = ["trace-cmd", "report", '-t']
 
         if not os.path.isfile(trace_dat):
@@ -897,10 +1055,20 @@ class FTrace(GenericFTrace):
             cmd.extend([ '-r', raw_event ])
 
         cmd.append(trace_dat)
+        return cmd
+
+    def __generate_trace_txt(self, trace_dat):
+        """Run "trace-cmd report [ -r raw_event ]* trace_dat > tempfile"
+
+        The resulting trace is stored in a temporary file, the path of which is
+        returned.
+
+        """
+        cmd = self.__get_trace_cmd_report_cmd(trace_dat)
 
         with open(os.devnull) as devnull, NamedTemporaryFile(delete=False) as fout:
             try:
-                check_call(cmd, stderr=devnull, stdout=fout)
+                subprocess.check_call(cmd, stderr=devnull, stdout=fout)
             except OSError as exc:
                 if exc.errno == 2 and not exc.filename:
                     raise OSError(2, "trace-cmd not found in PATH, is it installed?")
@@ -909,6 +1077,59 @@ class FTrace(GenericFTrace):
 
         return fout.name
 
+    @contextlib.contextmanager
+    def __stream_trace_report(self, trace_dat):
+        """Run "trace-cmd report [ -r raw_event ]* trace_dat" and yield the
+        lines of its output as they are produced.
+        """
+        cmd = self.__get_trace_cmd_report_cmd(trace_dat)
+
+        with open(os.devnull, 'w') as devnull:
+            try:
+                proc = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=devnull,
+                    bufsize=self.report_pipe_bufsize,
+                )
+            except OSError as exc:
+                if exc.errno == 2 and not exc.filename:
+                    raise OSError(2, "trace-cmd not found in PATH, is it installed?")
+                else:
+                    raise
+
+        with proc:
+            fin = io.TextIOWrapper(proc.stdout, encoding='utf-8')
+            try:
+                lines = self.__stream_trace_metadata(fin)
+                yield lines
+            except BaseException:
+                proc.kill()
+                raise
+
+            # If the parser stopped before the end of the report, trace-cmd
+            # is not needed anymore
+            if fin.read(1):
+                proc.kill()
+            else:
+                ret = proc.wait()
+                if ret:
+                    raise subprocess.CalledProcessError(ret, cmd)
+
+    def __stream_trace_metadata(self, lines):
+        """Populate the trace metadata from the header of the trace, and return
+        an iterator over all of its lines.
+        """
+        header = []
+        lines = iter(lines)
+        for line in lines:
+            header.append(line)
+            if SPECIAL_FIELDS_RE.match(line):
+                break
+
+        self.__populate_trace_metadata(self.__get_trace_metadata(header))
+        return itertools.chain(header, lines)
+
     def __get_raw_event_list(self):
         self.raw_events = []
         # Generate list of events which need to be parsed in raw format
@@ -920,7 +1141,7 @@ class FTrace(GenericFTrace):
                     if name:
                         self.raw_events.append(name)
 
-    def __get_trace_metadata(self):
+    def __get_trace_metadata(self, lines):
         # Meta Data as expected to be found in the parsed trace header
         metadata_keys = ["version", "cpus"]
         res = {}
@@ -928,21 +1149,20 @@ class FTrace(GenericFTrace):
         for key in metadata_keys:
             setattr(self, "_" + key, None)
 
-        with io.open(self.file_to_parse, 'r', encoding='utf-8') as fin:
-            for line in fin:
-                if not metadata_keys:
-                    return res
-
-                metadata_pattern = r"^\b(" + "|".join(metadata_keys) + \
-                                   r")\b\s*=\s*([0-9]+)"
-                match = re.search(metadata_pattern, line)
-                if match:
-                    res[match.group(1)] = match.group(2)
-                    metadata_keys.remove(match.group(1))
-
-                if SPECIAL_FIELDS_RE.match(line):
-                    # Reached a valid trace line, abort metadata population
-                    return res
+        for line in lines:
+            if not metadata_keys:
+                return res
+
+            metadata_pattern = r"^\b(" + "|".join(metadata_keys) + \
+                               r")\b\s*=\s*([0-9]+)"
+            match = re.search(metadata_pattern, line)
+            if match:
+                res[match.group(1)] = match.group(2)
+                metadata_keys.remove(match.group(1))
+
+            if SPECIAL_FIELDS_RE.match(line):
+                # Reached a valid trace line, abort metadata population
+                return res
 
         return res
 
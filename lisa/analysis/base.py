@@ -710,6 +710,7 @@ class TraceAnalysisBase(AnalysisHelpers):
                 # Include the trace window in the spec since that influences
                 # what the analysis was seeing
                 trace_state=trace.trace_state,
+                trace_window=trace.trace_window,
                 # Make a deepcopy as it is critical that the PandasDataDesc is
                 # not modified under the hood once inserted in the cache
                 kwargs=copy.deepcopy({
@@ -169,6 +169,9 @@ class FrequencyAnalysis(TraceAnalysisBase):
 
           * A ``total_time`` column (the total time spent at a frequency)
           * A ``active_time`` column (the non-idle time spent at a frequency)
+
+          Times are expressed in the :attr:`~lisa.trace.Trace.time_unit` of
+          the trace.
         """
         freq_df = self.df_cpus_frequency()
         # Assumption: all CPUs in a cluster run at the same frequency, i.e. the
@@ -195,6 +198,9 @@ class FrequencyAnalysis(TraceAnalysisBase):
         #     freq_active[t] == 1 if at time t the frequency is f
         #     freq_active[t] == 0 otherwise
         available_freqs = sorted(cluster_freqs.frequency.unique())
+        # Timestamps can be duplicated with an integer time unit, only the
+        # last frequency set at a given timestamp lasts
+        cluster_freqs = cluster_freqs[~cluster_freqs.index.duplicated(keep='last')]
         cluster_freqs = cluster_freqs.join(
             cluster_active.to_frame(name='active'), how='outer')
         cluster_freqs.fillna(method='ffill', inplace=True)
@@ -222,6 +228,9 @@ class FrequencyAnalysis(TraceAnalysisBase):
 
           * A ``total_time`` column (the total time spent at a frequency)
           * A ``active_time`` column (the non-idle time spent at a frequency)
+
+          Times are expressed in the :attr:`~lisa.trace.Trace.time_unit` of
+          the trace.
         """
         if not isinstance(cpu, int):
             raise TypeError('Input CPU parameter must be an integer')
@@ -241,6 +250,9 @@ class FrequencyAnalysis(TraceAnalysisBase):
 
           * A ``total_time`` column (the total time spent at a frequency)
           * A ``active_time`` column (the non-idle time spent at a frequency)
+
+          Times are expressed in the :attr:`~lisa.trace.Trace.time_unit` of
+          the trace.
         """
         domains = self.trace.plat_info['freq-domains']
         for domain in domains:
@@ -297,7 +309,7 @@ class FrequencyAnalysis(TraceAnalysisBase):
         """
         transitions = self.df_cpu_frequency_transitions(cpu)['transitions']
         return pd.DataFrame(dict(
-            transitions=transitions / self.trace.time_range,
+            transitions=transitions / self.trace.time_range * self.trace.time_scale,
         ))
 
     @df_cpu_frequency.used_events
@@ -410,7 +422,7 @@ class FrequencyAnalysis(TraceAnalysisBase):
             state_axis.hlines(0, 0, indet_range_max, linewidth=1.0, label='indeterminate clock state', linestyle='--')
             state_axis.legend(bbox_to_anchor=(0., 1.02, 1., 0.102), loc=3, ncol=3, mode='expand')
             state_axis.set_yticks([])
-            state_axis.set_xlabel('seconds')
+            state_axis.set_xlabel('Time ({})'.format(self.trace.time_unit))
             state_axis.set_xlim(start, end)
 
         return self.do_plot(plotter, height=8, nrows=2, axis=axis, **kwargs)
@@ -518,7 +530,7 @@ class FrequencyAnalysis(TraceAnalysisBase):
                 if pct:
                     axis.set_xlabel("Time share (%)")
                 else:
-                    axis.set_xlabel("Time (s)")
+                    axis.set_xlabel("Time ({})".format(self.trace.time_unit))
 
                 axis.set_ylabel("Frequency (Hz)")
                 axis.grid(True)
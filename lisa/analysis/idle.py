@@ -52,14 +52,17 @@ class IdleAnalysis(TraceAnalysisBase):
         :returns: A :class:`pandas.Series` that equals 1 at timestamps where the
           CPU is reported to be non-idle, 0 otherwise
         """
-        idle_df = self.trace.df_events('cpu_idle')
+        idle_df = self.trace.df_events('cpu_idle', columns=['cpu_id', 'state'])
         cpu_df = idle_df[idle_df.cpu_id == cpu]
 
         # Turn -1 into 1 and everything else into 0
         cpu_active = cpu_df.state.map({-1: 1})
         cpu_active.fillna(value=0, inplace=True)
 
-        return cpu_active
+        # Timestamps can be duplicated with an integer time unit. The signal
+        # takes the last value recorded at a given timestamp, which also
+        # allows joining it with other signals.
+        return cpu_active[~cpu_active.index.duplicated(keep='last')]
 
     @signal_cpu_active.used_events
     def signal_cluster_active(self, cluster):
@@ -131,8 +134,11 @@ class IdleAnalysis(TraceAnalysisBase):
 
           * Idle states as index
           * A ``time`` column (The time spent in the idle state)
+
+          Times are expressed in the :attr:`~lisa.trace.Trace.time_unit` of
+          the trace.
         """
-        idle_df = self.trace.df_events('cpu_idle')
+        idle_df = self.trace.df_events('cpu_idle', columns=['cpu_id', 'state'])
         idle_df = idle_df[idle_df['cpu_id'] == cpu]
 
         # Ensure accurate time-based sum of state deltas
@@ -162,8 +168,11 @@ class IdleAnalysis(TraceAnalysisBase):
 
           * Idle states as index
           * A ``time`` column (The time spent in the idle state)
+
+          Times are expressed in the :attr:`~lisa.trace.Trace.time_unit` of
+          the trace.
         """
-        idle_df = self.trace.df_events('cpu_idle')
+        idle_df = self.trace.df_events('cpu_idle', columns=['cpu_id', 'state'])
 
         # Create a dataframe with a column per CPU
         cols = {
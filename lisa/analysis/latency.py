@@ -196,7 +196,7 @@ class LatencyAnalysis(TraceAnalysisBase):
         :type threshold_ms: int or float
         """
 
-        axis.axhline(threshold_ms / 1e3, linestyle='--', color=self.LATENCY_THRESHOLD_COLOR,
+        axis.axhline(threshold_ms / 1e3 * self.trace.time_scale, linestyle='--', color=self.LATENCY_THRESHOLD_COLOR,
                      label="{}ms threshold".format(threshold_ms))
 
         for do_plot, name, label, df_getter in (
@@ -273,7 +273,8 @@ class LatencyAnalysis(TraceAnalysisBase):
         """
 
         df = self._get_latencies_df(task, wakeup, preempt)
-        threshold_s = threshold_ms / 1e3
+        # Latencies are expressed in the unit of the trace index
+        threshold_s = threshold_ms / 1e3 * self.trace.time_scale
         cdf_df, above, below = self._get_cdf(df.latency, threshold_s)
 
         cdf_df.plot(ax=axis, xlim=(0, None), label="CDF")
@@ -308,7 +309,8 @@ class LatencyAnalysis(TraceAnalysisBase):
         """
 
         df = self._get_latencies_df(task, wakeup, preempt)
-        threshold_s = threshold_ms / 1e3
+        # Latencies are expressed in the unit of the trace index
+        threshold_s = threshold_ms / 1e3 * self.trace.time_scale
 
         df.latency.plot.hist(bins=bins, ax=axis, xlim=(0, 1.1 * df.latency.max()))
         axis.axvspan(0, threshold_s, facecolor=self.LATENCY_THRESHOLD_ZONE_COLOR, alpha=0.5,
@@ -47,6 +47,9 @@ class StatusAnalysis(TraceAnalysisBase):
 
           * A ``overutilized`` column (the overutilized status at a given time)
           * A ``len`` column (the time spent in that overutilized status)
+
+          Times are expressed in the :attr:`~lisa.trace.Trace.time_unit` of
+          the trace.
         """
         # Build sequence of overutilization "bands"
         df = self.trace.df_events('sched_overutilized')
@@ -59,7 +62,8 @@ class StatusAnalysis(TraceAnalysisBase):
 
     def get_overutilized_time(self):
         """
-        Return the time spent in overutilized state.
+        Return the time spent in overutilized state, in the
+        :attr:`~lisa.trace.Trace.time_unit` of the trace.
         """
         df = self.df_overutilized()
         return df[df['overutilized'] == 1]['len'].sum()
@@ -485,6 +485,9 @@ class TasksAnalysis(TraceAnalysisBase):
           * PIDs as index
           * A ``comm`` column (the name of the task)
           * A ``runtime`` column (the time that task spent running)
+
+          Times are expressed in the :attr:`~lisa.trace.Trace.time_unit` of
+          the trace.
         """
 
         runtimes = {}
@@ -520,6 +523,9 @@ class TasksAnalysis(TraceAnalysisBase):
 
           * CPU IDs as index
           * A ``runtime`` column (the time the task spent being active)
+
+          Times are expressed in the :attr:`~lisa.trace.Trace.time_unit` of
+          the trace.
         """
         cpus = set(range(self.trace.cpus_count))
 
@@ -640,6 +646,10 @@ class TasksAnalysis(TraceAnalysisBase):
         # without it, which means the time spent in WAKING state will be
         # accounted into the previous state.
         df = df[df['curr_state'] != TaskState.TASK_WAKING]
+        # Timestamps can be duplicated with an integer time unit. The states
+        # that did not last are dropped, so that activations can be paired
+        # with the following sleep using the index.
+        df = df[~df.index.duplicated(keep='last')]
 
         df['active'] = df['curr_state'].map(f)
         df = df[['active', 'cpu']]
@@ -812,7 +822,8 @@ class TasksAnalysis(TraceAnalysisBase):
 
         series = series_rolling_apply(df["target_cpu"],
                                       lambda x: x.count() / (window if per_sec else 1),
-                                      window, window_float_index=False, center=True)
+                                      window, window_float_index=False, center=True,
+                                      time_unit=self.trace.time_unit)
 
         series = series_refit_index(series, window=self.trace.window)
         series.plot(ax=axis, legend=False)
@@ -874,7 +885,8 @@ class TasksAnalysis(TraceAnalysisBase):
 
         series = series_rolling_apply(df["target_cpu"],
                                       lambda x: x.count() / (window if per_sec else 1),
-                                      window, window_float_index=False, center=True)
+                                      window, window_float_index=False, center=True,
+                                      time_unit=self.trace.time_unit)
 
         series = series_refit_index(series, window=self.trace.window)
         series.plot(ax=axis, legend=False)
@@ -1034,7 +1046,7 @@ class TasksAnalysis(TraceAnalysisBase):
                     duration_axis.set_ylabel('Duty cycle')
 
                 if duration:
-                    duration_axis.set_ylabel('Duration in seconds')
+                    duration_axis.set_ylabel('Duration ({})'.format(self.trace.time_unit))
                     for active, label in (
                             (True, 'Activations'),
                             (False, 'Sleep')
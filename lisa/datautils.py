@@ -22,6 +22,7 @@ import math
 import itertools
 import warnings
 from operator import attrgetter
+from numbers import Integral
 
 import numpy as np
 import pandas as pd
@@ -178,7 +179,7 @@ def df_split_signals(df, signal_cols, align_start=False, window=None):
                 raise ValueError('align_start=True cannot be used with window != None')
             window = (df.index[0], None)
 
-        for group, signal in df.groupby(signal_cols):
+        for group, signal in df.groupby(signal_cols, observed=True):
             # When only one column is looked at, the group is the value instead of
             # a tuple of values
             if len(signal_cols) < 2:
@@ -301,8 +302,10 @@ def df_squash(df, start, end, column='delta'):
     # If s1 is in the interval, we just need to cap its len to
     # s1 - e1.index
 
-    prev_df = df[:start]
-    middle_df = df[start:end]
+    # Use label-based slicing, since df[start:end] is positional on integer
+    # indices
+    prev_df = df.loc[:start]
+    middle_df = df.loc[start:end]
 
     # Tweak the closest previous event to include it in the slice
     if not prev_df.empty and not (start in middle_df.index):
@@ -351,6 +354,32 @@ def df_filter(df, filter_columns):
     return df[key]
 
 
+def df_filter_isin(df, filter_columns):
+    """
+    Filter the content of a dataframe, keeping the rows where each column
+    contains one of the given values.
+
+    :param df: DataFrame to filter
+    :type df: pandas.DataFrame
+
+    :param filter_columns: Dict of ``{"column": [value, ...]}`` that rows have
+        to match to be selected.
+    :type filter_columns: dict(str, list(object))
+    """
+    if not filter_columns:
+        return df
+
+    key = functools.reduce(
+        operator.and_,
+        (
+            df[col].isin(values)
+            for col, values in filter_columns.items()
+        )
+    )
+
+    return df[key]
+
+
 def df_merge(df_list, drop_columns=None, drop_inplace=False, filter_columns=None):
     """
     Merge a list of :class:`pandas.DataFrame`, keeping the index sorted.
@@ -445,7 +474,9 @@ def series_integrate(y, x=None, sign=None, method='rect', rect_step='post'):
     Compute the integral of `y` with respect to `x`.
 
     :return: A scalar :math:`\\int_{x=A}^{x=B} y \\, dx`, where `x` is either the
-        index of `y` or another series.
+        index of `y` or another series. It is expressed in the unit of `y`
+        times the unit of `x`, e.g. in nanoseconds when integrating a square
+        wave indexed by nanosecond timestamps.
 
     :param y: Series with the data to integrate.
     :type y: pandas.DataFrame
@@ -761,8 +792,43 @@ def df_window_signals(df, window, signals, compress_init=False, clip_window=True
     .. seealso:: :func:`df_split_signals`
     """
 
+    def window_signal(signal_df):
+        # Get the row immediately preceding the window start
+        loc = _get_loc(signal_df.index, window[0], method='ffill')
+        return signal_df.iloc[loc:loc + 1]
+
+    def get_signals_init():
+        # Get the value of each signal at the beginning of the window
+        return [
+            window_signal(signal_df)
+            for signal, signal_df in itertools.chain.from_iterable(
+                df_split_signals(df, signal.fields, align_start=False)
+                for signal in signals
+            )
+            # Only consider the signal that are in the window. Signals that started
+            # after the window are irrelevant.
+            if not signal_df.empty and signal_df.index[0] <= window[0]
+        ]
+
+    return _df_window_signals(df, window, get_signals_init, compress_init=compress_init, clip_window=clip_window)
+
+
+def _df_window_signals(df, window, get_signals_init, compress_init, clip_window):
+    """
+    Implementation of :func:`df_window_signals`.
+
+    :param get_signals_init: Callable returning a list of dataframes with the
+        row of ``df`` giving the value of each signal at the beginning of the
+        window.
+    :type get_signals_init: collections.abc.Callable
+    """
+
     def before(x):
-        return np.nextafter(x, -math.inf)
+        # Integer indices, such as nanosecond timestamps
+        if isinstance(x, (Integral, np.integer)):
+            return x - 1
+        else:
+            return np.nextafter(x, -math.inf)
 
     def make_empty_df():
         empty = pd.DataFrame(columns=df.columns)
@@ -797,22 +863,7 @@ def df_window_signals(df, window, signals, compress_init=False, clip_window=True
         if windowed_df.index[0] == _window[0]:
             windowed_df = windowed_df.iloc[1:]
 
-    def window_signal(signal_df):
-        # Get the row immediately preceding the window start
-        loc = _get_loc(signal_df.index, window[0], method='ffill')
-        return signal_df.iloc[loc:loc + 1]
-
-    # Get the value of each signal at the beginning of the window
-    signal_df_list = [
-        window_signal(signal_df)
-        for signal, signal_df in itertools.chain.from_iterable(
-            df_split_signals(df, signal.fields, align_start=False)
-            for signal in signals
-        )
-        # Only consider the signal that are in the window. Signals that started
-        # after the window are irrelevant.
-        if not signal_df.empty and signal_df.index[0] <= window[0]
-    ]
+    signal_df_list = get_signals_init()
 
     if compress_init:
         def make_init_df_index(init_df):
@@ -833,7 +884,7 @@ def df_window_signals(df, window, signals, compress_init=False, clip_window=True
                 start = extra_df.index[-1]
 
             index = list(smallest_increment(start, len(init_df)))
-            index = pd.Float64Index(reversed(index))
+            index = pd.Index(list(reversed(index)), name=init_df.index.name)
             return index
     else:
         def make_init_df_index(init_df):
@@ -844,8 +895,12 @@ def df_window_signals(df, window, signals, compress_init=False, clip_window=True
     init_df = pd.concat([extra_df] + signal_df_list)
     init_df.sort_index(inplace=True)
     # Remove duplicated indices, meaning we selected the same row multiple
-    # times because it's part of multiple signals
-    init_df = init_df.loc[~init_df.index.duplicated(keep='first')]
+    # times because it's part of multiple signals. If the index itself can
+    # contain duplicates, the __line column tells apart the rows.
+    if '__line' in init_df.columns:
+        init_df = init_df.loc[~init_df.set_index('__line', append=True).index.duplicated(keep='first')]
+    else:
+        init_df = init_df.loc[~init_df.index.duplicated(keep='first')]
 
     init_df.index = make_init_df_index(init_df)
     return pd.concat([init_df, windowed_df])
@@ -1001,7 +1056,7 @@ def series_tunnel_mean(series):
 
 
 @SeriesAccessor.register_accessor
-def series_rolling_apply(series, func, window, window_float_index=True, center=False):
+def series_rolling_apply(series, func, window, window_float_index=True, center=False, time_unit='s'):
     """
     Apply a function on a rolling window of a series.
 
@@ -1026,6 +1081,10 @@ def series_rolling_apply(series, func, window, window_float_index=True, center=F
         recommended if the index is not used by ``func`` since it will remove
         the need for a conversion.
     :type window_float_index: bool
+
+    :param time_unit: Unit of the index of ``series``, as accepted by
+        :func:`pandas.to_timedelta`. ``window`` is always in seconds.
+    :type time_unit: str
     """
     orig_index = series.index
 
@@ -1036,7 +1095,7 @@ def series_rolling_apply(series, func, window, window_float_index=True, center=F
             return func(s)
 
     # Use a timedelta index so that rolling gives time-based results
-    index = pd.to_timedelta(orig_index, unit='s')
+    index = pd.to_timedelta(orig_index, unit=time_unit)
     series = pd.Series(series.values, index=index)
 
     window_ns = int(window * 1e9)
@@ -1044,7 +1103,8 @@ def series_rolling_apply(series, func, window, window_float_index=True, center=F
     values = series.rolling(rolling_window).apply(func, raw=False).values
 
     if center:
-        new_index = orig_index - (window / 2)
+        scale = pd.Timedelta(1, unit='s') / pd.Timedelta(1, unit=time_unit)
+        new_index = orig_index - (window * scale / 2)
     else:
         new_index = orig_index
 
@@ -19,9 +19,7 @@
 
 import shutil
 import uuid
-import sys
 import re
-import gc
 import math
 import abc
 import copy
@@ -29,11 +27,22 @@ import io
 import os
 import os.path
 import json
+import mmap
 import warnings
 import inspect
+import logging
 import shlex
 import contextlib
 import tempfile
+import hashlib
+import sqlite3
+import fcntl
+import threading
+import queue
+import heapq
+import bisect
+import itertools
+import time
 from functools import reduce, wraps
 from collections.abc import Iterable, Set, Mapping, Sequence
 from collections import namedtuple
@@ -45,15 +54,18 @@ import textwrap
 import numpy as np
 import pandas as pd
 import pyarrow.lib
+import pyarrow.feather
+import pyarrow.parquet
 
 import trappy
 import devlib
 from devlib.target import KernelVersion
 
 import lisa.utils
-from lisa.utils import Loggable, HideExekallID, memoized, deduplicate, deprecate, nullcontext, measure_time, checksum, newtype
+from lisa.utils import Loggable, HideExekallID, memoized, deduplicate, deprecate, nullcontext, measure_time, checksum, newtype, TASK_COMM_MAX_LEN
 from lisa.conf import SimpleMultiSrcConf, KeyDesc, TopLevelKeyDesc, TypedList, Configurable
-from lisa.datautils import df_split_signals, df_window, df_window_signals, SignalDesc, df_add_delta
+from lisa.datautils import df_split_signals, df_window, df_window_signals, _df_window_signals, SignalDesc, df_add_delta, df_filter_isin
+from lisa.trace_dat import TraceDatFTrace, make_unique_timestamps
 from lisa.version import VERSION_TOKEN
 from lisa.typeclass import FromString, IntListFromStringInstance
 
@@ -144,6 +156,109 @@ class TaskIDListFromStringInstance(FromString, types=TypedList[TaskID]):
         return 'comma-separated TaskIDs'
 
 
+class TaskRegistry:
+    """
+    Index of the tasks found in a trace, giving constant-time lookups by PID
+    and by name, and logarithmic-time lookups by name prefix.
+
+    :param df: Dataframe with one row per PID/name pair and ``pid``,
+        ``comm``, ``first_seen`` and ``last_seen`` columns, in order of first
+        appearance.
+    :type df: pandas.DataFrame
+
+    :param comm_max_len: Maximum length of the task names recorded by the
+        kernel. Longer names are truncated at that length before being looked
+        up, like :func:`lisa.datautils.df_filter_task_ids` does.
+    :type comm_max_len: int
+
+    :ivar df: The ``df`` the registry was built from. It gives the first and
+        last time each PID/name pair was seen, and therefore the rename
+        history of each PID.
+    """
+
+    def __init__(self, df, comm_max_len=TASK_COMM_MAX_LEN):
+        self.df = df
+        self.comm_max_len = comm_max_len
+
+        pid_names = {}
+        name_pids = {}
+        # Rows are in order of first appearance, so the lists are as well
+        for pid, comm in zip(df['pid'].tolist(), df['comm'].tolist()):
+            pid_names.setdefault(pid, []).append(comm)
+            name_pids.setdefault(comm, []).append(pid)
+
+        self.pid_names = dict(sorted(pid_names.items(), key=itemgetter(0)))
+        """
+        Mapping of PIDs to the list of names they had, in appearance order.
+        """
+
+        self.name_pids = dict(sorted(name_pids.items(), key=itemgetter(0)))
+        """
+        Mapping of task names to the list of PIDs that had them, in appearance
+        order.
+        """
+
+        # Sorted names, to look up prefixes with bisect
+        self._names = list(self.name_pids.keys())
+
+    def resolve_name(self, name):
+        """
+        Name of the task as found in the trace.
+
+        :param name: Task name. If it is not found and is longer than
+            ``comm_max_len``, its truncated version is looked up.
+        :type name: str
+
+        :raises KeyError: If no task has that name.
+        """
+        if name in self.name_pids:
+            return name
+        else:
+            truncated = name[:self.comm_max_len]
+            if truncated != name and truncated in self.name_pids:
+                return truncated
+            else:
+                raise KeyError(name)
+
+    def get_name_pids(self, name):
+        """
+        PIDs of the tasks named ``name``, in appearance order.
+
+        :param name: Task name, possibly longer than ``comm_max_len``.
+        :type name: str
+
+        :raises KeyError: If no task has that name.
+        """
+        return self.name_pids[self.resolve_name(name)]
+
+    def get_prefix_names(self, prefix):
+        """
+        Names of the tasks starting with ``prefix``, in sorted order.
+
+        :param prefix: Beginning of the task names. Like for
+            :meth:`resolve_name`, it is truncated to ``comm_max_len``.
+        :type prefix: str
+        """
+        prefix = prefix[:self.comm_max_len]
+        names = self._names
+        start = bisect.bisect_left(names, prefix)
+        end = start
+        while end < len(names) and names[end].startswith(prefix):
+            end += 1
+        return names[start:end]
+
+    def get_pid_names(self, pid):
+        """
+        Names of the task with PID ``pid``, in appearance order.
+
+        :param pid: Task PID.
+        :type pid: int
+
+        :raises KeyError: If no task has that PID.
+        """
+        return self.pid_names[pid]
+
+
 CPU = newtype(int, 'CPU')
 
 
@@ -156,6 +271,50 @@ class CPUListFromStringInstance(FromString, types=TypedList[CPU]):
         return FromString(TypedList[int]).get_format_description(short=short)
 
 
+def _merge_sorted(arrays):
+    """
+    Stable k-way merge of sorted arrays.
+
+    The arrays are merged pairwise with :func:`numpy.searchsorted`, which
+    takes ``O(n log(k))`` for ``k`` arrays of ``n`` items in total. Equal
+    items are sorted in the order of the arrays they come from.
+
+    :param arrays: Sorted arrays to merge.
+    :type arrays: list(numpy.ndarray)
+
+    :returns: A tuple ``(merged, order)`` with the merged array and the
+        position of its items in the concatenation of ``arrays``.
+    """
+    offsets = np.cumsum([0] + [len(array) for array in arrays])
+    items = [
+        (array, np.arange(offset, offset + len(array)))
+        for array, offset in zip(arrays, offsets)
+    ]
+
+    def merge(a, b):
+        (a, a_order), (b, b_order) = a, b
+        # Position of the items of b in the merged array
+        b_pos = np.searchsorted(a, b, side='right') + np.arange(len(b))
+        a_mask = np.ones(len(a) + len(b), dtype=bool)
+        a_mask[b_pos] = False
+
+        merged = np.empty(len(a_mask), dtype=np.result_type(a, b))
+        merged[a_mask] = a
+        merged[b_pos] = b
+        order = np.empty(len(a_mask), dtype=np.int64)
+        order[a_mask] = a_order
+        order[b_pos] = b_order
+        return (merged, order)
+
+    while len(items) > 1:
+        items = [
+            merge(*items[i:i + 2]) if i + 1 < len(items) else items[i]
+            for i in range(0, len(items), 2)
+        ]
+
+    return items[0]
+
+
 class TraceBase(abc.ABC):
     """
     Base class for common functionalities between :class:`Trace` and :class:`TraceView`
@@ -178,6 +337,14 @@ class TraceBase(abc.ABC):
         """
         return None
 
+    @property
+    def trace_window(self):
+        """
+        ``(start, end)`` window of the trace that this object is restricted
+        to, or ``None`` if it gives access to the whole trace.
+        """
+        return None
+
     @property
     def time_range(self):
         """
@@ -252,7 +419,7 @@ class TraceBase(abc.ABC):
 
         return df_add_delta(df, col=col_name, inplace=inplace, window=self.window)
 
-    def df_all_events(self, events=None):
+    def df_all_events(self, events=None, window=None):
         """
         Provide a dataframe with an ``info`` column containing the textual
         human-readable representation of the events fields.
@@ -260,6 +427,10 @@ class TraceBase(abc.ABC):
         :param events: List of events to include. If ``None``, all parsed
             events will be used.
         :type events: list(str) or None
+
+        :param window: Only include the events in that window, edges
+            included. Only that part of the dataframes is formatted.
+        :type window: tuple(float, float) or None
         """
         if events is None:
             events = sorted(self.available_events)
@@ -269,28 +440,54 @@ class TraceBase(abc.ABC):
 
         max_event_name_len = max(len(event) for event in events)
 
-        def make_info_row(row, event):
-            fields = ' '.join(
-                '{}={}'.format(key, value)
-                for key, value in row.iteritems()
-            )
-
-            return '{:<{event_name_len}}: {}'.format(event, fields, event_name_len=max_event_name_len)
+        def get_df(event):
+            if window is None:
+                return self.df_events(event)
+
+            # Only the overlapping partitions of partitioned traces are loaded
+            df = self.df_events(event, window=window, signals_init=False)
+            start, end = window
+            if start is not None:
+                df = df[df.index >= start]
+            if end is not None:
+                df = df[df.index <= end]
+            return df
 
-        def make_info_series(event):
-            df = self.df_events(event)
-            info = df.apply(make_info_row, axis=1, event=event)
-            info.name = 'info'
-            return info
+        def make_info(event, df):
+            prefix = '{:<{event_name_len}}: '.format(event, event_name_len=max_event_name_len)
+            # Format the fields column by column rather than row by row
+            fields = [
+                '{}='.format(col) + df[col].astype(str).values.astype(object)
+                for col in df.columns
+            ]
+            if fields:
+                info = reduce(lambda info, field: info + ' ' + field, fields)
+                return prefix + info
+            else:
+                return np.full(len(df), prefix, dtype=object)
 
-        series_list = [
-            make_info_series(event)
+        dfs = {
+            event: get_df(event)
             for event in events
-        ]
+        }
+        dfs = {
+            event: df
+            for event, df in dfs.items()
+            if not df.empty
+        }
+        if not dfs:
+            return pd.DataFrame({'info': []})
 
-        series = pd.concat(series_list)
-        series.sort_index(inplace=True)
-        return pd.DataFrame({'info': series})
+        index, order = _merge_sorted([
+            df.index.values
+            for df in dfs.values()
+        ])
+        info = np.concatenate([
+            make_info(event, df)
+            for event, df in dfs.items()
+        ])
+        index = pd.Index(index, name=next(iter(dfs.values())).index.name)
+        return pd.DataFrame({'info': info[order]}, index=index)
 
 
 class TraceView(Loggable, TraceBase):
@@ -331,7 +528,9 @@ class TraceView(Loggable, TraceBase):
 
       * :meth:`df_events` uses the underlying :meth:`lisa.trace.Trace.df_events`
         and trims the dataframe according to the given ``window`` before
-        returning it.
+        returning it. The window is located in the dataframe of the whole
+        trace with :func:`numpy.searchsorted`, so creating many views is
+        cheap.
       * ``self.start`` and ``self.end`` mimic the :class:`Trace` attributes but
         they are adjusted to match the given window. On top of this, this class
         mimics a regular :class:`Trace` using :func:`getattr`.
@@ -354,6 +553,10 @@ class TraceView(Loggable, TraceBase):
     def trace_state(self):
         return (self.start, self.end, self.base_trace.trace_state)
 
+    @property
+    def trace_window(self):
+        return (self.start, self.end)
+
     def __getattr__(self, name):
         return getattr(self.base_trace, name)
 
@@ -376,6 +579,22 @@ class TraceView(Loggable, TraceBase):
 
         return self.base_trace.df_events(event, **kwargs)
 
+    def iter_df_events(self, event, window=None, **kwargs):
+        """
+        Iterate over the dataframe of an event in the sliced trace, one
+        partition at a time.
+
+        :param event: Trace event name
+        :type event: str
+
+        :Variable keyword arguments: Forwarded to
+            :meth:`lisa.trace.Trace.iter_df_events`.
+        """
+        if window is None:
+            window = (self.start, self.end)
+
+        return self.base_trace.iter_df_events(event, window=window, **kwargs)
+
     def get_view(self, window, **kwargs):
         start = self.start
         end = self.end
@@ -407,6 +626,12 @@ class _AvailableTraceEventsSet:
         if self._trace._strict_events:
             return self._trace._parsed_events.setdefault(event, False)
 
+        # The index of the trace can tell without parsing anything
+        if event not in self._trace._parsed_events:
+            available = self._trace._index_has_event(event)
+            if available is not None:
+                return available
+
         # Try to parse the event in case it was not parsed already
         if event not in self._trace._parsed_events:
             # If the trace file is not accessible anymore, we will get an OSError
@@ -561,6 +786,39 @@ class PandasDataDescNF:
     def to_json_map(self):
         return dict(self._nf)
 
+    def get(self, key, default=None):
+        """
+        Get the value of ``key`` in the spec this normal form was built from,
+        or ``default`` if there is no such key.
+
+        Containers are given back as :class:`tuple`, :class:`frozenset` and
+        :class:`dict`, whatever their original type.
+        """
+        for _key, val in self._nf:
+            if _key == key:
+                return self._decode(val)
+
+        return default
+
+    @classmethod
+    def _decode(cls, val):
+        "Reverse of :meth:`_coerce`, up to the type of the containers"
+        if isinstance(val, tuple):
+            kind, val = val
+            if kind == 'sequence':
+                return tuple(map(cls._decode, val))
+            elif kind == 'set':
+                return frozenset(map(cls._decode, val))
+            elif kind == 'mapping':
+                return {
+                    cls._decode(key): cls._decode(val)
+                    for key, val in val
+                }
+            else:
+                return val
+        else:
+            return val
+
     @classmethod
     def _coerce_json(cls, x):
         """
@@ -588,6 +846,30 @@ class PandasDataDescNF:
         ))
         return cls(nf=nf)
 
+@contextlib.contextmanager
+def _atomic_path(path):
+    """
+    Context manager yielding a temporary path in the folder of ``path``. The
+    temporary file is moved to ``path`` if the block does not raise, so that
+    other processes never see a partially written file.
+    """
+    dirname, basename = os.path.split(path)
+    fd, temp_path = tempfile.mkstemp(
+        dir=dirname,
+        prefix='.{}.'.format(basename),
+        suffix=TraceCache.SWAP_TEMP_SUFFIX,
+    )
+    os.close(fd)
+    try:
+        yield temp_path
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temp_path)
+        raise
+    else:
+        os.replace(temp_path, path)
+
+
 class PandasDataSwapEntry:
     """
     Entry in the pandas data swap area of :class:`Trace`.
@@ -599,6 +881,11 @@ class PandasDataSwapEntry:
     :param name: Name of the entry. If ``None``, a random UUID will be
         generated.
     :type name: str or None
+
+    :param data_format: Storage format of the data, among
+        :attr:`TraceCache.DATAFRAME_SWAP_FORMATS`. If ``None``,
+        :attr:`TraceCache.DATAFRAME_SWAP_FORMAT` is used.
+    :type data_format: str or None
     """
 
     META_EXTENSION = '.meta'
@@ -606,9 +893,10 @@ class PandasDataSwapEntry:
     Extension used by the metadata file of the swap entry in the swap.
     """
 
-    def __init__(self, pd_desc_nf, name=None):
+    def __init__(self, pd_desc_nf, name=None, data_format=None):
         self.pd_desc_nf = pd_desc_nf
         self.name = name or uuid.uuid4().hex
+        self.data_format = data_format or TraceCache.DATAFRAME_SWAP_FORMAT
 
     @property
     def meta_filename(self):
@@ -622,7 +910,10 @@ class PandasDataSwapEntry:
         """
         Filename of the pandas data file in the swap.
         """
-        return '{}{}'.format(self.name, TraceCache.DATAFRAME_SWAP_EXTENSION)
+        return '{}{}'.format(
+            self.name,
+            TraceCache.DATAFRAME_SWAP_FORMATS[self.data_format],
+        )
 
     def to_json_map(self):
         """
@@ -632,6 +923,7 @@ class PandasDataSwapEntry:
             'version-token': VERSION_TOKEN,
             'name': self.name,
             'desc': self.pd_desc_nf.to_json_map(),
+            'format': self.data_format,
         }
 
     @classmethod
@@ -644,14 +936,15 @@ class PandasDataSwapEntry:
 
         pd_desc_nf = PandasDataDescNF.from_json_map(mapping['desc'])
         name = mapping['name']
-        return cls(pd_desc_nf=pd_desc_nf, name=name)
+        data_format = mapping.get('format')
+        return cls(pd_desc_nf=pd_desc_nf, name=name, data_format=data_format)
 
     def to_path(self, path):
         """
         Save the swap entry metadata to the given ``path``.
         """
         data = self.to_json_map()
-        with open(path, 'w') as f:
+        with _atomic_path(path) as temp_path, open(temp_path, 'w') as f:
             json.dump(data, f)
             f.write('\n')
 
@@ -666,6 +959,174 @@ class PandasDataSwapEntry:
         return cls.from_json_map(mapping)
 
 
+class _PackedSwapStore:
+    """
+    Swap area entries packed in a single SQLite database file, rather than
+    one data file and one metadata file per entry.
+
+    :param swap_dir: Folder of the swap area.
+    :type swap_dir: str
+
+    Each entry is a row holding the JSON metadata of a
+    :class:`PandasDataSwapEntry`, and its serialized data is split in chunks
+    stored in another table, since SQLite limits the size of a single value.
+    SQLite takes care of the atomicity of the writes and of the locking
+    between processes.
+    """
+
+    FILENAME = 'trace.swap.db'
+    """
+    Name of the database file in the swap area.
+    """
+
+    JOURNAL_SUFFIX = '-journal'
+    """
+    Suffix of the rollback journal of the database, that must not be removed
+    since it is needed to recover from a crash.
+    """
+
+    COMPACT_RATIO = 0.5
+    """
+    Fraction of the database file that can be left unused by deleted entries
+    before it is compacted.
+    """
+
+    CHUNK_SIZE = 2 ** 28
+    """
+    Maximum size in bytes of the chunks the data of an entry is split in.
+
+    It is further capped by the ``SQLITE_LIMIT_LENGTH`` limit of the
+    connection when it can be queried.
+    """
+
+    def __init__(self, swap_dir):
+        self.path = os.path.join(swap_dir, self.FILENAME)
+
+    def _open(self):
+        return sqlite3.connect(self.path, timeout=60)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        con = self._open()
+        try:
+            con.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'name TEXT PRIMARY KEY, meta TEXT NOT NULL, size INTEGER NOT NULL, '
+                'mtime REAL NOT NULL)'
+            )
+            con.execute(
+                'CREATE TABLE IF NOT EXISTS chunks ('
+                'name TEXT NOT NULL, idx INTEGER NOT NULL, data BLOB NOT NULL, '
+                'PRIMARY KEY (name, idx))'
+            )
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def get_metadata(self):
+        """
+        Get the JSON metadata of all entries, as a mapping of entry name to
+        metadata string.
+        """
+        with self._connect() as con:
+            return dict(con.execute('SELECT name, meta FROM entries'))
+
+    def get_index(self):
+        """
+        Get the size and modification time of all entries, as a mapping of
+        entry name to ``(size, mtime)``.
+        """
+        with self._connect() as con:
+            return {
+                name: (size, mtime)
+                for name, size, mtime in con.execute('SELECT name, size, mtime FROM entries')
+            }
+
+    def read(self, name):
+        """
+        Read the data of the entry ``name``.
+
+        :raises KeyError: If there is no such entry.
+        """
+        with self._connect() as con:
+            row = con.execute('SELECT size FROM entries WHERE name = ?', (name,)).fetchone()
+            if row is None:
+                raise KeyError(name)
+
+            return b''.join(
+                chunk
+                for chunk, in con.execute('SELECT data FROM chunks WHERE name = ? ORDER BY idx', (name,))
+            )
+
+    def write(self, name, meta, data):
+        """
+        Write the entry ``name``, replacing any existing one.
+
+        :param meta: JSON metadata of the entry.
+        :type meta: str
+
+        :param data: Serialized data of the entry.
+        :type data: bytes
+        """
+        with self._connect() as con:
+            chunk_size = self.CHUNK_SIZE
+            # Leave some room for the other columns of the row, which are
+            # accounted for in the limit as well
+            try:
+                chunk_size = min(chunk_size, con.getlimit(sqlite3.SQLITE_LIMIT_LENGTH) // 2)
+            # Python < 3.11
+            except AttributeError:
+                pass
+
+            data = memoryview(data)
+            con.execute('DELETE FROM chunks WHERE name = ?', (name,))
+            con.executemany(
+                'INSERT INTO chunks VALUES (?, ?, ?)',
+                (
+                    (name, idx, data[start:start + chunk_size])
+                    for idx, start in enumerate(range(0, len(data), chunk_size))
+                )
+            )
+            con.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                (name, meta, len(data), time.time())
+            )
+
+    def delete(self, names):
+        """
+        Delete the given entries.
+
+        :returns: The total size of the data of the deleted entries.
+        """
+        names = list(names)
+        size = 0
+        with self._connect() as con:
+            for name in names:
+                row = con.execute('SELECT size FROM entries WHERE name = ?', (name,)).fetchone()
+                if row is not None:
+                    size += row[0]
+                    con.execute('DELETE FROM entries WHERE name = ?', (name,))
+                    con.execute('DELETE FROM chunks WHERE name = ?', (name,))
+        return size
+
+    def compact(self):
+        """
+        Give back to the filesystem the space left by deleted entries, if it
+        amounts to more than :attr:`COMPACT_RATIO` of the file.
+        """
+        with self._connect() as con:
+            page_count, = con.execute('PRAGMA page_count').fetchone()
+            freelist_count, = con.execute('PRAGMA freelist_count').fetchone()
+
+        if page_count and freelist_count / page_count > self.COMPACT_RATIO:
+            con = self._open()
+            try:
+                con.execute('VACUUM')
+            finally:
+                con.close()
+
+
 class TraceCacheSwapVersionError(ValueError):
     """
     Exception raised when the swap entry was created by another version of LISA
@@ -696,18 +1157,57 @@ class TraceCache:
     :type trace_path: str or None
 
     :param trace_md5: MD5 checksum of the trace file, to invalidate the cache
-        if the file changed.
+        if the file changed. If ``None``, it is computed on demand.
     :type trace_md5: str or None
 
+    :param trace_id: Fingerprint of the trace file, computed by sampling some
+        blocks of the file. If ``None``, it is computed on demand.
+    :type trace_id: str or None
+
     :param metadata: Metadata mapping to store in the swap area.
     :type metadata: dict or None
 
     :param swap_content: Initial content of the swap area.
     :type swap_content: dict(PandasDataDescNF, PandasDataSwapEntry) or None
 
+    :param swap_format: Storage format of the data written to the swap, among
+        :attr:`DATAFRAME_SWAP_FORMATS`. If ``None``, the format is chosen for
+        each entry: the format that is the fastest to reload is used as long
+        as the swap has room for it, and the most compact format otherwise.
+    :type swap_format: str or None
+
+    :param async_swap: If ``True``, data are written to the swap by a
+        background thread, so that the caller does not have to wait for the
+        serialization. Entries waiting to be written can still be fetched, and
+        :meth:`flush` waits until they are all written. Pending writes are
+        flushed when the interpreter exits.
+    :type async_swap: bool
+
+    :param packed_swap: If ``True``, the swap entries are packed in a single
+        database file in ``swap_dir`` instead of using a data file and a
+        metadata file per entry. This avoids creating lots of small files,
+        which are slow to handle on network filesystems.
+    :type packed_swap: bool
+
+    :param stats_hook: Called on each event recorded in the statistics of
+        the cache with the name of the statistic, the :class:`PandasDataDesc`
+        and the value added to the statistic. If a :class:`logging.Logger`
+        is given, the events are logged at debug level. See
+        :meth:`get_stats`.
+
+        .. note:: With ``async_swap=True``, the events about writing the
+            swap are recorded by the background writer thread, so the hook
+            is then also called from that thread.
+    :type stats_hook: collections.abc.Callable or logging.Logger or None
+
     The cache manages both the :class:`pandas.DataFrame` and
     :class:`pandas.Series` generated in memory and a swap area used to evict
     them, and to reload them quickly.
+
+    The swap area can be shared by several processes using the same trace:
+    files are written under a temporary name and renamed when complete, an
+    advisory lock is held while scrubbing the swap or updating the metadata,
+    and the entries written by other processes are discovered when needed.
     """
 
     INIT_SWAP_COST = 1e-7
@@ -723,23 +1223,107 @@ class TraceCache:
     Name of the trace metadata file in the swap area.
     """
 
+    TRACE_INDEX_FILENAME = 'trace.index'
+    """
+    Name of the trace events index file in the swap area.
+    """
+
+    TRACE_LOCK_FILENAME = 'trace.lock'
+    """
+    Name of the file used to lock the swap area.
+    """
+
+    SWAP_TEMP_SUFFIX = '.tmp'
+    """
+    Suffix of the files being written in the swap area.
+    """
+
+    SWAP_TEMP_MAX_AGE = 3600
+    """
+    Age in seconds after which temporary files in the swap area are assumed
+    to have been left behind by a process that died.
+    """
+
+    TRACE_ID_NR_BLOCKS = 64
+    """
+    Number of blocks of the trace file sampled to compute its fingerprint.
+    """
+
+    TRACE_ID_BLOCK_SIZE = 64 * 1024
+    """
+    Size in bytes of the blocks of the trace file sampled to compute its
+    fingerprint.
+    """
+
+    DATAFRAME_SWAP_FORMATS = {
+        # Snappy compressed, compact on disk
+        'parquet': '.parquet',
+        # Uncompressed Arrow IPC, memory mapped to reload it
+        'feather': '.feather',
+    }
+    """
+    Data storage formats that can be used to swap, with their file extension.
+    """
+
     DATAFRAME_SWAP_FORMAT = 'parquet'
     """
-    Data storage format used to swap.
+    Default data storage format used to swap.
+    """
+
+    DATAFRAME_SWAP_EXTENSION = DATAFRAME_SWAP_FORMATS[DATAFRAME_SWAP_FORMAT]
+    """
+    File extension of the default data swap format.
+    """
+
+    _SWAP_FORMATS_BY_SIZE = ('parquet', 'feather')
+    """
+    Swap formats from the most to the least compact, used until the size of
+    all of them has been measured.
     """
 
-    DATAFRAME_SWAP_EXTENSION = '.{}'.format(DATAFRAME_SWAP_FORMAT)
+    SWAP_WRITER_QUEUE_SIZE = 16
     """
-    File extension of the data swap format.
+    Maximum number of entries waiting to be written by the background swap
+    writer. Further writes block until there is room in the queue, so that
+    the memory held by pending entries stays bounded.
     """
 
-    def __init__(self, max_mem_size=None, trace_path=None, trace_md5=None, swap_dir=None, max_swap_size=None, swap_content=None, metadata=None):
+    def __init__(self, max_mem_size=None, trace_path=None, trace_md5=None, swap_dir=None, max_swap_size=None, swap_content=None, metadata=None, trace_id=None, swap_format=None, async_swap=False, packed_swap=False, stats_hook=None):
+        if swap_format is not None and swap_format not in self.DATAFRAME_SWAP_FORMATS:
+            raise ValueError('Dataframe swap format "{}" not handled'.format(swap_format))
+
         self._cache = {}
         self._data_cost = {}
+        # Memory accounting of the entries in _cache, maintained
+        # incrementally so that inserting does not need to look at all the
+        # entries
+        self._data_mem = {}
+        self._mem_usage = 0
+        # Eviction priority queue. Entries are pushed again when accessed,
+        # the previous items are then left stale in the heap and skipped.
+        self._mem_heap = []
+        self._mem_priority = {}
+        self._mem_inflation = 0
+        self._mem_seq = itertools.count()
+        # Retention score of the entries in _cache. It is only computed again
+        # when the swap cost estimation changed, as tracked by
+        # _swap_cost_gen, or when the entry got written to the swap.
+        self._mem_score = {}
+        self._swap_cost_gen = 0
         self._swap_content = swap_content or {}
+        self._swap_lock_depth = 0
+        self._swap_thread_lock = threading.RLock()
         self._pd_desc_swap_filename = {}
         self.swap_cost = self.INIT_SWAP_COST
+        self.swap_format = swap_format
+        # Per-format swap size to memory usage ratio, and time to reload a
+        # byte of memory usage. They are only known once measured.
+        self._swap_format_size_ratio = {}
+        self._swap_format_read_cost = {}
+        # Formats in which an entry was written to get its read cost measured
+        self._swap_format_tried = set()
         self.swap_dir = swap_dir
+        self._swap_store = _PackedSwapStore(swap_dir) if packed_swap and swap_dir else None
         self.max_swap_size = max_swap_size if max_swap_size is not None else math.inf
         self._swap_size = self._get_swap_size()
 
@@ -749,10 +1333,29 @@ class TraceCache:
 
         self.trace_path = os.path.abspath(trace_path)
         self._trace_md5 = trace_md5
+        self._trace_id = trace_id
+        self._trace_stat = None
+
+        # Statistics of each descriptor, by normal form
+        self._stats = {}
+        self._stats_desc = {}
+        # The statistics are also recorded by the background swap writer
+        self._stats_lock = threading.Lock()
+        self.stats_hook = stats_hook
+
+        # Entries queued for the background swap writer, by normal form
+        self._swap_in_flight = {}
+        self._swap_writer_excep = None
+        # The writer thread is only running while entries are queued
+        self._swap_writer = None
+        self._swap_writer_lock = threading.Lock()
+        if async_swap and swap_dir:
+            self._swap_queue = queue.Queue(maxsize=self.SWAP_WRITER_QUEUE_SIZE)
+        else:
+            self._swap_queue = None
 
-    @property
     @memoized
-    def _swap_size_overhead(self):
+    def _get_swap_size_overhead(self, data_format):
         def make_df(nr_col):
             return pd.DataFrame({
                 str(x): []
@@ -762,7 +1365,7 @@ class TraceCache:
         def get_size(nr_col):
             df = make_df(nr_col)
             buffer = io.BytesIO()
-            self._write_data(df, buffer)
+            self._write_data(df, buffer, data_format)
             return buffer.getbuffer().nbytes
 
         size1 = get_size(1)
@@ -777,14 +1380,14 @@ class TraceCache:
 
         return (file_overhead, col_overhead)
 
-    def _unbias_swap_size(self, data, size):
+    def _unbias_swap_size(self, data, size, data_format):
         """
         Remove the fixed size overhead of the file format being used, assuming
         a non-compressible overhead per file and per column.
 
         .. note:: This model seems to work pretty well for parquet format.
         """
-        file_overhead, col_overhead = self._swap_size_overhead
+        file_overhead, col_overhead = self._get_swap_size_overhead(data_format)
         # DataFrame
         try:
             nr_columns = data.shape[1]
@@ -805,6 +1408,78 @@ class TraceCache:
 
         return md5
 
+    @property
+    def trace_id(self):
+        """
+        Fingerprint of the trace file.
+
+        Unlike :attr:`trace_md5`, it only requires reading a few blocks of the
+        file so it is cheap to compute even for large traces.
+        """
+        trace_id = self._trace_id
+        if trace_id is None:
+            trace_id = self._get_trace_id(self.trace_path)
+            self._trace_id = trace_id
+
+        return trace_id
+
+    @property
+    def _stat(self):
+        stat = self._trace_stat
+        if stat is None:
+            stat = self._get_trace_stat(self.trace_path)
+            self._trace_stat = stat
+
+        return stat
+
+    @staticmethod
+    def _get_trace_stat(path):
+        """
+        Metadata of the trace file that change when it is modified.
+        """
+        stat = os.stat(path)
+        return {
+            'size': stat.st_size,
+            'mtime-ns': stat.st_mtime_ns,
+            'inode': stat.st_ino,
+        }
+
+    @classmethod
+    def _get_trace_id(cls, path):
+        """
+        Compute the fingerprint of the trace file at ``path``, by hashing its
+        size and :attr:`TRACE_ID_NR_BLOCKS` blocks evenly spread in the file.
+
+        Files smaller than the sampled blocks are entirely hashed.
+        """
+        nr_blocks = cls.TRACE_ID_NR_BLOCKS
+        block_size = cls.TRACE_ID_BLOCK_SIZE
+
+        h = hashlib.md5()
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            h.update(str(size).encode('ascii'))
+            if size <= nr_blocks * block_size:
+                h.update(f.read())
+            else:
+                # Always include the first and last block
+                stride = (size - block_size) / (nr_blocks - 1)
+                for i in range(nr_blocks):
+                    f.seek(int(i * stride))
+                    h.update(f.read(block_size))
+
+        return h.hexdigest()
+
+    def refresh_trace_id(self):
+        """
+        Compute again the fingerprint of the trace file after it has been
+        modified, and write it back to the swap area.
+        """
+        self._trace_md5 = None
+        self._trace_id = None
+        self._trace_stat = None
+        self.to_swap_dir()
+
     def update_metadata(self, metadata):
         """
         Update the metadata mapping with the given ``metadata`` mapping and
@@ -833,7 +1508,10 @@ class TraceCache:
             'version-token': VERSION_TOKEN,
             'metadata': self._metadata,
             'trace-path': trace_path,
-            'trace-md5': self.trace_md5,
+            'trace-stat': self._stat,
+            'trace-id': self.trace_id,
+            # Only computed on demand since it requires reading the whole file
+            'trace-md5': self._trace_md5,
         }
 
     def to_path(self, path):
@@ -841,10 +1519,110 @@ class TraceCache:
         Write the persistent state to the given ``path``.
         """
         mapping = self.to_json_map()
-        with open(path, 'w') as f:
+        with _atomic_path(path) as temp_path, open(temp_path, 'w') as f:
             json.dump(mapping, f)
             f.write('\n')
 
+    @classmethod
+    @contextlib.contextmanager
+    def _lock_swap_dir(cls, swap_dir):
+        """
+        Hold the advisory lock of ``swap_dir``, shared by all the processes
+        using it.
+        """
+        path = os.path.join(swap_dir, cls.TRACE_LOCK_FILENAME)
+        with open(path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @contextlib.contextmanager
+    def _swap_lock(self):
+        """
+        Reentrant version of :meth:`_lock_swap_dir` for the swap area of this
+        cache. No-op if there is no swap area.
+        """
+        with self._swap_thread_lock:
+            if self.swap_dir and not self._swap_lock_depth:
+                cm = self._lock_swap_dir(self.swap_dir)
+            else:
+                cm = nullcontext()
+
+            with cm:
+                self._swap_lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._swap_lock_depth -= 1
+
+    @staticmethod
+    def _load_swap_content(swap_dir, ignore=frozenset()):
+        """
+        Load the swap entries found in ``swap_dir``.
+
+        :param ignore: Metadata files names to ignore.
+        :type ignore: set(str)
+        """
+        swap_entry_filenames = {
+            filename
+            for filename in os.listdir(swap_dir)
+            if filename.endswith(PandasDataSwapEntry.META_EXTENSION)
+        }
+
+        for filename in swap_entry_filenames - ignore:
+            path = os.path.join(swap_dir, filename)
+            try:
+                swap_entry = PandasDataSwapEntry.from_path(path)
+            # If there is any issue with that entry, just ignore it
+            except Exception:
+                continue
+            else:
+                yield (swap_entry.pd_desc_nf, swap_entry)
+
+    @staticmethod
+    def _load_packed_swap_content(swap_store, ignore=frozenset()):
+        """
+        Same as :meth:`_load_swap_content` for a :class:`_PackedSwapStore`.
+
+        :param ignore: Names of the entries to ignore.
+        :type ignore: set(str)
+        """
+        for name, meta in swap_store.get_metadata().items():
+            if name in ignore:
+                continue
+            try:
+                swap_entry = PandasDataSwapEntry.from_json_map(json.loads(meta))
+            # If there is any issue with that entry, just ignore it
+            except Exception:
+                continue
+            else:
+                yield (swap_entry.pd_desc_nf, swap_entry)
+
+    def _rescan_swap(self):
+        """
+        Add to the swap content the entries written by other processes.
+        """
+        if self.swap_dir:
+            with self._swap_thread_lock:
+                if self._swap_store:
+                    known = {
+                        swap_entry.name
+                        for swap_entry in self._swap_content.values()
+                    }
+                    content = self._load_packed_swap_content(self._swap_store, known)
+                else:
+                    known = {
+                        swap_entry.meta_filename
+                        for swap_entry in self._swap_content.values()
+                    }
+                    known.add(self.TRACE_META_FILENAME)
+                    content = self._load_swap_content(self.swap_dir, known)
+
+                for pd_desc_nf, swap_entry in content:
+                    self._swap_content.setdefault(pd_desc_nf, swap_entry)
+
     @classmethod
     def _from_swap_dir(cls, swap_dir, trace_path=None, metadata=None, **kwargs):
         metapath = os.path.join(swap_dir, cls.TRACE_META_FILENAME)
@@ -860,50 +1638,62 @@ class TraceCache:
 
         metadata = metadata or {}
 
+        # Check the trace file in increasing order of cost: its stat
+        # metadata, then its fingerprint and finally its full checksum if it
+        # was recorded
+        old_md5 = mapping.get('trace-md5')
+        old_trace_id = mapping.get('trace-id')
+        new_md5 = None
+        new_trace_id = None
         try:
-            with open(swap_trace_path, 'rb') as f:
-                new_md5 = checksum(f, 'md5')
+            stat = cls._get_trace_stat(swap_trace_path)
         except FileNotFoundError:
-            new_md5 = None
-
-        if trace_path and not os.path.samefile(swap_trace_path, trace_path):
             invalid_swap = True
         else:
-            if new_md5 is None:
+            if trace_path and not os.path.samefile(swap_trace_path, trace_path):
                 invalid_swap = True
+            elif stat == mapping.get('trace-stat'):
+                invalid_swap = False
+                new_md5 = old_md5
+                new_trace_id = old_trace_id
             else:
-                old_md5 = mapping['trace-md5']
-                invalid_swap = (old_md5 != new_md5)
+                new_trace_id = cls._get_trace_id(swap_trace_path)
+                if new_trace_id != old_trace_id:
+                    invalid_swap = True
+                elif old_md5 is None:
+                    invalid_swap = False
+                else:
+                    with open(swap_trace_path, 'rb') as f:
+                        new_md5 = checksum(f, 'md5')
+                    invalid_swap = (old_md5 != new_md5)
 
         if invalid_swap:
-            # Remove the invalid swap and create a fresh directory
-            shutil.rmtree(swap_dir)
-            os.makedirs(swap_dir)
+            # Empty the invalid swap, but keep the directory and its lock
+            # since other processes can be using them, along with the
+            # temporary files they are currently writing
+            with cls._lock_swap_dir(swap_dir):
+                for dir_entry in os.scandir(swap_dir):
+                    if dir_entry.name == cls.TRACE_LOCK_FILENAME:
+                        continue
+                    elif dir_entry.name.endswith(cls.SWAP_TEMP_SUFFIX):
+                        continue
+                    elif dir_entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(dir_entry.path, ignore_errors=True)
+                    else:
+                        with contextlib.suppress(FileNotFoundError):
+                            os.unlink(dir_entry.path)
             swap_content = None
         else:
-            def load_swap_content(swap_dir):
-                swap_entry_filenames = {
-                    filename
-                    for filename in os.listdir(swap_dir)
-                    if filename.endswith(PandasDataSwapEntry.META_EXTENSION)
-                }
-
-                for filename in swap_entry_filenames:
-                    path = os.path.join(swap_dir, filename)
-                    try:
-                        swap_entry = PandasDataSwapEntry.from_path(path)
-                    # If there is any issue with that entry, just ignore it
-                    except Exception:
-                        continue
-                    else:
-                        yield (swap_entry.pd_desc_nf, swap_entry)
-
-            swap_content = dict(load_swap_content(swap_dir))
+            if kwargs.get('packed_swap'):
+                swap_content = cls._load_packed_swap_content(_PackedSwapStore(swap_dir))
+            else:
+                swap_content = cls._load_swap_content(swap_dir)
+            swap_content = dict(swap_content)
 
             metadata_ = mapping['metadata']
             metadata = {**metadata_, **metadata}
 
-        return cls(swap_content=swap_content, swap_dir=swap_dir, metadata=metadata, trace_path=trace_path, trace_md5=new_md5, **kwargs)
+        return cls(swap_content=swap_content, swap_dir=swap_dir, metadata=metadata, trace_path=trace_path, trace_md5=new_md5, trace_id=new_trace_id, **kwargs)
 
     def to_swap_dir(self):
         """
@@ -911,7 +1701,39 @@ class TraceCache:
         """
         if self.swap_dir:
             path = os.path.join(self.swap_dir, self.TRACE_META_FILENAME)
-            self.to_path(path)
+            with self._swap_lock():
+                self._merge_swap_metadata(path)
+                self.to_path(path)
+
+    def _merge_swap_metadata(self, path):
+        """
+        Merge in the metadata written by other processes to ``path``, for the
+        same trace.
+
+        Mappings are merged one level deep, so that e.g. the events parsed by
+        all the processes are recorded. Values of this instance win in case of
+        conflict.
+        """
+        try:
+            with open(path) as f:
+                mapping = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if (
+            mapping.get('version-token') == VERSION_TOKEN and
+            mapping.get('trace-id') == self.trace_id
+        ):
+            metadata = mapping.get('metadata', {})
+            for key, val in self._metadata.items():
+                other = metadata.get(key)
+                if isinstance(val, Mapping) and isinstance(other, Mapping):
+                    val.update({
+                        k: v
+                        for k, v in other.items()
+                        if k not in val
+                    })
+            self._metadata = {**metadata, **self._metadata}
 
     @classmethod
     def from_swap_dir(cls, swap_dir, **kwargs):
@@ -934,23 +1756,96 @@ class TraceCache:
     def _estimate_data_swap_size(self, data):
         return self._data_mem_usage(data) * self._data_mem_swap_ratio
 
-    def _update_ewma(self, attr, new, alpha=0.25, override=False):
-        old = getattr(self, attr)
+    @staticmethod
+    def _ewma(old, new, alpha=0.25, override=False):
         if override:
-            updated = new
+            return new
         else:
-            updated = (1 - alpha) * old + alpha * new
+            return (1 - alpha) * old + alpha * new
 
-        setattr(self, attr, updated)
+    def _update_ewma(self, attr, new, alpha=0.25, override=False):
+        old = getattr(self, attr)
+        setattr(self, attr, self._ewma(old, new, alpha=alpha, override=override))
 
-    def _update_data_swap_size_estimation(self, data, size):
-        size = self._unbias_swap_size(data, size)
+    def _update_format_ewma(self, mapping, data_format, new):
+        try:
+            old = mapping[data_format]
+        except KeyError:
+            mapping[data_format] = new
+        else:
+            mapping[data_format] = self._ewma(old, new)
+
+    def _update_data_swap_size_estimation(self, data, size, data_format):
+        size = self._unbias_swap_size(data, size, data_format)
 
         # If size < 0, the dataframe is so small that it's basically just noise
         if size > 0:
             mem_usage = self._data_mem_usage(data)
             if mem_usage:
                 self._update_ewma('_data_mem_swap_ratio', size / mem_usage)
+                self._update_format_ewma(
+                    self._swap_format_size_ratio,
+                    data_format,
+                    size / mem_usage,
+                )
+
+    def _update_swap_read_cost(self, data, read_cost, data_format):
+        mem_usage = self._data_mem_usage(data)
+        if mem_usage:
+            self._update_format_ewma(
+                self._swap_format_read_cost,
+                data_format,
+                read_cost / mem_usage,
+            )
+
+    def _choose_swap_format(self, data):
+        """
+        Choose the storage format to use to write ``data`` to the swap.
+
+        Once the read cost of all the formats has been measured by reloading
+        entries from the swap, the fastest format to reload is used if the
+        swap has enough room left for it, otherwise the most compact one is
+        used.
+
+        Until then, :attr:`DATAFRAME_SWAP_FORMAT` is used, except for a single
+        entry written in each of the other formats so that they get measured
+        as well.
+        """
+        if self.swap_format is not None:
+            return self.swap_format
+
+        default = self.DATAFRAME_SWAP_FORMAT
+        formats = [default] + sorted(self.DATAFRAME_SWAP_FORMATS.keys() - {default})
+        read_cost = self._swap_format_read_cost
+        if read_cost.keys() >= set(formats):
+            fastest = min(formats, key=read_cost.__getitem__)
+        else:
+            untried = [
+                data_format
+                for data_format in formats
+                if not (
+                    data_format in read_cost or
+                    data_format in self._swap_format_tried
+                )
+            ]
+            fastest = untried[0] if untried else default
+            self._swap_format_tried.add(fastest)
+
+        try:
+            ratio = self._swap_format_size_ratio[fastest]
+        except KeyError:
+            size = self._estimate_data_swap_size(data)
+        else:
+            size = self._data_mem_usage(data) * ratio
+
+        if self._swap_size + size <= self.max_swap_size:
+            return fastest
+        # Only trust the measurements once they are available for all formats,
+        # so that the formats are compared fairly
+        elif self._swap_format_size_ratio.keys() >= set(formats):
+            return min(self._SWAP_FORMATS_BY_SIZE, key=self._swap_format_size_ratio.__getitem__)
+        else:
+            return self._SWAP_FORMATS_BY_SIZE[0]
 
     def _data_mem_usage(self, data):
         mem = data.memory_usage()
@@ -959,23 +1854,255 @@ class TraceCache:
         except AttributeError:
             return mem
 
+    STATS_COUNTERS = (
+        'hits',
+        'misses',
+        'swap_loads',
+        'swap_writes',
+        'compute_time',
+        'parse_time',
+        'swap_read_time',
+        'swap_write_time',
+    )
+    """
+    Statistics recorded for each descriptor, see :meth:`get_stats`.
+    """
+
+    def record_stat(self, pd_desc, stat, value=1):
+        """
+        Add ``value`` to the statistic ``stat`` of ``pd_desc``.
+
+        :param pd_desc: Descriptor the statistic is about.
+        :type pd_desc: PandasDataDesc
+
+        :param stat: Name of the statistic, among :attr:`STATS_COUNTERS`.
+        :type stat: str
+
+        :param value: Value to add. Times are given in seconds.
+        :type value: int or float
+
+        .. note:: This is called from the background swap writer thread for
+            the swap writes when ``async_swap=True``, and so is
+            :attr:`stats_hook`.
+        """
+        pd_desc_nf = pd_desc.normal_form
+        with self._stats_lock:
+            try:
+                stats = self._stats[pd_desc_nf]
+            except KeyError:
+                stats = dict.fromkeys(self.STATS_COUNTERS, 0)
+                self._stats[pd_desc_nf] = stats
+                self._stats_desc[pd_desc_nf] = pd_desc
+
+            stats[stat] += value
+
+        hook = self.stats_hook
+        if hook is None:
+            pass
+        elif isinstance(hook, logging.Logger):
+            hook.debug('{}: {}={}'.format(pd_desc_nf, stat, value))
+        else:
+            hook(stat, pd_desc, value)
+
+    def _get_swap_entries_size(self):
+        """
+        Get the size of the entries of the swap area, by normal form.
+        """
+        swap_content = list(self._swap_content.items())
+        if self._swap_store:
+            # Query the size of all the entries at once
+            index = self._swap_store.get_index()
+
+            def get_size(swap_entry):
+                try:
+                    return index[swap_entry.name][0]
+                except KeyError:
+                    return 0
+        else:
+            def get_size(swap_entry):
+                try:
+                    return os.stat(os.path.join(self.swap_dir, swap_entry.data_filename)).st_size
+                except FileNotFoundError:
+                    return 0
+
+        return {
+            pd_desc_nf: get_size(swap_entry)
+            for pd_desc_nf, swap_entry in swap_content
+        }
+
+    def get_stats(self):
+        """
+        Get the statistics of the cache as a :class:`pandas.DataFrame` with
+        one row per descriptor, with the following columns:
+
+            * ``desc``: The :class:`PandasDataDesc`, or its normal form if
+              the descriptor was only found in the swap.
+            * ``event``, ``func``: The event or the analysis function the
+              descriptor is about, if any.
+            * The counters in :attr:`STATS_COUNTERS`: number of fetches
+              served from memory or from the swap (``hits``), number of
+              failed fetches (``misses``), number of entries read from and
+              written to the swap (``swap_loads``, ``swap_writes``) and the
+              cumulative time in seconds spent computing, parsing the trace,
+              reading and writing the swap.
+            * ``mem_bytes``: Memory used by the entry in the cache.
+            * ``swap_bytes``: Size of the entry in the swap area.
+        """
+        mem_bytes = {
+            # Entries are only sized when inserted if the memory is bounded
+            pd_desc.normal_form: (
+                self._data_deep_mem_usage(self._cache[pd_desc])
+                if size is None
+                else size
+            )
+            for pd_desc, size in self._data_mem.items()
+        }
+        if self.swap_dir:
+            self._rescan_swap()
+        swap_bytes = self._get_swap_entries_size()
+        with self._stats_lock:
+            all_stats = {
+                pd_desc_nf: dict(stats)
+                for pd_desc_nf, stats in self._stats.items()
+            }
+            stats_desc = dict(self._stats_desc)
+
+        def make_row(pd_desc_nf):
+            desc = stats_desc.get(pd_desc_nf, pd_desc_nf)
+            spec = pd_desc_nf.to_json_map()
+            stats = all_stats.get(pd_desc_nf, dict.fromkeys(self.STATS_COUNTERS, 0))
+            return dict(
+                desc=desc,
+                event=spec.get('event'),
+                func=spec.get('func'),
+                **stats,
+                mem_bytes=mem_bytes.get(pd_desc_nf, 0),
+                swap_bytes=swap_bytes.get(pd_desc_nf, 0),
+            )
+
+        pd_descs_nf = all_stats.keys() | mem_bytes.keys() | swap_bytes.keys()
+        columns = ['desc', 'event', 'func', *self.STATS_COUNTERS, 'mem_bytes', 'swap_bytes']
+        return pd.DataFrame.from_records(
+            list(map(make_row, pd_descs_nf)),
+            columns=columns,
+        )
+
+    @staticmethod
+    def _data_deep_mem_usage(data):
+        """
+        Memory usage of ``data``, including the objects referenced by
+        ``object`` columns such as strings.
+        """
+        mem = data.memory_usage(deep=True)
+        try:
+            return int(mem.sum())
+        except AttributeError:
+            return int(mem)
+
+    def _retention_score(self, pd_desc, data):
+        """
+        Score of an entry independent of its recency. Low retention score
+        means it's more likely to be evicted.
+        """
+        written = self._is_written_to_swap(pd_desc)
+        key = (self._swap_cost_gen, written)
+        try:
+            score_key, score = self._mem_score[pd_desc]
+        except KeyError:
+            pass
+        else:
+            if score_key == key:
+                return score
+
+        score = self._compute_retention_score(pd_desc, data, written)
+        self._mem_score[pd_desc] = (key, score)
+        return score
+
+    def _compute_retention_score(self, pd_desc, data, written):
+        # If we don't know the computation cost, assume it can be evicted cheaply
+        compute_cost = self._data_cost.get(pd_desc, 0)
+
+        if not compute_cost:
+            return 0
+        else:
+            swap_cost = self._estimate_data_swap_cost(data)
+            # If it's already written back, make it cheaper to evict since
+            # the eviction itself is going to be cheap
+            if written:
+                swap_cost /= 2
+
+            if swap_cost:
+                return compute_cost / swap_cost
+            else:
+                return 0
+
+    def _touch_mem(self, pd_desc, data):
+        """
+        Record an access to an entry of the memory cache.
+
+        The eviction priority follows the GreedyDual scheme: it is the
+        retention score of the entry plus an inflation value, which is raised
+        to the priority of each evicted entry. Entries that have not been
+        accessed recently therefore end up evicted even if their score is
+        high.
+        """
+        priority = (self._mem_inflation + self._retention_score(pd_desc, data), next(self._mem_seq))
+        self._mem_priority[pd_desc] = priority
+        heapq.heappush(self._mem_heap, (*priority, pd_desc))
+
+        # Get rid of the stale items once they dominate the heap
+        if len(self._mem_heap) > 2 * len(self._mem_priority) + 16:
+            self._mem_heap = [
+                (*priority, pd_desc)
+                for pd_desc, priority in self._mem_priority.items()
+            ]
+            heapq.heapify(self._mem_heap)
+
+    def _cache_set(self, pd_desc, data):
+        self._cache_del(pd_desc)
+        self._cache[pd_desc] = data
+        # Sizing object columns is expensive, so only do it when the memory
+        # usage has to be kept under a limit
+        if self.max_mem_size == math.inf:
+            size = None
+        else:
+            size = self._data_deep_mem_usage(data)
+            self._mem_usage += size
+        self._data_mem[pd_desc] = size
+        self._touch_mem(pd_desc, data)
+
+    def _cache_del(self, pd_desc):
+        try:
+            del self._cache[pd_desc]
+        except KeyError:
+            pass
+        else:
+            size = self._data_mem.pop(pd_desc)
+            if size is not None:
+                self._mem_usage -= size
+            del self._mem_priority[pd_desc]
+            self._mem_score.pop(pd_desc, None)
+
     def _should_evict_to_swap(self, pd_desc, data):
         # If we don't have any cost info, assume it is expensive to compute
         compute_cost = self._data_cost.get(pd_desc, math.inf)
         swap_cost = self._estimate_data_swap_cost(data)
         return swap_cost <= compute_cost
 
-    def _swap_path_of(self, pd_desc):
+    def _swap_entry_of(self, pd_desc):
         if self.swap_dir:
             pd_desc_nf = pd_desc.normal_form
-            swap_entry = self._swap_content[pd_desc_nf]
-            filename = swap_entry.data_filename
-            return os.path.join(self.swap_dir, filename)
+            try:
+                return self._swap_content[pd_desc_nf]
+            except KeyError:
+                # The entry could have been written by another process
+                self._rescan_swap()
+                return self._swap_content[pd_desc_nf]
         else:
             raise ValueError('Swap dir is not setup')
 
-    def _update_swap_cost(self, data, swap_cost, mem_usage, swap_size):
-        unbiased_swap_size = self._unbias_swap_size(data, swap_size)
+    def _update_swap_cost(self, data, swap_cost, mem_usage, swap_size, data_format):
+        unbiased_swap_size = self._unbias_swap_size(data, swap_size, data_format)
         # Take out from the swap cost the time it took to write the overhead
         # that comes with the file format, assuming the cost is
         # proportional to amount of data written in the swap.
@@ -988,25 +2115,138 @@ class TraceCache:
         self._update_ewma('swap_cost', new_cost, override=override)
 
     def _is_written_to_swap(self, pd_desc):
-        return pd_desc.normal_form in self._swap_content
+        pd_desc_nf = pd_desc.normal_form
+        return pd_desc_nf in self._swap_content or pd_desc_nf in self._swap_in_flight
 
     @classmethod
-    def _write_data(cls, data, path):
-        if cls.DATAFRAME_SWAP_FORMAT == 'parquet':
+    def _write_data(cls, data, path, data_format):
+        if data_format == 'parquet':
             # Snappy compression seems very fast
             data.to_parquet(path, compression='snappy', index=True)
+        elif data_format == 'feather':
+            # Uncompressed, so that reading it back only needs to map the file
+            # in memory
+            table = pyarrow.Table.from_pandas(data, preserve_index=True)
+            pyarrow.feather.write_feather(table, path, compression='uncompressed')
         else:
-            raise ValueError('Dataframe swap format "{}" not handled'.format(cls.DATAFRAME_SWAP_FORMAT))
+            raise ValueError('Dataframe swap format "{}" not handled'.format(data_format))
+
+    @classmethod
+    def _read_data(cls, path, data_format, filters=None, columns=None):
+        def open_data():
+            # The content of entries of a packed swap is given directly
+            if isinstance(path, bytes):
+                return io.BytesIO(path)
+            else:
+                return path
+
+        if data_format == 'parquet':
+            if filters or columns:
+                names = pyarrow.parquet.read_schema(open_data(), memory_map=True).names
+
+            if filters:
+                filters = [
+                    (col, 'in', list(values))
+                    for col, values in filters.items()
+                    if col in names
+                ] or None
+
+            # The index is read along the selected columns
+            if columns:
+                columns = [col for col in names if col in columns]
+
+            # Filters are applied on the row groups statistics first, so
+            # row groups without matching rows are not even read
+            return pd.read_parquet(open_data(), memory_map=True, filters=filters, columns=columns)
+        elif data_format == 'feather':
+            table = pyarrow.feather.read_table(open_data(), memory_map=True)
+            # Since the file is memory mapped, the columns that are not
+            # selected are never read
+            if columns or filters:
+                index_cols = table.schema.pandas_metadata['index_columns']
+                selected = set(columns or table.column_names) | set(filters or [])
+                table = table.select([
+                    col
+                    for col in table.column_names
+                    if col in selected or col in index_cols
+                ])
+
+            df = table.to_pandas()
+            if filters:
+                df = df_filter_isin(df, {
+                    col: values
+                    for col, values in filters.items()
+                    if col in df.columns
+                })
+            if columns:
+                df = df[[col for col in df.columns if col in columns]]
+            return df
+        else:
+            raise ValueError('Dataframe swap format "{}" not handled'.format(data_format))
 
     def _write_swap(self, pd_desc, data):
         if not self.swap_dir:
             return
+        elif self._is_written_to_swap(pd_desc):
+            return
+        elif self._swap_queue is None:
+            self._write_swap_sync(pd_desc, data)
         else:
-            if self._is_written_to_swap(pd_desc):
+            # The entry can be fetched from there until it is written
+            self._swap_in_flight[pd_desc.normal_form] = data
+            self._swap_queue.put((pd_desc, data))
+            with self._swap_writer_lock:
+                if self._swap_writer is None:
+                    # The thread is not a daemon, so that the interpreter
+                    # waits for the queued entries to be written before
+                    # exiting
+                    self._swap_writer = threading.Thread(
+                        target=self._run_swap_writer,
+                        name='TraceCache swap writer',
+                    )
+                    self._swap_writer.start()
+
+    def _run_swap_writer(self):
+        """
+        Body of the thread writing the queued entries to the swap.
+
+        The thread exits as soon as the queue is empty, so that it only keeps
+        the cache alive while some entries still have to be written.
+        """
+        while True:
+            with self._swap_writer_lock:
+                try:
+                    pd_desc, data = self._swap_queue.get_nowait()
+                except queue.Empty:
+                    self._swap_writer = None
+                    return
+            try:
+                self._write_swap_queued(pd_desc, data)
+            finally:
+                del pd_desc, data
+                self._swap_queue.task_done()
+
+    def _write_swap_queued(self, pd_desc, data):
+        """
+        Write an entry queued for the background swap writer.
+        """
+        try:
+            self._write_swap_sync(pd_desc, data)
+        except Exception as e:
+            self._swap_writer_excep = e
+        finally:
+            self._swap_in_flight.pop(pd_desc.normal_form, None)
+
+    def _write_swap_sync(self, pd_desc, data):
+        with self._swap_thread_lock:
+            # Another process could have written it already
+            self._rescan_swap()
+            if pd_desc.normal_form in self._swap_content:
                 return
 
             pd_desc_nf = pd_desc.normal_form
-            swap_entry = PandasDataSwapEntry(pd_desc_nf)
+            data_format = self._choose_swap_format(data)
+            swap_entry = PandasDataSwapEntry(pd_desc_nf, data_format=data_format)
 
             df_path = os.path.join(self.swap_dir, swap_entry.data_filename)
 
@@ -1014,28 +2254,62 @@ class TraceCache:
             if self._estimate_data_swap_size(data) + self._swap_size > self.max_swap_size:
                 self.scrub_swap()
 
-            # Write the Parquet file and update the write speed
+        # Write the file and update the write speed. The metadata file is
+        # written last, so that other processes only discover complete
+        # entries. The lock is not held while serializing the data, so that a
+        # background writer does not block the other threads.
+        if self._swap_store:
             with measure_time() as measure:
-                self._write_data(data, df_path)
+                buffer = io.BytesIO()
+                self._write_data(data, buffer, data_format)
+                buffer = buffer.getvalue()
+                meta = json.dumps(swap_entry.to_json_map())
+                self._swap_store.write(swap_entry.name, meta, buffer)
+            data_swapped_size = len(buffer)
+            del buffer
+        else:
+            with _atomic_path(df_path) as temp_path:
+                with measure_time() as measure:
+                    self._write_data(data, temp_path, data_format)
 
-            # Update the swap
             swap_entry_path = os.path.join(self.swap_dir, swap_entry.meta_filename)
             swap_entry.to_path(swap_entry_path)
+            data_swapped_size = os.stat(df_path).st_size
+
+        with self._swap_thread_lock:
+            # Update the swap
             self._swap_content[swap_entry.pd_desc_nf] = swap_entry
+            self.record_stat(pd_desc, 'swap_writes')
+            self.record_stat(pd_desc, 'swap_write_time', measure.exclusive_delta)
 
             # Assume that reading from the swap will take as much time as
             # writing to it. We cannot do better anyway, but that should
             # mostly bias to keeping things in memory if possible.
             swap_cost = measure.exclusive_delta
-            data_swapped_size = os.stat(df_path).st_size
 
             mem_usage = self._data_mem_usage(data)
             if mem_usage:
-                self._update_swap_cost(data, swap_cost, mem_usage, data_swapped_size)
+                self._update_swap_cost(data, swap_cost, mem_usage, data_swapped_size, data_format)
             self._swap_size += data_swapped_size
-            self._update_data_swap_size_estimation(data, data_swapped_size)
+            self._update_data_swap_size_estimation(data, data_swapped_size, data_format)
+            # The retention scores depend on the estimations
+            self._swap_cost_gen += 1
             self.scrub_swap()
 
+    def flush(self):
+        """
+        Wait until the entries queued for the background swap writer are
+        written. No-op if the swap is written synchronously.
+
+        :raises Exception: The exception raised by the last write that failed
+            in the background, if any.
+        """
+        if self._swap_queue is not None:
+            self._swap_queue.join()
+            excep, self._swap_writer_excep = self._swap_writer_excep, None
+            if excep is not None:
+                raise excep
+
     def _get_swap_size(self):
         if self.swap_dir:
             return sum(
@@ -1052,62 +2326,154 @@ class TraceCache:
         # TODO: Load the file information from __init__ by discovering the swap
         # area's content to avoid doing it each time here
         if self._swap_size > self.max_swap_size and self.swap_dir:
-            stats = {
-                dir_entry.name: dir_entry.stat()
-                for dir_entry in os.scandir(self.swap_dir)
-            }
+            with self._swap_lock():
+                if self._swap_store:
+                    self._scrub_packed_swap()
+                else:
+                    self._scrub_swap()
 
-            data_files = {
-                swap_entry.data_filename: swap_entry
-                for swap_entry in self._swap_content.values()
-            }
+    def _scrub_swap(self):
+        # Take into account the entries added and removed by other processes
+        self._rescan_swap()
+        stats = {}
+        for dir_entry in os.scandir(self.swap_dir):
+            try:
+                stats[dir_entry.name] = dir_entry.stat()
+            except FileNotFoundError:
+                pass
 
-            # Get rid of stale files that are not referenced by any swap entry
-            metadata_files = {
-                swap_entry.meta_filename
-                for swap_entry in self._swap_content.values()
-            }
-            metadata_files.add(self.TRACE_META_FILENAME)
-            non_stale_files = data_files.keys() | metadata_files
-            stale_files = stats.keys() - non_stale_files
-            for filename in stale_files:
-                del stats[filename]
-                path = os.path.join(self.swap_dir, filename)
+        self._swap_content = {
+            pd_desc_nf: swap_entry
+            for pd_desc_nf, swap_entry in self._swap_content.items()
+            if swap_entry.data_filename in stats and swap_entry.meta_filename in stats
+        }
+
+        data_files = {
+            swap_entry.data_filename: swap_entry
+            for swap_entry in self._swap_content.values()
+        }
+
+        # Get rid of stale files that are not referenced by any swap entry.
+        # Recent files could still be being written by another process.
+        metadata_files = {
+            swap_entry.meta_filename
+            for swap_entry in self._swap_content.values()
+        }
+        metadata_files.add(self.TRACE_META_FILENAME)
+        metadata_files.add(self.TRACE_INDEX_FILENAME)
+        metadata_files.add(self.TRACE_LOCK_FILENAME)
+        # Packed swap used by other processes
+        metadata_files.add(_PackedSwapStore.FILENAME)
+        metadata_files.add(_PackedSwapStore.FILENAME + _PackedSwapStore.JOURNAL_SUFFIX)
+        non_stale_files = data_files.keys() | metadata_files
+        now = time.time()
+        stale_files = {
+            filename
+            for filename in stats.keys() - non_stale_files
+            if now - stats[filename].st_mtime > self.SWAP_TEMP_MAX_AGE
+        }
+        for filename in stale_files:
+            del stats[filename]
+            path = os.path.join(self.swap_dir, filename)
+            with contextlib.suppress(FileNotFoundError):
                 os.unlink(path)
 
-            def by_mtime(path_stat):
-                path, stat = path_stat
-                return stat.st_mtime
-
-            # Sort by modification time, so we discard the oldest caches
-            total_size = 0
-            discarded_swap_entries = set()
-            for filename, stat in sorted(stats.items(), key=by_mtime):
-                total_size += stat.st_size
-                if total_size > self.max_swap_size:
-                    try:
-                        swap_entry = data_files[filename]
-                    # That was not a data file
-                    except KeyError:
-                        continue
-                    else:
-                        discarded_swap_entries.add(swap_entry)
+        def by_mtime(path_stat):
+            path, stat = path_stat
+            return stat.st_mtime
 
-            # Update the swap content
-            for swap_entry in discarded_swap_entries:
-                del self._swap_content[swap_entry.pd_desc_nf]
-                del stats[swap_entry.data_filename]
+        # Sort by modification time, so we discard the oldest caches
+        total_size = 0
+        discarded_swap_entries = set()
+        for filename, stat in sorted(stats.items(), key=by_mtime):
+            total_size += stat.st_size
+            if total_size > self.max_swap_size:
+                try:
+                    swap_entry = data_files[filename]
+                # That was not a data file
+                except KeyError:
+                    continue
+                else:
+                    discarded_swap_entries.add(swap_entry)
+
+        # Update the swap content
+        for swap_entry in discarded_swap_entries:
+            del self._swap_content[swap_entry.pd_desc_nf]
+            del stats[swap_entry.data_filename]
 
-                for filename in (swap_entry.meta_filename, swap_entry.data_filename):
-                    path = os.path.join(self.swap_dir, filename)
+            for filename in (swap_entry.meta_filename, swap_entry.data_filename):
+                path = os.path.join(self.swap_dir, filename)
+                with contextlib.suppress(FileNotFoundError):
                     os.unlink(path)
 
-            self._swap_size = sum(
-                stats[swap_entry.data_filename].st_size
-                for swap_entry in self._swap_content.values()
-            )
+        self._swap_size = sum(
+            stats[swap_entry.data_filename].st_size
+            for swap_entry in self._swap_content.values()
+        )
 
-    def fetch(self, pd_desc, insert=True):
+    def _scrub_packed_swap(self):
+        """
+        Same as :meth:`_scrub_swap` for a packed swap, only using the index of
+        the packed swap.
+        """
+        # Take into account the entries added and removed by other processes
+        self._rescan_swap()
+        index = self._swap_store.get_index()
+
+        self._swap_content = {
+            pd_desc_nf: swap_entry
+            for pd_desc_nf, swap_entry in self._swap_content.items()
+            if swap_entry.name in index
+        }
+        referenced = {
+            swap_entry.name
+            for swap_entry in self._swap_content.values()
+        }
+
+        # Entries that cannot be loaded, e.g. written by another version of
+        # LISA. Recent ones could have been written after the rescan by
+        # another process.
+        now = time.time()
+        discarded = {
+            name
+            for name, (size, mtime) in index.items()
+            if name not in referenced and now - mtime > self.SWAP_TEMP_MAX_AGE
+        }
+
+        # Keep the most recent entries that fit in the swap
+        total_size = 0
+        for name, (size, mtime) in sorted(index.items(), key=lambda x: x[1][1], reverse=True):
+            if name in discarded:
+                continue
+            total_size += size
+            if total_size > self.max_swap_size:
+                discarded.add(name)
+
+        self._swap_content = {
+            pd_desc_nf: swap_entry
+            for pd_desc_nf, swap_entry in self._swap_content.items()
+            if swap_entry.name not in discarded
+        }
+        if discarded:
+            self._swap_store.delete(discarded)
+            self._swap_store.compact()
+
+        self._swap_size = sum(
+            index[swap_entry.name][0]
+            for swap_entry in self._swap_content.values()
+        )
+
+    def is_in_mem(self, pd_desc):
+        """
+        Whether the data of ``pd_desc`` can be fetched without reading the
+        swap area.
+
+        :param pd_desc: Descriptor to look for.
+        :type pd_desc: PandasDataDesc
+        """
+        return pd_desc in self._cache or pd_desc.normal_form in self._swap_in_flight
+
+    def fetch(self, pd_desc, insert=True, filters=None, columns=None):
         """
         Fetch an entry from the cache or the swap.
 
@@ -1117,31 +2483,90 @@ class TraceCache:
         :param insert: If ``True`` and if the fetch succeeds by loading the
             swap, the data is inserted in the cache.
         :type insert: bool
+
+        :param filters: Only fetch the rows of a dataframe where the columns
+            contain one of the given values, as a dict of ``{"column": [value,
+            ...]}``. When reading the swap, the filters are applied by the
+            reader so the whole dataframe is never loaded. Filters on columns
+            that do not exist are ignored. Since filtered data is only a subset
+            of the entry, it is never inserted in the cache.
+        :type filters: dict(str, list(object)) or None
+
+        :param columns: Only fetch the given columns of a dataframe, along with
+            its index. When reading the swap, the other columns are not read.
+            Columns that do not exist are ignored. Like for ``filters``, the
+            data is never inserted in the cache.
+        :type columns: list(str) or None
         """
         try:
-            return self._cache[pd_desc]
+            data = self._cache[pd_desc]
         except KeyError as e:
+            # The data could still be waiting for the background swap writer
+            try:
+                data = self._swap_in_flight[pd_desc.normal_form]
+            except KeyError:
+                pass
+            else:
+                self.record_stat(pd_desc, 'hits')
+                if insert and not (filters or columns):
+                    self.insert(pd_desc, data, write_swap=False, compute_cost=None)
+                return self._select_data(data, filters=filters, columns=columns)
+
             try:
-                path = self._swap_path_of(pd_desc)
+                swap_entry = self._swap_entry_of(pd_desc)
             # If there is no swap, bail out
             except (ValueError, KeyError):
+                self.record_stat(pd_desc, 'misses')
                 raise e
             else:
-                # Try to load the dataframe from that path
+                data_format = swap_entry.data_format
+                # Try to load the dataframe from the swap
                 try:
-                    if self.DATAFRAME_SWAP_FORMAT == 'parquet':
-                        data = pd.read_parquet(path, memory_map=True)
-                    else:
-                        raise ValueError('Dataframe swap format "{}" not handled'.format(self.DATAFRAME_SWAP_FORMAT))
-                except (OSError, pyarrow.lib.ArrowIOError):
+                    with measure_time() as measure:
+                        if self._swap_store:
+                            source = self._swap_store.read(swap_entry.name)
+                        else:
+                            source = os.path.join(self.swap_dir, swap_entry.data_filename)
+                        data = self._read_data(source, data_format, filters=filters, columns=columns)
+                except (KeyError, OSError, pyarrow.lib.ArrowIOError):
+                    # The entry could have been scrubbed by another process
+                    self._swap_content.pop(pd_desc.normal_form, None)
+                    self.record_stat(pd_desc, 'misses')
                     raise e
                 else:
+                    self.record_stat(pd_desc, 'hits')
+                    self.record_stat(pd_desc, 'swap_loads')
+                    self.record_stat(pd_desc, 'swap_read_time', measure.exclusive_delta)
+                    if filters or columns:
+                        return data
+
+                    self._update_swap_read_cost(data, measure.exclusive_delta, data_format)
                     if insert:
                         # We have no idea of the cost of something coming from
                         # the cache
                         self.insert(pd_desc, data, write_swap=False, compute_cost=None)
 
                     return data
+        else:
+            self.record_stat(pd_desc, 'hits')
+            self._touch_mem(pd_desc, data)
+            return self._select_data(data, filters=filters, columns=columns)
+
+    @staticmethod
+    def _select_data(data, filters=None, columns=None):
+        """
+        Apply the ``filters`` and ``columns`` of :meth:`fetch` on data hold in
+        memory.
+        """
+        if filters:
+            data = df_filter_isin(data, {
+                col: values
+                for col, values in filters.items()
+                if col in data.columns
+            })
+        if columns:
+            data = data[[col for col in data.columns if col in columns]]
+        return data
 
     def insert(self, pd_desc, data, compute_cost=None, write_swap=False, force_write_swap=False):
         """
@@ -1166,9 +2591,10 @@ class TraceCache:
             cost comparison.
         :type force_write_swap: bool
         """
-        self._cache[pd_desc] = data
         if compute_cost is not None:
             self._data_cost[pd_desc] = compute_cost
+            self.record_stat(pd_desc, 'compute_time', compute_cost)
+        self._cache_set(pd_desc, data)
 
         if write_swap:
             self.write_swap(pd_desc, force=force_write_swap)
@@ -1176,60 +2602,14 @@ class TraceCache:
         self._scrub_mem()
 
     def _scrub_mem(self):
-        if self.max_mem_size == math.inf:
-            return
-
-        mem_usage = sum(
-            self._data_mem_usage(data)
-            for data in self._cache.values()
-        )
-
-        if mem_usage > self.max_mem_size:
-
-            # Make sure garbage collection occurred recently, to get the most
-            # accurate refcount possible
-            gc.collect()
-            refcounts = {
-                pd_desc: sys.getrefcount(data)
-                for pd_desc, data in self._cache.items()
-            }
-            min_refcount = min(refcounts.values())
-
-            # Low retention score means it's more likely to be evicted
-            def retention_score(pd_desc_and_data):
-                pd_desc, data = pd_desc_and_data
-
-                # If we don't know the computation cost, assume it can be evicted cheaply
-                compute_cost = self._data_cost.get(pd_desc, 0)
-
-                if not compute_cost:
-                    score = 0
-                else:
-                    swap_cost = self._estimate_data_swap_cost(data)
-                    # If it's already written back, make it cheaper to evict since
-                    # the eviction itself is going to be cheap
-                    if self._is_written_to_swap(pd_desc):
-                        swap_cost /= 2
-
-                    if swap_cost:
-                        score = compute_cost / swap_cost
-                    else:
-                        score = 0
-
-                # Assume that more references to an object implies it will
-                # stay around for longer. Therefore, it's less interesting to
-                # remove it from this cache and pay the cost of reading/writing it to
-                # swap, since the memory will not be freed anyway.
-                #
-                # Normalize to the minimum refcount, so that the _cache and other
-                # structures where references are stored are discounted for sure.
-                return (refcounts[pd_desc] - min_refcount + 1) * score
-
-            new_mem_usage = 0
-            for pd_desc, data in sorted(self._cache.items(), key=retention_score):
-                new_mem_usage += self._data_mem_usage(data)
-                if new_mem_usage > self.max_mem_size:
-                    self.evict(pd_desc)
+        # Evict the entries with the lowest priority until the memory usage
+        # fits, see _touch_mem()
+        while self._mem_usage > self.max_mem_size and self._mem_heap:
+            *priority, pd_desc = heapq.heappop(self._mem_heap)
+            # Skip the items superseded by a later access or eviction
+            if self._mem_priority.get(pd_desc) == tuple(priority):
+                self._mem_inflation = priority[0]
+                self.evict(pd_desc)
 
     def evict(self, pd_desc):
         """
@@ -1242,11 +2622,7 @@ class TraceCache:
         will be written to the swap area.
         """
         self.write_swap(pd_desc)
-
-        try:
-            del self._cache[pd_desc]
-        except KeyError:
-            pass
+        self._cache_del(pd_desc)
 
     def write_swap(self, pd_desc, force=False):
         """
@@ -1268,12 +2644,15 @@ class TraceCache:
             if force or self._should_evict_to_swap(pd_desc, data):
                 self._write_swap(pd_desc, data)
 
-    def write_swap_all(self):
+    def write_swap_all(self, force=False):
         """
         Attempt to write all cached data to the swap.
+
+        :param force: If ``True``, bypass the compute vs swap cost comparison.
+        :type force: bool
         """
-        for pd_desc in self._cache.keys():
-            self.write_swap(pd_desc)
+        for pd_desc in list(self._cache.keys()):
+            self.write_swap(pd_desc, force=force)
 
     def clear_event(self, event, raw=None):
         """
@@ -1287,33 +2666,811 @@ class TraceCache:
             ``None``, ignore whether the descriptor is about raw data or not.
         :type raw: bool or None
         """
-        self._cache = {
-            pd_desc: data
-            for pd_desc, data in self._cache.items()
-            if not (
+        for pd_desc in list(self._cache.keys()):
+            if (
                 pd_desc.get('event') == event
                 and (
                     raw is None
                     or pd_desc.get('raw') == raw
                 )
-            )
-        }
+            ):
+                self._cache_del(pd_desc)
+
+    def _discard_swap(self, pd_desc_nf):
+        with self._swap_lock():
+            swap_entry = self._swap_content.pop(pd_desc_nf)
+            if self._swap_store:
+                self._swap_size -= self._swap_store.delete([swap_entry.name])
+                return
+
+            for filename in (swap_entry.meta_filename, swap_entry.data_filename):
+                path = os.path.join(self.swap_dir, filename)
+                try:
+                    size = os.stat(path).st_size
+                    os.unlink(path)
+                except OSError:
+                    pass
+                else:
+                    self._swap_size -= size
+
+    def discard_all(self, keep=None):
+        """
+        Discard all the entries, both from memory and from the swap area.
+
+        Unlike :meth:`evict`, nothing is written to the swap, which is useful
+        when the data are not valid anymore.
+
+        :param keep: Callable called with the :class:`PandasDataDescNF` of
+            each entry, which returns ``True`` for the entries that are still
+            valid and must be kept.
+        :type keep: collections.abc.Callable or None
+        """
+        keep = keep or (lambda pd_desc_nf: False)
+
+        # Do not let the background writer add entries behind our back
+        if self._swap_queue is not None:
+            self._swap_queue.join()
+        for pd_desc in list(self._cache.keys()):
+            if not keep(pd_desc.normal_form):
+                self._cache_del(pd_desc)
+                self._data_cost.pop(pd_desc, None)
+        with self._swap_lock():
+            # Take into account the entries written by other processes
+            self._rescan_swap()
+            for pd_desc_nf in list(self._swap_content.keys()):
+                if not keep(pd_desc_nf):
+                    self._discard_swap(pd_desc_nf)
 
     def clear_all_events(self, raw=None):
         """
         Same as :meth:`clear_event` but works on all events at once.
         """
-        self._cache = {
-            pd_desc: data
-            for pd_desc, data in self._cache.items()
-            if (
+        for pd_desc in list(self._cache.keys()):
+            if not (
                 # Cache entries can be associated to something else than events
                 'event' not in pd_desc or
                 # Either we care about raw and we check, or blanket clear
                 raw is None or
                 pd_desc.get('raw') == raw
+            ):
+                self._cache_del(pd_desc)
+
+
+class _FTraceChunk(trappy.FTrace):
+    """
+    :class:`trappy.ftrace.FTrace` only parsing the lines of a text trace
+    starting in the given range of bytes.
+
+    :param byte_range: ``(start, end)`` tuple of offsets in the file. ``start``
+        must be the offset of the beginning of a line.
+    :type byte_range: tuple(int, int)
+
+    :param initial_timestamp: Timestamp of the last event preceding the range.
+    :type initial_timestamp: float
+
+    :Variable keyword arguments: Forwarded to :class:`trappy.ftrace.FTrace`.
+
+    :ivar nr_lines: Number of lines in the range.
+    """
+
+    disable_cache = True
+
+    def __init__(self, path, byte_range, initial_timestamp=0, **kwargs):
+        self.byte_range = byte_range
+        self.initial_timestamp = initial_timestamp
+        self.nr_lines = 0
+        super().__init__(path, **kwargs)
+
+    @contextlib.contextmanager
+    def _open_trace_file(self, trace_file):
+        start, end = self.byte_range
+
+        def read_lines(f):
+            pos = start
+            for line in f:
+                if pos >= end:
+                    break
+                pos += len(line)
+                self.nr_lines += 1
+                yield line.decode('utf-8')
+
+        with open(trace_file, 'rb') as f:
+            f.seek(start)
+            yield read_lines(f)
+
+    @staticmethod
+    def split(path, nr_chunks, start=0, end=None):
+        """
+        Split the given range of the file in newline-aligned ranges of bytes.
+
+        :param start: Offset of the beginning of a line.
+        :type start: int
+
+        :param end: Offset of the end of the range. If ``None``, the end of
+            the file is used.
+        :type end: int or None
+
+        :returns: A list of ``(start, end)`` tuples.
+        """
+        if end is None:
+            end = os.stat(path).st_size
+        size = end - start
+        bounds = [start]
+        with open(path, 'rb') as f:
+            for i in range(1, nr_chunks):
+                f.seek(max(start + size * i // nr_chunks, bounds[-1]))
+                # Move to the beginning of the next line, unless the offset
+                # is already at the beginning of a line
+                if f.tell():
+                    f.seek(f.tell() - 1)
+                f.readline()
+                bounds.append(min(f.tell(), end))
+        bounds.append(end)
+        return [
+            (start, end)
+            for start, end in zip(bounds, bounds[1:])
+            if start < end
+        ]
+
+    @classmethod
+    def parse(cls, path, events, byte_range, initial_timestamp=0, filters=None):
+        """
+        Parse the given events in a range of the file.
+
+        :param filters: Forwarded to :class:`trappy.ftrace.FTrace`.
+        :type filters: dict or None
+
+        :returns: A tuple ``(df_map, nr_lines, nr_trace_lines, basetime,
+            endtime)`` where ``nr_trace_lines`` is the number of lines after
+            the beginning of the trace.
+        """
+        trace = cls(
+            path,
+            byte_range=byte_range,
+            initial_timestamp=initial_timestamp,
+            scope="custom",
+            events=events,
+            normalize_time=False,
+            filters=filters,
+        )
+
+        df_map = {}
+        for event in events:
+            try:
+                df = getattr(trace, event).data_frame
+            except AttributeError:
+                continue
+            else:
+                if not df.empty:
+                    df_map[event] = df
+
+        return (df_map, trace.nr_lines, trace.lines, trace.basetime, trace.endtime)
+
+
+def _parse_ftrace_chunk(args):
+    return _FTraceChunk.parse(*args)
+
+
+class _FTraceLines(trappy.FTrace):
+    """
+    :class:`trappy.ftrace.FTrace` only parsing some lines of a text trace.
+
+    :param offsets: Offsets in the file of the beginning of the lines to
+        parse, in increasing order.
+    :type offsets: numpy.ndarray
+
+    :Variable keyword arguments: Forwarded to :class:`trappy.ftrace.FTrace`.
+
+    .. note:: The ``__line`` column of the dataframes is the position of the
+        line in ``offsets``.
+    """
+
+    disable_cache = True
+
+    def __init__(self, path, offsets, **kwargs):
+        self.offsets = offsets
+        super().__init__(path, **kwargs)
+
+    @contextlib.contextmanager
+    def _open_trace_file(self, trace_file):
+        def read_lines(mm):
+            for offset in self.offsets.tolist():
+                end = mm.find(b'\n', offset)
+                if end < 0:
+                    end = len(mm)
+                yield mm[offset:end].decode('utf-8')
+
+        with open(trace_file, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield read_lines(mm)
+
+    @classmethod
+    def parse(cls, path, events, offsets, filters=None):
+        """
+        Parse the given events in the lines starting at ``offsets``.
+
+        :param filters: Forwarded to :class:`trappy.ftrace.FTrace`.
+        :type filters: dict or None
+
+        :returns: A mapping of event names to dataframes.
+        """
+        trace = cls(
+            path,
+            offsets=offsets,
+            scope="custom",
+            events=events,
+            normalize_time=False,
+            filters=filters,
+        )
+
+        df_map = {}
+        for event in events:
+            try:
+                df = getattr(trace, event).data_frame
+            except AttributeError:
+                continue
+            else:
+                if not df.empty:
+                    df_map[event] = df
+
+        return df_map
+
+
+def _parse_ftrace_lines(args):
+    return _FTraceLines.parse(*args)
+
+
+def _index_ftrace_range(args):
+    return _FTraceIndex._index_range(*args)
+
+
+class _FTraceIndex:
+    """
+    Index of the events of a text trace.
+
+    Each line of the trace that :class:`trappy.ftrace.FTrace` would consider as
+    an event is recorded with its offset in the file and its timestamp. The
+    lines are grouped by event names prefix, such as ``sched_switch:`` or
+    ``print: 0xffff...: my_event:`` for events emitted through the trace
+    marker.
+
+    Only what cannot be recomputed cheaply is stored: the timestamps in
+    seconds and the line numbers are derived when the lines are parsed, see
+    :meth:`get_times` and :meth:`get_lines`.
+
+    :param prefixes: Event names prefix of each group of lines.
+    :type prefixes: numpy.ndarray
+
+    :param counts: Number of lines in each group.
+    :type counts: numpy.ndarray
+
+    :param offsets: Offset of each line in the file, sorted by group and then
+        by line.
+    :type offsets: numpy.ndarray
+
+    :param times_ns: Timestamp of each line in integer nanoseconds, as found
+        in the trace.
+    :type times_ns: numpy.ndarray
+
+    :param basetime: Timestamp of the first event.
+    :type basetime: float
+
+    :param endtime: Timestamp of the last event.
+    :type endtime: float
+
+    :param basetime_ns: Timestamp of the first event in nanoseconds.
+    :type basetime_ns: int
+
+    :param endtime_ns: Timestamp of the last event in nanoseconds.
+    :type endtime_ns: int
+
+    :param size: Size of the indexed part of the file in bytes.
+    :type size: int
+
+    :param trace_id: Fingerprint of the indexed trace, see
+        :attr:`TraceCache.trace_id`.
+    :type trace_id: str or None
+    """
+
+    _LINE_REGEX = re.compile(
+        # Same as trappy.ftrace.SPECIAL_FIELDS_RE, applied to a whole file
+        # rather than a single line.
+        rb'^[^\S\n]*.*-\d+(?:[^\S\n]+\(.*\))?[^\S\n]+\[\d+\](?:[^\S\n]+....)?[^\S\n]+'
+        rb'([0-9]+(\.[0-9]+)?): ((?:\w+:[^\S\n]+)+).*\S',
+        re.MULTILINE,
+    )
+
+    # Size of the blocks of the file scanned at once when counting lines
+    _LINES_BLOCK_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, prefixes, counts, offsets, times_ns, basetime, endtime, basetime_ns, endtime_ns, size, trace_id):
+        self.prefixes = prefixes
+        self.counts = counts
+        self.offsets = offsets
+        self.times_ns = times_ns
+        self.basetime = basetime
+        self.endtime = endtime
+        self.basetime_ns = basetime_ns
+        self.endtime_ns = endtime_ns
+        self.size = size
+        self.trace_id = trace_id
+
+        self._bounds = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    @classmethod
+    def _index_range(cls, path, byte_range):
+        """
+        Index the lines starting in the given range of bytes.
+
+        :returns: A tuple ``(offsets, times_ns, prefixes)``.
+        """
+        start, end = byte_range
+        offsets = []
+        times_ns = []
+        prefixes = []
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for match in cls._LINE_REGEX.finditer(mm, start, end):
+                    timestamp, us, prefix = match.groups()
+                    offsets.append(match.start())
+                    # Timestamps are either in seconds or in nanoseconds
+                    # depending on the trace clock
+                    if us:
+                        sec = timestamp[:-len(us)]
+                        times_ns.append(int(sec) * 10 ** 9 + int(us[1:10].ljust(9, b'0')))
+                    else:
+                        times_ns.append(int(timestamp))
+                    prefixes.append(prefix)
+
+        offsets = np.array(offsets, dtype=np.int64)
+        times_ns = np.array(times_ns, dtype=np.int64)
+        return (offsets, times_ns, prefixes)
+
+    @classmethod
+    def _index_ranges(cls, path, nr_jobs, start=0, end=None):
+        """
+        Index the lines starting in the given range of bytes, possibly in
+        parallel.
+
+        :returns: A tuple ``(offsets, times_ns, names, codes)``, where
+            ``names`` are the distinct event names prefixes with normalized
+            whitespace and ``codes`` the position of the prefix of each line in
+            ``names``.
+        """
+        byte_ranges = _FTraceChunk.split(path, nr_jobs, start=start, end=end)
+        if len(byte_ranges) > 1:
+            with multiprocessing.Pool(processes=len(byte_ranges)) as pool:
+                chunks = pool.map(
+                    _index_ftrace_range,
+                    [
+                        (path, byte_range)
+                        for byte_range in byte_ranges
+                    ],
+                    chunksize=1,
+                )
+        else:
+            chunks = [
+                cls._index_range(path, byte_range)
+                for byte_range in byte_ranges
+            ]
+
+        offsets = np.concatenate([np.array([], dtype=np.int64)] + [
+            chunk[0] for chunk in chunks
+        ])
+        times_ns = np.concatenate([np.array([], dtype=np.int64)] + [
+            chunk[1] for chunk in chunks
+        ])
+        codes = {}
+        raw_codes = np.array(
+            [
+                codes.setdefault(prefix, len(codes))
+                for chunk in chunks
+                for prefix in chunk[2]
+            ],
+            dtype=np.int64,
+        )
+        # Ignore the variable amount of whitespace between the names
+        names = [
+            ' '.join(prefix.decode('utf-8').split())
+            for prefix in codes.keys()
+        ]
+        return (offsets, times_ns, names, raw_codes)
+
+    @staticmethod
+    def _to_seconds(times_ns):
+        """
+        Timestamps in seconds made unique like :class:`trappy.ftrace.FTrace`
+        does, from the timestamps in nanoseconds of consecutive lines.
+
+        .. note:: The conversion gives the same float as parsing the timestamp
+            in seconds as long as the timestamps are below ``2**53``
+            nanoseconds, i.e. about 104 days.
+        """
+        return make_unique_timestamps(times_ns / 1e9)
+
+    @classmethod
+    def _from_lines(cls, offsets, times_ns, names, codes, size, trace_id):
+        """
+        Build the index from the indexed lines, in line order.
+        """
+        if len(times_ns):
+            basetime_ns = times_ns[0].item()
+            endtime_ns = times_ns[-1].item()
+            times = cls._to_seconds(times_ns)
+            basetime = times[0].item()
+            endtime = times[-1].item()
+            del times
+        else:
+            basetime_ns = endtime_ns = 0
+            basetime = endtime = 0
+
+        # Group the lines by event names prefix
+        prefixes, names_codes = np.unique(np.array(names, dtype=str), return_inverse=True)
+        groups = names_codes[codes] if len(codes) else codes
+        order = np.argsort(groups, kind='stable')
+        counts = np.bincount(groups, minlength=len(prefixes))
+
+        return cls(
+            prefixes=prefixes,
+            counts=counts,
+            offsets=offsets[order],
+            times_ns=times_ns[order],
+            basetime=basetime,
+            endtime=endtime,
+            basetime_ns=basetime_ns,
+            endtime_ns=endtime_ns,
+            size=size,
+            trace_id=trace_id,
+        )
+
+    @classmethod
+    def empty(cls):
+        """
+        Build the index of an empty trace.
+        """
+        return cls._from_lines(
+            offsets=np.array([], dtype=np.int64),
+            times_ns=np.array([], dtype=np.int64),
+            names=[],
+            codes=np.array([], dtype=np.int64),
+            size=0,
+            trace_id=None,
+        )
+
+    @classmethod
+    def from_trace(cls, path, trace_id, nr_jobs=1):
+        """
+        Build the index of a text trace.
+
+        :param path: Path to the text trace.
+        :type path: str
+
+        :param trace_id: Fingerprint of the trace.
+        :type trace_id: str or None
+
+        :param nr_jobs: Number of processes used to index the trace.
+        :type nr_jobs: int
+        """
+        size = os.stat(path).st_size
+        offsets, times_ns, names, codes = cls._index_ranges(path, nr_jobs, end=size)
+        return cls._from_lines(
+            offsets=offsets,
+            times_ns=times_ns,
+            names=names,
+            codes=codes,
+            size=size,
+            trace_id=trace_id,
+        )
+
+    def get_tail_start(self, path):
+        """
+        Offset of the first byte that has to be indexed again if the file has
+        been appended to.
+
+        If the last indexed line did not end with a newline, it may have been
+        only partially written, so it will be indexed again.
+        """
+        size = self.size
+        if not size:
+            return 0
+
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Beginning of the line following the last newline
+                return mm.rfind(b'\n', 0, size) + 1
+
+    def extend(self, path, end, trace_id, nr_jobs=1):
+        """
+        Build the index of the trace after lines have been appended to it.
+
+        :param path: Path to the text trace.
+        :type path: str
+
+        :param end: Offset of the end of the indexed part of the file.
+        :type end: int
+
+        :param trace_id: Fingerprint of the trace.
+        :type trace_id: str or None
+
+        :param nr_jobs: Number of processes used to index the trace.
+        :type nr_jobs: int
+
+        :returns: A tuple ``(index, start)`` with the new index and the offset
+            of the first line that was indexed again. The events from this
+            line onward have to be parsed again.
+        """
+        start = self.get_tail_start(path)
+        offsets, times_ns, names, codes = self._index_ranges(
+            path, nr_jobs, start=start, end=end)
+
+        # Old lines in line order, except the ones indexed again
+        order = np.argsort(self.offsets, kind='stable')
+        order = order[self.offsets[order] < start]
+        old_codes = np.repeat(
+            np.arange(len(self.prefixes), dtype=np.int64),
+            self.counts,
+        )[order]
+
+        index = self._from_lines(
+            offsets=np.concatenate([self.offsets[order], offsets]),
+            times_ns=np.concatenate([self.times_ns[order], times_ns]),
+            names=self.prefixes.tolist() + names,
+            codes=np.concatenate([old_codes, codes + len(self.prefixes)]),
+            size=end,
+            trace_id=trace_id,
+        )
+        return (index, start)
+
+    @classmethod
+    def from_path(cls, path):
+        """
+        Load an index written with :meth:`to_path`.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                prefixes=data['prefixes'],
+                counts=data['counts'],
+                offsets=data['offsets'],
+                times_ns=data['times_ns'],
+                basetime=data['basetime'].item(),
+                endtime=data['endtime'].item(),
+                basetime_ns=data['basetime_ns'].item(),
+                endtime_ns=data['endtime_ns'].item(),
+                size=data['size'].item(),
+                trace_id=data['trace_id'].item(),
             )
-        }
+
+    def to_path(self, path):
+        """
+        Write the index to the given ``path``.
+        """
+        # Write to a temporary file first, so that other processes never see
+        # a partially written index
+        with _atomic_path(path) as temp_path, open(temp_path, 'wb') as f:
+            np.savez(
+                f,
+                prefixes=self.prefixes,
+                counts=self.counts,
+                offsets=self.offsets,
+                times_ns=self.times_ns,
+                basetime=self.basetime,
+                endtime=self.endtime,
+                basetime_ns=self.basetime_ns,
+                endtime_ns=self.endtime_ns,
+                size=self.size,
+                trace_id=self.trace_id,
+            )
+
+    def get_times(self):
+        """
+        Timestamps in seconds of the lines, as computed by
+        :class:`trappy.ftrace.FTrace`.
+
+        Timestamps are made unique with respect to all the preceding events
+        of the trace, so they are computed for all the lines at once.
+        """
+        order = np.argsort(self.offsets, kind='stable')
+        times = np.empty(len(order), dtype=np.float64)
+        times[order] = self._to_seconds(self.times_ns[order])
+        return times
+
+    def get_lines(self, path, offsets):
+        """
+        Line numbers of the lines starting at the given offsets, as in the
+        ``__line`` column, i.e. counted from the first event.
+
+        :param offsets: Offsets of the beginning of lines.
+        :type offsets: numpy.ndarray
+
+        .. note:: The file is scanned up to the last offset.
+        """
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if not len(self.offsets) or not len(offsets):
+            return np.zeros(len(offsets), dtype=np.int64)
+
+        all_offsets = np.concatenate([[self.offsets.min()], offsets])
+        order = np.argsort(all_offsets, kind='stable')
+        sorted_offsets = all_offsets[order]
+        end = sorted_offsets[-1].item()
+
+        # Number of newlines before each offset
+        counts = np.zeros(len(all_offsets), dtype=np.int64)
+        nr_newlines = 0
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for block_start in range(0, end, self._LINES_BLOCK_SIZE):
+                    block_end = min(block_start + self._LINES_BLOCK_SIZE, end)
+                    buf = np.frombuffer(mm, dtype=np.uint8, count=block_end - block_start, offset=block_start)
+                    newlines = np.flatnonzero(buf == ord('\n')) + block_start
+                    del buf
+
+                    # Offsets in ]block_start, block_end] are preceded by the
+                    # newlines of this block and of the previous ones
+                    lo, hi = np.searchsorted(sorted_offsets, [block_start, block_end], side='right')
+                    counts[lo:hi] = nr_newlines + np.searchsorted(newlines, sorted_offsets[lo:hi])
+                    nr_newlines += len(newlines)
+
+        lines = np.empty_like(counts)
+        lines[order] = counts
+        return lines[1:] - lines[0]
+
+    def _get_groups(self, unique_word):
+        # Unique words can only be looked up in the event names prefixes if
+        # they do not contain any whitespace, since it was normalized in the
+        # prefixes
+        if any(c.isspace() for c in unique_word):
+            raise ValueError('Unique word cannot be looked up: "{}"'.format(unique_word))
+
+        return [
+            i
+            for i, prefix in enumerate(self.prefixes.tolist())
+            if unique_word in prefix
+        ]
+
+    def select(self, unique_words):
+        """
+        Positions of the lines that contain any of the given unique words in
+        their event names prefix, in line order.
+
+        :param unique_words: Unique words of the :class:`trappy.base.Base`
+            subclasses parsing the events.
+        :type unique_words: list(str)
+
+        :raises ValueError: If a unique word cannot be looked up in the event
+            names prefixes.
+        """
+        groups = sorted({
+            group
+            for unique_word in unique_words
+            for group in self._get_groups(unique_word)
+        })
+        positions = np.concatenate([np.array([], dtype=np.int64)] + [
+            np.arange(self._bounds[group], self._bounds[group + 1])
+            for group in groups
+        ])
+        return positions[np.argsort(self.offsets[positions], kind='stable')]
+
+    def count(self, unique_word):
+        """
+        Number of lines that contain the given unique word in their event names
+        prefix.
+
+        :raises ValueError: If the unique word cannot be looked up in the event
+            names prefixes.
+        """
+        return sum(
+            self.counts[group].item()
+            for group in self._get_groups(unique_word)
+        )
+
+
+# Data types of the raw events fields (i.e. before any sanitization), for
+# fields that cannot be recognized by their name in _FIELDS_DTYPES
+_EVENTS_FIELDS_DTYPES = {
+    'cpu_frequency': {
+        'state': 'int32',
+        'cpu_id': 'int16',
+    },
+    'cpu_frequency_devlib': {
+        'state': 'int32',
+        'cpu_id': 'int16',
+    },
+    'cpu_idle': {
+        'cpu_id': 'int16',
+    },
+    'sched_load_cfs_rq': {
+        'path': 'category',
+    },
+    'sched_load_se': {
+        'path': 'category',
+    },
+    'sched_pelt_cfs': {
+        'path': 'category',
+    },
+    'sched_pelt_se': {
+        'path': 'category',
+    },
+}
+
+# Data types of fields according to their name, for all events including the
+# ones that are discovered dynamically. Data types are signed, so that values
+# can be subtracted from each other.
+_FIELDS_DTYPES = [
+    (re.compile(r'(?:__)?comm|\w+_comm'), 'category'),
+    (re.compile(r'(?:__)?pid|\w+_pid|tgid'), 'int32'),
+    (re.compile(r'(?:__)?cpu|\w+_cpu|cpu_id'), 'int16'),
+    (re.compile(r'frequency|\w+_freq|freq'), 'int32'),
+]
+
+
+def _get_event_dtypes(event, columns):
+    """
+    Get the data types of the given columns of the raw dataframe of an event.
+
+    :param event: Name of the event.
+    :type event: str
+
+    :param columns: Columns of the dataframe.
+    :type columns: list(str)
+
+    :returns: A dict mapping column names to data types. Columns with no known
+        data type are not listed.
+    """
+    event_dtypes = _EVENTS_FIELDS_DTYPES.get(event, {})
+
+    def get_dtype(col):
+        try:
+            return event_dtypes[col]
+        except KeyError:
+            for regex, dtype in _FIELDS_DTYPES:
+                if regex.fullmatch(col):
+                    return dtype
+
+            return None
+
+    dtypes = {
+        col: get_dtype(col)
+        for col in columns
+    }
+    return {
+        col: dtype
+        for col, dtype in dtypes.items()
+        if dtype is not None
+    }
+
+
+def _apply_event_dtypes(event, df):
+    """
+    Convert the columns of the raw dataframe of an event to compact data types.
+
+    Strings columns such as task names are converted to categories, and
+    integer columns are converted to the data type of their field, whatever
+    their values.
+
+    :raises ValueError: If the values of an integer column do not fit in the
+        data type of its field.
+    """
+    for col, dtype in _get_event_dtypes(event, df.columns).items():
+        series = df[col]
+        if dtype == 'category':
+            # Categories of dataframes parsed in chunks are not merged by
+            # pd.concat(), so they could have been turned back into objects
+            if series.dtype == object:
+                df[col] = series.astype(dtype)
+        else:
+            dtype = np.dtype(dtype)
+            # Columns with missing values are left as floats
+            if series.dtype.kind in 'iu' and series.dtype != dtype:
+                info = np.iinfo(dtype)
+                if not series.empty and (
+                    series.min() < info.min or series.max() > info.max
+                ):
+                    raise ValueError('Values of field "{}" of event "{}" do not fit in {}: [{}, {}]'.format(
+                        col, event, dtype, series.min(), series.max()))
+
+                df[col] = series.astype(dtype)
+
+    return df
 
 
 class Trace(Loggable, TraceBase):
@@ -1341,9 +3498,28 @@ class Trace(Loggable, TraceBase):
         of the system timestamp that was captured when tracing.
     :type normalize_time: bool
 
+    :param time_unit: Unit of the timestamps used as index of the dataframes,
+        and of all the values derived from them (:attr:`start`, windows,
+        durations etc.). Possible values are:
+
+        - ``"s"``: Floating point seconds. Duplicated timestamps are made
+          unique by adding the smallest possible amount to them.
+        - ``"ns"``: Integer nanoseconds. This avoids the loss of precision
+          of floating point timestamps on traces spanning a long time.
+          Duplicated timestamps are kept as-is, and the ``__line`` column
+          gives the order of the events across all the dataframes.
+
+        .. note:: Nanosecond timestamps are exact for text traces and for
+            ``trace_format="TraceDat"``. Other formats are parsed as floating
+            point seconds before conversion.
+    :type time_unit: str
+
     :param trace_format: format of the trace. Possible values are:
         - FTrace
         - SysTrace
+        - TraceDat: ``trace.dat`` file decoded natively by
+          :class:`lisa.trace_dat.TraceDatFTrace`, without running
+          ``trace-cmd report``.
     :type trace_format: str or None
 
     :param plots_dir: directory where to save plots
@@ -1379,13 +3555,54 @@ class Trace(Loggable, TraceBase):
         parameter.
     :type write_swap: bool
 
+    :param swap_format: Storage format of the dataframes written to the swap,
+        see :class:`TraceCache`. When ``None``, the format is chosen for each
+        dataframe depending on whether the swap has enough room for the
+        format that is the fastest to reload.
+    :type swap_format: str or None
+
+    :param async_swap: If ``True``, dataframes are written to the swap by a
+        background thread, so that e.g. the first :meth:`df_events` call on an
+        event does not wait for the serialization, see :class:`TraceCache`.
+    :type async_swap: bool
+
+    :param packed_swap: If ``True``, the dataframes in the swap are packed in
+        a single file rather than using a few files for each of them, see
+        :class:`TraceCache`.
+    :type packed_swap: bool
+
+    :param cache_stats_hook: Hook called on each event recorded in the
+        statistics of the cache, see :meth:`cache_stats` and
+        :class:`TraceCache`.
+    :type cache_stats_hook: collections.abc.Callable or logging.Logger or None
+
+    :param parse_jobs: Number of processes used to index and parse textual
+        traces. The lines to parse are split in as many parts, which are
+        parsed concurrently. When ``None``, one process per CPU is used for
+        large enough traces.
+    :type parse_jobs: int or None
+
+    :param partition_duration: Duration in seconds of the time slices the
+        events are split into. When set, windowed dataframes such as the ones
+        of :meth:`df_events` with ``window`` or of a :class:`TraceView` are
+        built from the slices overlapping with the window, which are parsed
+        and stored in the swap independently. Together with
+        :meth:`iter_df_events`, this allows scanning traces too large for the
+        dataframe of an event to fit in memory. Dataframes of the whole trace
+        are still loaded in one go.
+
+        .. note:: Only text traces can be partitioned, since the lines of
+            each slice are located using the trace index. Events which
+            cannot be looked up in the index are not partitioned.
+    :type partition_duration: float or None
+
     :ivar start: The timestamp of the first trace event in the trace
     :ivar end: The timestamp of the last trace event in the trace
     :ivar time_range: Maximum timespan for all collected events
     :ivar window: Conveniency tuple of ``(start, end)``.
     :ivar available_events: Events available in the parsed trace, exposed as
         some kind of set-ish smart container. Querying for event might trigger
-        the parsing of it.
+        the parsing of it, unless the trace can be indexed (text traces).
     """
 
     def __init__(self,
@@ -1403,9 +3620,22 @@ class Trace(Loggable, TraceBase):
         enable_swap=True,
         max_swap_size=None,
         write_swap=True,
+        parse_jobs=None,
+        time_unit='s',
+        swap_format=None,
+        async_swap=False,
+        packed_swap=False,
+        cache_stats_hook=None,
+        partition_duration=None,
     ):
         super().__init__()
 
+        if time_unit not in ('s', 'ns'):
+            raise ValueError('Unknown time unit: {}'.format(time_unit))
+
+        if partition_duration is not None and partition_duration <= 0:
+            raise ValueError('Partition duration must be positive: {}'.format(partition_duration))
+
         sanitization_functions = sanitization_functions or {}
         self._sanitization_functions = {
             **self._SANITIZATION_FUNCTIONS,
@@ -1436,6 +3666,10 @@ class Trace(Loggable, TraceBase):
             swap_dir=swap_dir,
             max_swap_size=max_swap_size,
             max_mem_size=max_mem_size,
+            swap_format=swap_format,
+            async_swap=async_swap,
+            packed_swap=packed_swap,
+            stats_hook=cache_stats_hook,
         )
         # Initial scrub of the swap to discard unwanted data, honoring the
         # max_swap_size right from the beginning
@@ -1444,8 +3678,15 @@ class Trace(Loggable, TraceBase):
 
         self._write_swap = write_swap
         self.normalize_time = normalize_time
+        self.time_unit = time_unit
         self.trace_path = trace_path
         self._trace_format = trace_format
+        self._parse_jobs = parse_jobs
+        self._partition_duration = partition_duration
+
+        # Other formats would need to be fully parsed to be split
+        if partition_duration is not None and not self._is_text_ftrace():
+            raise ValueError('Only text traces can be partitioned: {}'.format(trace_path))
 
         # The platform information used to run the experiments
         if plat_info is None:
@@ -1472,9 +3713,32 @@ class Trace(Loggable, TraceBase):
         if events:
             self._load_raw_df_map(events, write_swap=True, allow_missing_events=not self._strict_events)
 
-    @property
-    def trace_state(self):
-        return (self.normalize_time,)
+    @property
+    def trace_state(self):
+        return (self.normalize_time, self.time_unit)
+
+    @property
+    def time_scale(self):
+        """
+        Number of time units in one second, to convert durations in seconds
+        to the unit of the dataframes index.
+        """
+        return 1 if self.time_unit == 's' else 10 ** 9
+
+    def _to_time_unit(self, time):
+        """
+        Convert timestamps in float seconds coming from a parser to
+        :attr:`time_unit`.
+
+        :param time: Timestamp or :class:`pandas.Index` of timestamps.
+        :type time: float or pandas.Index
+        """
+        if self.time_unit == 's':
+            return time
+        elif isinstance(time, pd.Index):
+            return pd.Index(np.round(time.values * 1e9).astype(np.int64), name=time.name)
+        else:
+            return int(round(time * 1e9))
 
     @property
     @memoized
@@ -1572,36 +3836,53 @@ class Trace(Loggable, TraceBase):
 
         proxy.base_trace = trace
 
-    def _get_trace(self, events):
-        logger = self.get_logger()
-        path = self.trace_path
-        events = set(events)
-
+    def _get_trace_format(self):
         if self._trace_format is None:
-            if path.endswith('html'):
-                trace_format = 'SySTrace'
+            if self.trace_path.endswith('html'):
+                return 'SySTrace'
             else:
-                trace_format = 'FTrace'
+                return 'FTrace'
         else:
-            trace_format = self._trace_format
+            return self._trace_format
 
+    def _get_parsable_events(self, events):
+        events = set(events)
         # Trappy chokes on some events for some reason, so make the user aware
         # of it and carry on
         mishandled_events = {'thermal_power_cpu_limit'}
         mishandled_events &= events
         if mishandled_events:
-            logger.debug('A bug in Trappy prevents from loading these events: {}'.format(sorted(mishandled_events)))
+            self.get_logger().debug('A bug in Trappy prevents from loading these events: {}'.format(sorted(mishandled_events)))
             events -= mishandled_events
 
+        return events
+
+    def _get_trace(self, events, filters=None):
+        logger = self.get_logger()
+        path = self.trace_path
+        trace_format = self._get_trace_format()
+        events = self._get_parsable_events(events)
 
         logger.debug('Parsing {} events from {}: {}'.format(trace_format, path, sorted(events)))
         if trace_format == 'Systems':
             trace_class = trappy.SysTrace
         elif trace_format == 'FTrace':
             trace_class = trappy.FTrace
+        elif trace_format == 'TraceDat':
+            trace_class = TraceDatFTrace
         else:
             raise ValueError('Unknown trace format: {}'.format(trace_format))
 
+        # The native parser can directly provide nanosecond timestamps
+        if trace_class is TraceDatFTrace:
+            kwargs = dict(time_unit=self.time_unit)
+        # Parse the output of trace-cmd report while it is produced, rather
+        # than writing it to a temporary file first
+        elif trace_class is trappy.FTrace:
+            kwargs = dict(stream_report=True, filters=filters)
+        else:
+            kwargs = {}
+
         # Since we handle the cache in lisa.trace.Trace, we do not need to duplicate it
         trace_class.disable_cache = True
         internal_trace = trace_class(
@@ -1609,6 +3890,7 @@ class Trace(Loggable, TraceBase):
             scope="custom",
             events=sorted(events),
             normalize_time=False,
+            **kwargs
         )
 
         # trappy sometimes decides to be "clever" and overrules the path to be
@@ -1616,9 +3898,22 @@ class Trace(Loggable, TraceBase):
         assert path == internal_trace.trace_path
 
         # Since we got a trace here, use it to get basetime/endtime as well
-        self._get_time_range(internal_trace=internal_trace)
+        self._get_time_range(
+            basetime=self._get_internal_time(internal_trace, internal_trace.basetime),
+            endtime=self._get_internal_time(internal_trace, internal_trace.endtime),
+        )
         return internal_trace
 
+    def _get_internal_time(self, internal_trace, time):
+        """
+        Convert a timestamp or an index coming from the given internal trace
+        object to :attr:`time_unit`.
+        """
+        if getattr(internal_trace, 'time_unit', 's') == self.time_unit:
+            return time
+        else:
+            return self._to_time_unit(time)
+
     @property
     @memoized
     def basetime(self):
@@ -1638,24 +3933,47 @@ class Trace(Loggable, TraceBase):
         """
         return self._get_time_range()[1]
 
-    def _get_time_range(self, internal_trace=None):
+    @staticmethod
+    def _get_time_range_keys(time_unit):
+        """
+        Metadata keys of the time range in the given time unit.
+        """
+        if time_unit == 's':
+            return ('basetime', 'endtime')
+        else:
+            return (
+                'basetime-{}'.format(time_unit),
+                'endtime-{}'.format(time_unit),
+            )
+
+    def _get_time_range(self, basetime=None, endtime=None):
+        basetime_key, endtime_key = self._get_time_range_keys(self.time_unit)
+
         try:
-            basetime = self._cache.get_metadata('basetime')
-            endtime = self._cache.get_metadata('endtime')
+            basetime = self._cache.get_metadata(basetime_key)
+            endtime = self._cache.get_metadata(endtime_key)
         except KeyError:
-            if internal_trace is None:
-                internal_trace = self._get_trace(events=[])
+            if basetime is None or endtime is None:
+                index = self._get_lazy_index()
+                if index is None:
+                    # _get_trace() will call us back with the time range
+                    self._get_trace(events=[])
+                    return self._get_time_range()
+                elif self.time_unit == 's':
+                    basetime = index.basetime
+                    endtime = index.endtime
+                else:
+                    basetime = index.basetime_ns
+                    endtime = index.endtime_ns
 
-            basetime = internal_trace.basetime
-            endtime = internal_trace.endtime
             self._cache.update_metadata({
-                'basetime': basetime,
-                'endtime': endtime,
+                basetime_key: basetime,
+                endtime_key: endtime,
             })
 
         return (basetime, endtime)
 
-    def df_events(self, event, raw=None, rename_cols=True, window=None, signals=None, signals_init=True, compress_signals_init=False, write_swap=None):
+    def df_events(self, event, raw=None, rename_cols=True, window=None, signals=None, signals_init=True, compress_signals_init=False, write_swap=None, filters=None, columns=None):
         """
         Get a dataframe containing all occurrences of the specified trace event
         in the parsed trace.
@@ -1698,8 +4016,126 @@ class Trace(Loggable, TraceBase):
                 * Computing the dataframe takes more time than the estimated
                   time it takes to write it to the cache.
         :type write_swap: bool
+
+        :param filters: Only keep the rows where the columns contain one of
+            the given values, e.g. ``{'__cpu': [2, 3], 'pid': [1234]}``. A
+            single value can be given instead of a list. The filters are
+            applied before windowing, and are pushed down to the parser or to
+            the swap area reader when possible, so that the rows that are not
+            kept are never loaded in memory. The values given for a column
+            must be comparable with each other, otherwise a
+            :exc:`ValueError` is raised.
+        :type filters: dict(str, object or list(object))
+
+        :param columns: Only keep the given columns, on top of the index. For
+            raw dataframes, only these columns are read from the swap area,
+            which saves time and memory when a few columns of an event with
+            many fields are needed.
+        :type columns: list(str) or None
+        """
+
+        pd_desc, sanitization_f = self._make_df_events_pd_desc(
+            event,
+            raw=raw,
+            rename_cols=rename_cols,
+            window=window,
+            signals=signals,
+            signals_init=signals_init,
+            compress_signals_init=compress_signals_init,
+            filters=filters,
+            columns=columns,
+        )
+
+        try:
+            df = self._cache.fetch(pd_desc, insert=True)
+        except KeyError:
+            df = self._load_df(pd_desc, sanitization_f=sanitization_f, write_swap=write_swap)
+
+        # No row matching the filters does not mean the event is missing
+        if df.empty and not (filters and event in self.available_events):
+            raise MissingTraceEventError(
+                TraceEventChecker(event),
+                available_events=self.available_events,
+            )
+
+        return df
+
+    def iter_df_events(self, event, window=None, raw=None, rename_cols=True, write_swap=None, filters=None, columns=None):
+        """
+        Iterate over the dataframe of an event, one partition of the trace at
+        a time, see the ``partition_duration`` parameter.
+
+        Each partition is evicted from memory once the next one is requested,
+        so analyses scanning the whole trace can run with a bounded amount of
+        memory, e.g.::
+
+            trace = Trace('trace.txt', partition_duration=10)
+            nr_switches = sum(
+                len(df)
+                for df in trace.iter_df_events('sched_switch')
+            )
+
+        :param window: Only give the rows in that window, edges included.
+            Unlike :meth:`df_events`, no row is added before the window.
+        :type window: tuple(float, float) or None
+
+        :Variable keyword arguments: See :meth:`df_events`.
+
+        .. note:: If the event is not partitioned, the whole dataframe is
+            given at once.
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+
+        def select(df):
+            if window is not None:
+                start, end = window
+                if start is not None:
+                    df = df[df.index >= start]
+                if end is not None:
+                    df = df[df.index <= end]
+            if columns:
+                df = self._select_df_columns(event, df, columns)
+            return df
+
+        if not self._is_partitioned(event):
+            df = self.df_events(
+                event,
+                raw=raw,
+                rename_cols=rename_cols,
+                write_swap=write_swap,
+                filters=filters,
+            )
+            yield select(df)
+            return
+
+        pd_desc, sanitization_f = self._make_df_events_pd_desc(
+            event,
+            raw=raw,
+            rename_cols=rename_cols,
+            window=None,
+            signals=None,
+            signals_init=False,
+            compress_signals_init=False,
+            filters=filters,
+            columns=None,
+        )
+        if write_swap is None:
+            write_swap = self._write_swap
+
+        for partition in self._get_window_partitions(window or (None, None)):
+            df = self._load_df_partition(pd_desc, partition, sanitization_f=sanitization_f, write_swap=write_swap)
+            yield select(df)
+            del df
+            self._cache.evict(self._make_partition_pd_desc(pd_desc, partition))
+
+    def _make_df_events_pd_desc(self, event, raw, rename_cols, window, signals, signals_init, compress_signals_init, filters, columns):
         """
+        Make the descriptor of a dataframe given by :meth:`df_events`.
 
+        :returns: A tuple of the :class:`PandasDataDesc` and the sanitization
+            function to use, if any.
+        """
         sanitization_f = self._sanitization_functions.get(event)
 
         # Make sure no `None` value flies around in the cache, since it's
@@ -1746,20 +4182,41 @@ class Trace(Loggable, TraceBase):
                 sanitization=sanitization_f.__qualname__ if sanitization_f else None,
             )
 
-        pd_desc = PandasDataDesc(spec=spec)
+        filters = self._normalize_filters(filters)
+        if filters:
+            spec.update(filters=filters)
 
-        try:
-            df = self._cache.fetch(pd_desc, insert=True)
-        except KeyError:
-            df = self._load_df(pd_desc, sanitization_f=sanitization_f, write_swap=write_swap)
+        if columns:
+            if isinstance(columns, str):
+                columns = [columns]
+            spec.update(columns=sorted(set(columns)))
 
-        if df.empty:
-            raise MissingTraceEventError(
-                TraceEventChecker(event),
-                available_events=self.available_events,
-            )
+        return (PandasDataDesc(spec=spec), sanitization_f)
 
-        return df
+    @staticmethod
+    def _normalize_filters(filters):
+        """
+        Normalize filters given to :meth:`df_events`, so that equivalent
+        filters share the same cache entries.
+        """
+        def normalize(col, values):
+            if isinstance(values, str) or not isinstance(values, Iterable):
+                values = [values]
+            try:
+                return sorted(set(values))
+            # Values that cannot be compared, such as None and strings, would
+            # not match the data type of a single column either
+            except TypeError:
+                raise ValueError('Values of the filter on column "{}" have incompatible types: {}'.format(
+                    col, sorted({type(value).__name__ for value in values})))
+
+        if filters:
+            return {
+                col: normalize(col, values)
+                for col, values in filters.items()
+            }
+        else:
+            return None
 
     def _make_raw_pd_desc(self, event):
         spec = self._make_raw_pd_desc_spec(event)
@@ -1785,12 +4242,43 @@ class Trace(Loggable, TraceBase):
         if write_swap is None:
             write_swap = self._write_swap
 
-        df = self._load_raw_df_map([event], write_swap=True)[event]
+        filters = pd_desc.get('filters')
+        columns = pd_desc.get('columns')
+        window = pd_desc.get('window')
+        partition = pd_desc.get('partition')
+
+        if window is not None and (not columns or self._is_partitioned(event)):
+            return self._load_df_window(pd_desc, sanitization_f=sanitization_f, write_swap=write_swap)
+        # Sanitization functions can use any column of the raw dataframe
+        if columns and raw:
+            # Columns needed to filter and window the dataframe
+            load_columns = set(columns) | set(filters or [])
+            if window is not None:
+                load_columns.add('__line')
+                load_columns.update(
+                    col
+                    for cols in pd_desc['signals']
+                    for col in cols
+                )
+        else:
+            load_columns = None
+
+        if partition is not None:
+            df = self._load_raw_partitions(event, [partition])[partition]
+        elif filters:
+            df = self._load_raw_df_filtered(event, filters, raw=raw, columns=load_columns)
+        elif load_columns:
+            df = self._load_raw_df_projected(event, load_columns)
+        else:
+            df = self._load_raw_df_map([event], write_swap=True)[event]
 
         if sanitization_f:
             # Evict the raw dataframe once we got the sanitized version, since
             # we are unlikely to reuse it again
-            self._cache.evict(self._make_raw_pd_desc(event))
+            raw_pd_desc = self._make_raw_pd_desc(event)
+            if partition is not None:
+                raw_pd_desc = self._make_partition_pd_desc(raw_pd_desc, partition)
+            self._cache.evict(raw_pd_desc)
 
             # We can ask to sanitize various aspects of the dataframe.
             # Adding a new aspect can be done without modifying existing
@@ -1805,26 +4293,544 @@ class Trace(Loggable, TraceBase):
         else:
             sanitization_time = 0
 
-        window = pd_desc.get('window')
+        if filters:
+            missing_cols = filters.keys() - set(df.columns)
+            if missing_cols:
+                raise ValueError('Cannot filter {} dataframe on non-existing columns: {}'.format(
+                    event,
+                    ', '.join(sorted(missing_cols)),
+                ))
+            df = df_filter_isin(df, filters)
+
         if window is not None:
-            signals_init = pd_desc['signals_init']
-            compress_signals_init = pd_desc['compress_signals_init']
-            cols_list = pd_desc['signals']
-            signals = [SignalDesc(event, cols) for cols in cols_list]
+            df, windowing_time = self._window_df(pd_desc, df)
+        else:
+            windowing_time = 0
 
-            with measure_time() as measure:
-                if signals_init and signals:
-                    df = df_window_signals(df, window, signals, compress_init=compress_signals_init)
+        if columns:
+            df = self._select_df_columns(event, df, columns)
+
+        # A projection of a raw dataframe still in memory would only duplicate
+        # its columns, so it is computed again on the next request rather
+        # than cached
+        if not (load_columns and not filters and partition is None and self._cache.is_in_mem(self._make_raw_pd_desc(event))):
+            compute_cost = sanitization_time + windowing_time
+            self._cache.insert(pd_desc, df, compute_cost=compute_cost, write_swap=write_swap)
+        return df
+
+    @staticmethod
+    def _select_df_columns(event, df, columns):
+        """
+        Select the given ``columns`` of the dataframe of ``event``.
+        """
+        missing_cols = set(columns) - set(df.columns)
+        if missing_cols:
+            raise ValueError('Cannot select non-existing columns of {} dataframe: {}'.format(
+                event,
+                ', '.join(sorted(missing_cols)),
+            ))
+        return df[[col for col in df.columns if col in columns]]
+
+    _WINDOW_PD_DESC_KEYS = {'window', 'signals', 'signals_init', 'compress_signals_init'}
+    """
+    Keys of the :class:`PandasDataDesc` specification describing a window.
+    """
+
+    @staticmethod
+    def _window_df(pd_desc, df):
+        """
+        Apply the window described by ``pd_desc`` to ``df``.
+
+        :returns: A tuple of the windowed dataframe and the time it took to
+            compute it.
+        """
+        window = pd_desc['window']
+        signals_init = pd_desc['signals_init']
+        compress_signals_init = pd_desc['compress_signals_init']
+        cols_list = pd_desc['signals']
+        signals = [SignalDesc(pd_desc['event'], cols) for cols in cols_list]
+
+        with measure_time() as measure:
+            if signals_init and signals:
+                df = df_window_signals(df, window, signals, compress_init=compress_signals_init)
+            else:
+                df = df_window(df, window, method='pre')
+
+        return (df, measure.exclusive_delta)
+
+    def _load_df_window(self, pd_desc, sanitization_f=None, write_swap=None):
+        """
+        Load a windowed dataframe by slicing the dataframe of the whole trace.
+
+        The dataframe of the whole trace is cached like any other, so that
+        asking for different windows only costs a lookup in its index.
+        """
+        if self._is_partitioned(pd_desc['event']):
+            return self._load_df_window_partitioned(pd_desc, sanitization_f=sanitization_f, write_swap=write_swap)
+
+        spec = {
+            key: val
+            for key, val in pd_desc.items()
+            if key not in self._WINDOW_PD_DESC_KEYS
+        }
+        full_pd_desc = PandasDataDesc(spec=spec)
+        try:
+            df = self._cache.fetch(full_pd_desc, insert=True)
+        except KeyError:
+            df = self._load_df(full_pd_desc, sanitization_f=sanitization_f, write_swap=write_swap)
+
+        # The initial value of signals is found with a few lookups in the
+        # signal indices, so windowed dataframes are cheaper to recompute than
+        # to store, like plain slices.
+        if pd_desc['signals_init'] and pd_desc['signals'] and pd_desc['window'][0] is not None:
+            return self._window_df_signals(full_pd_desc, df, pd_desc, write_swap=write_swap)
+        else:
+            df, windowing_time = self._window_df(pd_desc, df)
+            return df
+
+    def _window_df_signals(self, pd_desc, df, window_pd_desc, write_swap=None):
+        """
+        Same as :meth:`_window_df` for windows with the initial value of
+        signals, using the signal indices given by :meth:`_load_signal_index`.
+
+        The row giving the initial value of each signal is located with
+        :func:`numpy.searchsorted`, instead of splitting the whole dataframe
+        in signals for each window.
+
+        :param pd_desc: Descriptor of ``df``.
+        :type pd_desc: PandasDataDesc
+
+        :param window_pd_desc: Descriptor of the windowed dataframe.
+        :type window_pd_desc: PandasDataDesc
+        """
+        window = window_pd_desc['window']
+        start = window[0]
+        nr_rows = len(df)
+
+        def get_signals_init():
+            index = df.index
+            # Number of rows before the start of the window, and up to the
+            # start included
+            before = index.searchsorted(start, side='left')
+            until = index.searchsorted(start, side='right')
+
+            def get_positions(cols):
+                if cols:
+                    key = self._load_signal_index(pd_desc, df, cols, write_swap=write_swap)
                 else:
-                    df = df_window(df, window, method='pre')
+                    # A single signal spanning the whole dataframe
+                    key = np.arange(nr_rows, dtype=np.int64)
+
+                if not len(key):
+                    return key
+
+                signal = np.arange(key[-1] // nr_rows + 1)
+                # First row of each signal at the start of the window if
+                # there is one, otherwise the last row before it
+                loc = np.searchsorted(key, signal * nr_rows + before)
+                at_start = key[np.minimum(loc, len(key) - 1)]
+                prev = key[np.maximum(loc - 1, 0)]
+                positions = np.where(
+                    (loc < len(key)) & (at_start // nr_rows == signal) & (at_start % nr_rows < until),
+                    at_start,
+                    np.where(
+                        (loc > 0) & (prev // nr_rows == signal),
+                        prev,
+                        -1,
+                    ),
+                )
+                return positions[positions >= 0] % nr_rows
+
+            positions = np.concatenate([
+                get_positions(cols)
+                for cols in window_pd_desc['signals']
+            ])
+            return [df.iloc[positions]] if len(positions) else []
+
+        return _df_window_signals(
+            df,
+            window,
+            get_signals_init,
+            compress_init=window_pd_desc['compress_signals_init'],
+            clip_window=True,
+        )
+
+    def _load_signal_index(self, pd_desc, df, cols, write_swap=None):
+        """
+        Index of the rows of each signal of ``df``.
+
+        :param pd_desc: Descriptor of ``df``.
+        :type pd_desc: PandasDataDesc
+
+        :param cols: Columns identifying the signals.
+        :type cols: list(str)
+
+        :returns: A sorted :class:`numpy.ndarray` of ``signal * len(df) +
+            position`` for each row with a non-null value in ``cols``, where
+            ``signal`` is the number of the signal of that row.
+        """
+        index_pd_desc = PandasDataDesc(spec={
+            **pd_desc,
+            'signal_index': cols,
+        })
+        try:
+            return self._cache.fetch(index_pd_desc, insert=True)['key'].values
+        except KeyError:
+            pass
+
+        with measure_time() as measure:
+            # Signals are numbered in the order df_split_signals() yields
+            # them, and rows with null values are not part of any signal
+            signal = df.groupby(cols, observed=True).ngroup()
+            position = np.flatnonzero(signal.notna().values)
+            key = signal.values[position].astype(np.int64) * len(df) + position
+            key.sort()
+
+        self._cache.insert(
+            index_pd_desc,
+            pd.DataFrame({'key': key}),
+            compute_cost=measure.exclusive_delta,
+            write_swap=write_swap,
+        )
+        return key
+
+    def _is_partitioned(self, event):
+        """
+        Whether the dataframes of ``event`` are split in partitions, see the
+        ``partition_duration`` parameter.
+        """
+        return bool(self._partition_duration) and self._index_has_event(event) is not None
 
-            windowing_time = measure.exclusive_delta
+    @property
+    def _partition_size(self):
+        """
+        Duration of the partitions in :attr:`time_unit`, see the
+        ``partition_duration`` parameter.
+        """
+        duration = self._partition_duration
+        if self.time_unit == 's':
+            return duration
         else:
-            windowing_time = 0
+            return int(round(duration * self.time_scale))
+
+    @property
+    def _nr_partitions(self):
+        return int((self.end - self.start) // self._partition_size) + 1
+
+    def _get_partitions(self, times):
+        """
+        Number of the partition of each of the given timestamps.
+
+        Timestamps outside of the trace belong to the first or last partition.
+
+        :type times: numpy.ndarray
+        """
+        partitions = (np.asarray(times) - self.start) // self._partition_size
+        return np.clip(partitions, 0, self._nr_partitions - 1).astype(np.int64)
+
+    def _get_window_partitions(self, window):
+        """
+        Range of the partitions overlapping with the given window.
+        """
+        def get_partition(time, default):
+            if time is None:
+                return default
+            else:
+                return self._get_partitions(np.array([time]))[0].item()
+
+        first = get_partition(window[0], 0)
+        last = get_partition(window[1], self._nr_partitions - 1)
+        return range(first, max(first, last) + 1)
+
+    def _make_partition_pd_desc(self, pd_desc, partition):
+        """
+        Make the descriptor of a partition of the dataframe described by
+        ``pd_desc``.
+        """
+        return PandasDataDesc(spec={
+            **pd_desc,
+            'partition': int(partition),
+            'partition_duration': self._partition_duration,
+        })
+
+    @staticmethod
+    def _concat_partitions(dfs):
+        """
+        Concatenate the dataframes of consecutive partitions.
+
+        ``None`` items are ignored. Categorical columns are kept as such even
+        if the categories differ between partitions.
+        """
+        dfs = [df for df in dfs if df is not None]
+        if len(dfs) == 1:
+            return dfs[0]
+
+        df = pd.concat(dfs)
+        return df.astype({
+            col: 'category'
+            for col, dtype in dfs[0].dtypes.items()
+            if isinstance(dtype, pd.CategoricalDtype) and col in df.columns
+        })
+
+    def _load_df_partition(self, pd_desc, partition, sanitization_f=None, write_swap=None):
+        """
+        Load a partition of the non-windowed dataframe described by
+        ``pd_desc``.
+        """
+        part_pd_desc = self._make_partition_pd_desc(pd_desc, partition)
+        try:
+            return self._cache.fetch(part_pd_desc, insert=True)
+        except KeyError:
+            return self._load_df(part_pd_desc, sanitization_f=sanitization_f, write_swap=write_swap)
+
+    def _load_df_window_partitioned(self, pd_desc, sanitization_f=None, write_swap=None):
+        """
+        Load a windowed dataframe from the partitions of the trace overlapping
+        with the window.
+
+        The rows located before the first partition that can end up in the
+        windowed dataframe are given by :meth:`_load_partition_context`, so the
+        result is the same as slicing the dataframe of the whole trace.
+        """
+        event = pd_desc['event']
+        columns = pd_desc.get('columns')
+        # Columns are selected once the dataframe is windowed, since windowing
+        # needs the signals columns
+        spec = {
+            key: val
+            for key, val in pd_desc.items()
+            if key not in self._WINDOW_PD_DESC_KEYS and key != 'columns'
+        }
+        full_pd_desc = PandasDataDesc(spec=spec)
+        signals = pd_desc['signals'] if pd_desc['signals_init'] else []
+
+        def load(partition):
+            return self._load_df_partition(full_pd_desc, partition, sanitization_f=sanitization_f, write_swap=write_swap)
+
+        partitions = self._get_window_partitions(pd_desc['window'])
+        context = self._load_partition_context(full_pd_desc, signals, partitions.start, sanitization_f=sanitization_f, write_swap=write_swap)
+        df = self._concat_partitions([context] + list(map(load, partitions)))
+
+        # A window located before the first row gives that row, so look for
+        # it in the next partitions
+        if df.empty:
+            for partition in range(partitions.stop, self._nr_partitions):
+                next_df = load(partition)
+                if not next_df.empty:
+                    df = next_df.iloc[:1]
+                    break
+
+        df, windowing_time = self._window_df(pd_desc, df)
+        if columns:
+            df = self._select_df_columns(event, df, columns)
+
+        if pd_desc['signals_init'] and pd_desc['signals']:
+            self._cache.insert(pd_desc, df, compute_cost=windowing_time, write_swap=False)
+
+        return df
+
+    _PARTITION_CONTEXT_INTERVAL = 8
+    """
+    Number of partitions between two contexts recorded in the cache by
+    :meth:`_load_partition_context`, on top of the ones that are asked for.
+    """
+
+    def _load_partition_context(self, pd_desc, signals, partition, sanitization_f=None, write_swap=None):
+        """
+        Load the rows of the dataframe described by ``pd_desc`` located before
+        the given partition that are needed to window it from that partition
+        onward: the last row, and the last row of each signal.
+
+        The context of a partition is computed from the context of an earlier
+        partition, so the whole trace is only scanned once.
+
+        :param signals: Columns of each signal, as in the ``signals`` key of
+            the descriptor of windowed dataframes.
+        :type signals: list(list(str))
+
+        :returns: A dataframe, or ``None`` for the first partition.
+        """
+        if not partition:
+            return None
+
+        def make_pd_desc(partition):
+            return PandasDataDesc(spec={
+                **pd_desc,
+                'partition_context': partition,
+                'partition_duration': self._partition_duration,
+                'signals': signals,
+            })
+
+        interval = self._PARTITION_CONTEXT_INTERVAL
+        start = 0
+        context = None
+        for candidate in dict.fromkeys([partition, *range(partition // interval * interval, 0, -interval)]):
+            try:
+                context = self._cache.fetch(make_pd_desc(candidate), insert=True)
+            except KeyError:
+                continue
+            else:
+                start = candidate
+                break
+
+        # Computing a context requires loading all the partitions since the
+        # previous one
+        begin = time.monotonic()
+        for part in range(start, partition):
+            df = self._load_df_partition(pd_desc, part, sanitization_f=sanitization_f, write_swap=write_swap)
+            context = self._concat_partitions([context, df])
+            # Like iter_df_events(), only keep one partition at a time in
+            # memory
+            del df
+            self._cache.evict(self._make_partition_pd_desc(pd_desc, part))
+            # Signals without columns only need the last row
+            positions = [np.arange(max(len(context) - 1, 0), len(context))] + [
+                np.flatnonzero(~context.duplicated(subset=cols, keep='last'))
+                for cols in signals
+                if cols
+            ]
+            context = context.iloc[np.unique(np.concatenate(positions))]
+
+            if part + 1 == partition or not (part + 1) % interval:
+                self._cache.insert(
+                    make_pd_desc(part + 1),
+                    context,
+                    compute_cost=time.monotonic() - begin,
+                    write_swap=write_swap,
+                )
+
+        return context
+
+    def _load_raw_partitions(self, event, partitions):
+        """
+        Load the given partitions of the raw dataframe of an event.
+
+        :returns: A mapping of partition numbers to dataframes.
+        """
+        def make_pd_desc(partition):
+            return self._make_partition_pd_desc(self._make_raw_pd_desc(event), partition)
+
+        df_map = {}
+        for partition in partitions:
+            try:
+                df_map[partition] = self._cache.fetch(make_pd_desc(partition), insert=True)
+            except KeyError:
+                pass
+
+        missing = sorted(set(partitions) - df_map.keys())
+        if missing:
+            with measure_time() as measure:
+                parsed = self._parse_raw_partitions(event, range(missing[0], missing[-1] + 1))
+
+            for partition, df in parsed.items():
+                pd_desc = make_pd_desc(partition)
+                self._cache.record_stat(pd_desc, 'parse_time', measure.exclusive_delta / len(parsed))
+                # Always write the partitions to the swap, like any other raw
+                # dataframe
+                self._cache.insert(pd_desc, df, write_swap=True, force_write_swap=True)
+
+            df_map.update(
+                (partition, parsed[partition])
+                for partition in missing
+            )
+
+        return df_map
+
+    def _parse_raw_partitions(self, event, partitions):
+        """
+        Parse the raw dataframe of an event in the given range of partitions.
+
+        Only the lines in these partitions are parsed, using the trace index.
+
+        :returns: A mapping of partition numbers to dataframes.
+        """
+        has_event = self._index_has_event(event)
+        if has_event is None:
+            raise ValueError('Event "{}" cannot be looked up in the trace index, so it cannot be partitioned'.format(event))
+        elif has_event:
+            index = self._index
+            df = self._parse_raw_events_indexed([event], index, partitions=partitions).get(event)
+            # The columns are still needed if no line is in these partitions
+            if df is None:
+                df = self._parse_raw_events_indexed([event], index, nr_lines=1)[event].iloc[0:0]
+            df = _apply_event_dtypes(event, df)
+        else:
+            raise MissingTraceEventError(
+                TraceEventChecker(event),
+                available_events=self.available_events,
+            )
+
+        # Like for windowing, the index is assumed to be sorted. Partitions
+        # are copied so that they do not keep the dataframe of all the
+        # partitions alive once it has been split.
+        df_partitions = self._get_partitions(df.index.values)
+        partitions = np.array(partitions, dtype=np.int64)
+        starts = np.searchsorted(df_partitions, partitions, side='left')
+        ends = np.searchsorted(df_partitions, partitions, side='right')
+        return {
+            partition: df.iloc[start:end].copy()
+            for partition, start, end in zip(partitions.tolist(), starts.tolist(), ends.tolist())
+        }
+
+    def _load_raw_df_projected(self, event, columns):
+        """
+        Load the raw dataframe of an event, with at least the given
+        ``columns``.
+
+        Only these columns are read if the dataframe is in the swap area,
+        otherwise the full dataframe is loaded.
+        """
+        pd_desc = self._make_raw_pd_desc(event)
+        try:
+            return self._cache.fetch(pd_desc, insert=False, columns=columns)
+        except KeyError:
+            return self._load_raw_df_map([event], write_swap=True)[event]
+
+    def _load_raw_df_filtered(self, event, filters, raw, columns=None):
+        """
+        Load the raw dataframe of an event, with the rows matching ``filters``.
+
+        The filters are applied while reading the swap area or while parsing
+        the trace, so the unfiltered dataframe is not loaded unless it is
+        already in memory.
+
+        :param raw: If ``False``, the dataframe will be sanitized, so only the
+            filters on fields that are never modified by sanitization are
+            applied.
+        :type raw: bool
+
+        :param columns: Columns to read from the swap area, or ``None`` to
+            read all of them.
+        :type columns: set(str) or None
+        """
+        if not raw:
+            filters = {
+                col: values
+                for col, values in filters.items()
+                if col in trappy.FTrace.filterable_fields
+            }
+
+        pd_desc = self._make_raw_pd_desc(event)
+        try:
+            return self._cache.fetch(pd_desc, insert=False, filters=filters, columns=columns)
+        except KeyError:
+            pass
 
-        compute_cost = sanitization_time + windowing_time
-        self._cache.insert(pd_desc, df, compute_cost=compute_cost, write_swap=write_swap)
-        return df
+        with measure_time() as measure:
+            df_map = self._parse_raw_events([event], filters=filters)
+        self._cache.record_stat(pd_desc, 'parse_time', measure.exclusive_delta)
+        try:
+            return df_map[event]
+        # The parsers do not give any dataframe when no line matched, so fall
+        # back on the full dataframe to get an empty one with the right
+        # columns, or an exception if the event is missing.
+        except KeyError:
+            df = self._load_raw_df_map([event], write_swap=True)[event]
+            return df_filter_isin(df, {
+                col: values
+                for col, values in filters.items()
+                if col in df.columns
+            })
 
     def _load_raw_df_map(self, events, write_swap, allow_missing_events=False):
         insert_kwargs = dict(
@@ -1860,10 +4866,13 @@ class Trace(Loggable, TraceBase):
 
         # Load the remaining events from the trace directly
         events_to_load = sorted(set(events) - from_cache.keys())
-        from_trace = self._parse_raw_events(events_to_load)
+        with measure_time() as measure:
+            from_trace = self._parse_raw_events(events_to_load)
 
         for event, df in from_trace.items():
             pd_desc = self._make_raw_pd_desc(event)
+            # Events are parsed together, so split the time evenly
+            self._cache.record_stat(pd_desc, 'parse_time', measure.exclusive_delta / len(from_trace))
             self._cache.insert(pd_desc, df, **insert_kwargs)
 
         df_map = {**from_cache, **from_trace}
@@ -1879,8 +4888,8 @@ class Trace(Loggable, TraceBase):
 
         return df_map
 
-    def _parse_raw_events_df(self, events):
-        internal_trace = self._get_trace(events)
+    def _parse_raw_events_df(self, events, filters=None):
+        internal_trace = self._get_trace(events, filters=filters)
 
         mapping = {}
         for event in events:
@@ -1899,6 +4908,7 @@ class Trace(Loggable, TraceBase):
                 if df.empty:
                     continue
                 else:
+                    df.index = self._get_internal_time(internal_trace, df.index)
                     if self.normalize_time:
                         df.index -= self.basetime
 
@@ -1906,54 +4916,388 @@ class Trace(Loggable, TraceBase):
 
         return mapping
 
-    def _parse_raw_events(self, events):
-        if not events:
+    # Minimum size of the chunks of a text trace parsed in parallel, when the
+    # number of jobs is chosen automatically
+    _PARSE_CHUNK_MIN_SIZE = 32 * 1024 * 1024
+
+    def _is_text_ftrace(self):
+        path = self.trace_path
+        # trappy.FTrace would use a .dat file lying next to a text trace
+        return (
+            self._get_trace_format() == 'FTrace' and
+            os.path.splitext(path)[1] != '.dat' and
+            not os.path.isfile(os.path.splitext(path)[0] + '.dat')
+        )
+
+    def _get_parse_jobs(self, size=None):
+        """
+        Number of processes to use to work on ``size`` bytes of the trace.
+        """
+        nr_jobs = self._parse_jobs
+        if nr_jobs is None:
+            if size is None:
+                size = os.stat(self.trace_path).st_size
+            nr_jobs = min(
+                os.cpu_count() or 1,
+                size // self._PARSE_CHUNK_MIN_SIZE,
+            )
+
+        return max(nr_jobs, 1)
+
+    @property
+    def _index(self):
+        """
+        :class:`_FTraceIndex` of the trace, or ``None`` if the trace format
+        cannot be indexed.
+
+        The index is stored in the swap area, so it only needs to be built
+        once.
+        """
+        return self._get_index()
+
+    def _get_index(self, build=True):
+        """
+        Get the :class:`_FTraceIndex` of the trace.
+
+        :param build: If ``False``, the index is only returned if it was
+            already built, possibly by another :class:`Trace` sharing the swap
+            area. Otherwise, it is built if necessary.
+        :type build: bool
+
+        :returns: The index, or ``None`` if the trace format cannot be
+            indexed or if the index is not available.
+        """
+        try:
+            return self._trace_index
+        except AttributeError:
+            pass
+
+        if self._is_text_ftrace():
+            index = self._read_index()
+            if index is None:
+                if not build:
+                    return None
+                index = self._build_index()
+        else:
+            index = None
+
+        self._trace_index = index
+        return index
+
+    def _get_lazy_index(self):
+        """
+        Same as :meth:`_get_index`, but the index is only built when it can be
+        stored in the swap area for later use. Otherwise, the trace is simply
+        parsed.
+        """
+        return self._get_index(build=bool(self._cache.swap_dir))
+
+    def _get_index_path(self):
+        swap_dir = self._cache.swap_dir
+        if swap_dir:
+            return os.path.join(swap_dir, TraceCache.TRACE_INDEX_FILENAME)
+        else:
+            return None
+
+    def _write_index(self, index):
+        path = self._get_index_path()
+        if path:
+            try:
+                index.to_path(path)
+            except OSError as e:
+                self.get_logger().debug('Could not write trace index: {}'.format(e))
+
+    def _read_index(self):
+        path = self._get_index_path()
+        if path:
+            try:
+                index = _FTraceIndex.from_path(path)
+            except (OSError, ValueError, KeyError):
+                pass
+            else:
+                if index.trace_id == self._cache.trace_id:
+                    return index
+
+        return None
+
+    def _build_index(self):
+        # The fingerprint is only needed to validate the index stored in the
+        # swap
+        trace_id = self._cache.trace_id if self._get_index_path() else None
+        self.get_logger().debug('Indexing trace events of {}'.format(self.trace_path))
+        index = _FTraceIndex.from_trace(
+            self.trace_path,
+            trace_id=trace_id,
+            nr_jobs=self._get_parse_jobs(),
+        )
+        self._write_index(index)
+        return index
+
+    @staticmethod
+    def _get_unique_word(event):
+        """
+        Unique word used by :class:`trappy.ftrace.FTrace` to find the lines of
+        the given event.
+        """
+        ftrace_cls = trappy.FTrace
+        all_scopes = [ftrace_cls.thermal_classes, ftrace_cls.sched_classes,
+                      ftrace_cls.dynamic_classes]
+        known_events = {k: v for sc in all_scopes for k, v in sc.items()}
+
+        for cls in known_events.values():
+            if (event == cls.unique_word) or \
+               (event + ':' == cls.unique_word) or \
+               (event == cls.name):
+                return cls.unique_word
+
+        return event + ':'
+
+    def _index_has_event(self, event):
+        """
+        Check with the trace index whether the event is present.
+
+        :returns: ``None`` if the index cannot tell.
+        """
+        index = self._index
+        if index is None:
+            return None
+
+        try:
+            return bool(index.count(self._get_unique_word(event)))
+        except ValueError:
+            return None
+
+    def _parse_raw_events_indexed(self, events, index, filters=None, since_offset=0, partitions=None, nr_lines=None):
+        """
+        Parse the events by only reading the lines that the index selected for
+        them, possibly in parallel.
+
+        :param filters: Forwarded to :class:`trappy.ftrace.FTrace`.
+        :type filters: dict or None
+
+        :param since_offset: Only parse the lines starting from that offset in
+            the file onward.
+        :type since_offset: int
+
+        :param partitions: Only parse the lines in that range of partitions,
+            see the ``partition_duration`` parameter.
+        :type partitions: range or None
+
+        :param nr_lines: Only parse that number of lines, among the first
+            ones.
+        :type nr_lines: int or None
+        """
+        path = self.trace_path
+        events = sorted(self._get_parsable_events(events))
+        positions = index.select(map(self._get_unique_word, events))
+        times = index.get_times() if self.time_unit == 's' else index.times_ns
+        if since_offset:
+            positions = positions[index.offsets[positions] >= since_offset]
+        if partitions is not None:
+            # Compute the timestamps exactly like the index of the dataframes
+            lines_times = times[positions]
+            if self.normalize_time:
+                lines_times = lines_times - self.basetime
+            lines_partitions = self._get_partitions(lines_times)
+            positions = positions[
+                (lines_partitions >= partitions.start) &
+                (lines_partitions < partitions.stop)
+            ]
+        if nr_lines is not None:
+            positions = positions[:nr_lines]
+        if not len(positions):
             return {}
 
-        def chunk_list(l, nr_chunks):
-            l_len = len(l)
-            n = l_len // nr_chunks
-            if not n:
-                return l
+        # Estimate the amount of data to parse, assuming all the lines have
+        # the same size
+        size = os.stat(path).st_size * len(positions) // len(index.offsets)
+        nr_jobs = min(self._get_parse_jobs(size), len(positions))
+        chunks = np.array_split(positions, nr_jobs)
+
+        args = [
+            (path, events, index.offsets[chunk], filters)
+            for chunk in chunks
+        ]
+        if nr_jobs > 1:
+            with multiprocessing.Pool(processes=nr_jobs) as pool:
+                df_maps = pool.map(_parse_ftrace_lines, args, chunksize=1)
+        else:
+            df_maps = [_parse_ftrace_lines(args[0])]
+
+        # Only a subset of the lines have been parsed, so the timestamps and
+        # line numbers are restored from the index
+        lines = index.get_lines(path, index.offsets[positions])
+        chunks_lines = np.array_split(lines, nr_jobs)
+        df_lists = {}
+        for chunk, chunk_lines, df_map in zip(chunks, chunks_lines, df_maps):
+            for event, df in df_map.items():
+                chunk_positions = df['__line'].values
+                df.index = pd.Index(times[chunk[chunk_positions]], name=df.index.name)
+                df['__line'] = chunk_lines[chunk_positions]
+                df_lists.setdefault(event, []).append(df)
+
+        df_map = {}
+        for event, dfs in df_lists.items():
+            df = pd.concat(dfs, copy=False) if len(dfs) > 1 else dfs[0]
+            if self.normalize_time:
+                df.index -= self.basetime
+            df_map[event] = df
+
+        return df_map
+
+    def _parse_raw_events_chunks(self, events, nr_jobs, filters=None):
+        """
+        Parse the events in parallel, each process working on a range of
+        bytes of the text trace.
+
+        This is used when the trace has not been indexed.
+
+        :param filters: Forwarded to :class:`trappy.ftrace.FTrace`.
+        :type filters: dict or None
+        """
+        path = self.trace_path
+        events = sorted(self._get_parsable_events(events))
+        byte_ranges = _FTraceChunk.split(path, nr_jobs)
+
+        with multiprocessing.Pool(processes=len(byte_ranges)) as pool:
+            chunks = pool.map(
+                _parse_ftrace_chunk,
+                [
+                    (path, events, byte_range, 0, filters)
+                    for byte_range in byte_ranges
+                ],
+                chunksize=1,
+            )
+
+        # Stitch the chunks together, as if the whole file was parsed at once
+        df_lists = {}
+        line_offset = 0
+        started = False
+        prev_endtime = 0
+        basetime = 0
+        for byte_range, chunk in zip(byte_ranges, chunks):
+            df_map, nr_lines, nr_trace_lines, chunk_basetime, endtime = chunk
+
+            # Chunks with no event do not affect timestamps
+            if nr_trace_lines:
+                # Timestamps are made unique relatively to the previous event.
+                # Each chunk was parsed independently, so that has to be fixed
+                # up if the chunk starts before the end of the previous chunk.
+                # Otherwise, the bump from the previous chunk cannot propagate
+                # to this one since its timestamps are already strictly
+                # increasing.
+                if started and chunk_basetime <= prev_endtime:
+                    chunk = _FTraceChunk.parse(path, events, byte_range, initial_timestamp=prev_endtime, filters=filters)
+                    df_map, nr_lines, nr_trace_lines, chunk_basetime, endtime = chunk
+
+                prev_endtime = endtime
+
+            # Lines that are not part of the trace are only skipped at the
+            # beginning of the file, so they need to be accounted for in
+            # the line numbers once the trace started
+            if started:
+                chunk_offset = line_offset + nr_lines - nr_trace_lines
+                line_offset += nr_lines
             else:
-                return [
-                    l[i:i + n]
-                    for i in range(0, l_len, n)
-                ]
-
-        nr_processes = os.cpu_count()
-        parallel_parse = len(events) > 2
-        # Parallel parsing with Trappy just slows things down at the moment so
-        # disable it until we can experiment with other parsers which might
-        # exhibit different behaviors
-        parallel_parse = False
-        if parallel_parse:
-            chunked_events = chunk_list(events, nr_processes)
-            df_map = {}
-            with multiprocessing.Pool(processes=nr_processes) as pool:
-                for df_map_ in pool.map(self._parse_raw_events_df, chunked_events):
-                    df_map.update({
-                        event: df
-                        for event, df in df_map_.items()
-                    })
+                chunk_offset = line_offset
+                line_offset += nr_trace_lines
+                if nr_trace_lines:
+                    started = True
+                    basetime = chunk_basetime
+
+            for event, df in df_map.items():
+                df['__line'] += chunk_offset
+                df_lists.setdefault(event, []).append(df)
+
+        self._get_time_range(
+            basetime=self._to_time_unit(basetime),
+            endtime=self._to_time_unit(prev_endtime),
+        )
+
+        df_map = {}
+        for event, dfs in df_lists.items():
+            df = pd.concat(dfs, copy=False) if len(dfs) > 1 else dfs[0]
+            df.index = self._to_time_unit(df.index)
+            if self.normalize_time:
+                df.index -= self.basetime
+            df_map[event] = df
+
+        return df_map
+
+    def _parse_raw_events(self, events, filters=None):
+        """
+        Parse the raw dataframes of the given events.
+
+        :param filters: Only keep the rows where the columns contain one of the
+            given values, as a dict of ``{"column": [value, ...]}``. Filters on
+            the ``__cpu``, ``__pid`` and ``__comm`` fields are applied by the
+            parser when possible, so the lines of other CPUs or tasks are not
+            even parsed. Filters on columns that do not exist are ignored.
+        :type filters: dict(str, list(object)) or None
+        """
+        if not events:
+            return {}
+
+        if filters:
+            parser_filters = {
+                col: values
+                for col, values in filters.items()
+                if col in trappy.FTrace.filterable_fields
+            } or None
+        else:
+            parser_filters = None
+
+        index = self._get_lazy_index()
+        # Some unique words cannot be looked up in the index
+        if index is not None and all(
+            self._index_has_event(event) is not None
+            for event in events
+        ):
+            df_map = self._parse_raw_events_indexed(events, index, filters=parser_filters)
+        elif self._is_text_ftrace() and self._get_parse_jobs() > 1:
+            df_map = self._parse_raw_events_chunks(events, self._get_parse_jobs(), filters=parser_filters)
         else:
-            df_map = self._parse_raw_events_df(events)
+            df_map = self._parse_raw_events_df(events, filters=parser_filters)
 
-        # remember the events that we tried to parse and that turned out to not be available
-        self._parsed_events.update({
-            event: not df.empty
+        df_map = {
+            event: _apply_event_dtypes(event, df)
             for event, df in df_map.items()
-            # Only update the state if the event was not there, since it could
-            # have been made available by a sanitization function
-            if event not in self._parsed_events
-        })
+        }
 
-        # If for one reason or another we end up not having a dataframe at all
-        self._parsed_events.update({
-            event: False
-            for event in (set(events) - df_map.keys())
-            if event not in self._parsed_events
-        })
+        if filters:
+            # Not all the parsers can filter the events
+            df_map = {
+                event: df_filter_isin(df, {
+                    col: values
+                    for col, values in filters.items()
+                    if col in df.columns
+                })
+                for event, df in df_map.items()
+            }
+
+            # A filtered dataframe can be empty even though the event is in
+            # the trace, so only the events that were found are recorded
+            self._parsed_events.update({
+                event: True
+                for event, df in df_map.items()
+                if not df.empty
+            })
+        else:
+            # remember the events that we tried to parse and that turned out to not be available
+            self._parsed_events.update({
+                event: not df.empty
+                for event, df in df_map.items()
+                # Only update the state if the event was not there, since it could
+                # have been made available by a sanitization function
+                if event not in self._parsed_events
+            })
+
+            # If for one reason or another we end up not having a dataframe at all
+            self._parsed_events.update({
+                event: False
+                for event in (set(events) - df_map.keys())
+                if event not in self._parsed_events
+            })
 
         self._cache.update_metadata({
             'parsed-events': self._parsed_events,
@@ -1961,103 +5305,278 @@ class Trace(Loggable, TraceBase):
 
         return df_map
 
-    @memoized
-    def _get_task_maps(self):
-        """
-        Give the mapping from PID to task names, and the opposite.
-
-        The names or PIDs are listed in appearance order.
-        """
-
-
-        # Keep only the values, in appearance order according to the timestamp
-        # index
-        def finalize(df, key_col, value_col, key_type, value_type):
-            # Aggregate the values for each key and convert to python types
-            mapping = {}
-            grouped = df.groupby([key_col])
-            for key, index in grouped.groups.items():
-                values = df.loc[index][value_col].apply(value_type)
-                values = list(values)
-                key = key_type(key)
-                mapping[key] = values
-
-            return mapping
-
-        mapping_df_list = []
-        def _load(event, name_col, pid_col):
-            df = self.df_events(event)
-
-            # Get a Time column
-            df = df.reset_index()
-            grouped = df.groupby([name_col, pid_col])
-
-            # Get timestamp of first occurrences of each key/value combinations
-            mapping_df = grouped.first()
-            mapping_df = mapping_df[['Time']]
-            mapping_df.rename_axis(index={name_col: 'name', pid_col: 'pid'}, inplace=True)
-            mapping_df_list.append(mapping_df)
-
-        def load(event, *args, **kwargs):
-            # All events have a __comm and __pid columns, so use it as well
-            _load(event, '__comm', '__pid')
-            _load(event, *args, **kwargs)
-
-        # Import here to avoid circular dependency
-        from lisa.analysis.load_tracking import LoadTrackingAnalysis
-        # All events with a "comm" and "pid" column
-        events = {
-            'sched_wakeup',
-            'sched_wakeup_new',
-            *LoadTrackingAnalysis._SCHED_PELT_SE_NAMES,
+    def refresh(self):
+        """
+        Parse the lines appended to the trace file since it was loaded.
+
+        This allows following a trace that is still being written, e.g. by a
+        ``cat trace_pipe > trace.txt`` running on the side. Only the new lines
+        are indexed and parsed, and the raw dataframes already loaded are
+        extended with their events. The other data computed from the trace,
+        such as sanitized dataframes or analysis results, are discarded from
+        the cache and the swap area if they could depend on the new lines,
+        i.e. unless they are about a window ending before the previous end of
+        the trace, like the results of analysis run on a :class:`TraceView`.
+
+        :returns: ``True`` if new lines were found, ``False`` otherwise.
+
+        :raises ValueError: If the trace is not a text trace, or if the file
+            was truncated.
+
+        .. note:: A line that is still being written is left for the next
+            call, since only the content up to the last newline is parsed.
+
+        .. note:: If the trace was not indexed yet, e.g. because it was parsed
+            without a swap area, the part of the file that was parsed is
+            unknown so the raw dataframes already loaded are parsed again
+            entirely.
+        """
+        if not self._is_text_ftrace():
+            raise ValueError('Only text traces can be refreshed: {}'.format(self.trace_path))
+
+        path = self.trace_path
+        index = self._get_index(build=False)
+        if index is None:
+            # Nothing is known to be indexed, so the whole file is indexed as
+            # if it had been appended
+            index = _FTraceIndex.empty()
+        size = os.stat(path).st_size
+        if size < index.size:
+            raise ValueError('Trace file was truncated: {}'.format(path))
+        elif size == index.size:
+            return False
+
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = mm.rfind(b'\n', index.size) + 1
+        if not end:
+            return False
+
+        # Raw dataframes that can be extended with the new events, all the
+        # rest will be discarded
+        old_df_map = {}
+        for event, available in sorted(self._parsed_events.items()):
+            if available and self._index_has_event(event) is not None:
+                try:
+                    old_df_map[event] = self._cache.fetch(
+                        self._make_raw_pd_desc(event),
+                        insert=False,
+                    )
+                except KeyError:
+                    pass
+
+        old_end = self.end
+        self._cache.refresh_trace_id()
+        trace_id = self._cache.trace_id if self._cache.swap_dir else None
+        index, start = index.extend(
+            path,
+            end=end,
+            trace_id=trace_id,
+            nr_jobs=self._get_parse_jobs(end - index.size),
+        )
+        self._trace_index = index
+        self._write_index(index)
+
+        for name in ('basetime', 'endtime', 'cpus_count', 'task_ids', 'task_registry'):
+            getattr(Trace, name).fget.cache_clear_for(self)
+
+        # Events that were not found could be in the new lines
+        self._parsed_events = {
+            event: available
+            for event, available in self._parsed_events.items()
+            if available
         }
-        for event in events:
-            # Test each event independently, to make sure they will be parsed
-            # if necessary
-            if event in self.available_events:
-                load(event, 'comm', 'pid')
-
-        if 'sched_switch' in self.available_events:
-            load('sched_switch', 'prev_comm', 'prev_pid')
-            load('sched_switch', 'next_comm', 'next_pid')
-
-        if not mapping_df_list:
-            raise MissingTraceEventError(sorted(events) + ['sched_switch'], available_events=self.available_events)
-
-        df = pd.concat(mapping_df_list)
-        # Sort by order of appearance
-        df.sort_values(by=['Time'], inplace=True)
-        # Remove duplicated name/pid mapping and only keep the first appearance
-        df = df.loc[~df.index.duplicated(keep='first')]
-        # explode the multindex into a "key" and "value" columns
-        df.reset_index(inplace=True)
-
-        forbidden_names = {
-            # <idle> is invented by trace-cmd, no event field contain this
-            # value, so it's useless (and actually harmful, since it will
-            # introduce a task that cannot be found in that trace)
-            '<idle>',
-            # This name appears when trace-cmd could not resolve the task name.
-            # Ignore it since it's not a valid name, and we probably managed
-            # to resolve it by looking at more events anyway.
-            '<...>',
-            # sched entity PELT events for task groups will get a comm="(null)"
-            '(null)',
+        metadata = {
+            'parsed-events': self._parsed_events,
         }
-        df = df[~df['name'].isin(forbidden_names)]
+        for time_unit, basetime, endtime in (
+            ('s', index.basetime, index.endtime),
+            ('ns', index.basetime_ns, index.endtime_ns),
+        ):
+            basetime_key, endtime_key = self._get_time_range_keys(time_unit)
+            metadata[basetime_key] = basetime
+            metadata[endtime_key] = endtime
+        self._cache.update_metadata(metadata)
+
+        new_df_map = self._parse_raw_events_indexed(
+            old_df_map.keys(),
+            index,
+            since_offset=start,
+        ) if old_df_map else {}
+
+        def keep(pd_desc_nf):
+            # Data about a window entirely located in the part of the trace
+            # parsed before are still valid
+            window = self._get_pd_desc_window(pd_desc_nf)
+            return window is not None and window[1] is not None and window[1] < old_end
+
+        self._cache.discard_all(keep=keep)
+        if old_df_map:
+            first_line = index.get_lines(path, [start])[0]
+        for event, df in old_df_map.items():
+            # The last line is parsed again if it was incomplete
+            df = df[df['__line'] < first_line]
+            try:
+                new_df = new_df_map[event]
+            except KeyError:
+                pass
+            else:
+                # Missing fields in an incomplete line could have turned
+                # integer columns into floats
+                df = df.astype({
+                    col: np.int64
+                    for col, dtype in new_df.dtypes.items()
+                    if (
+                        col in df.columns and
+                        dtype.kind in 'iu' and
+                        df[col].dtype.kind == 'f' and
+                        not df[col].isna().any()
+                    )
+                })
+                df = pd.concat([df, new_df])
+
+            df = _apply_event_dtypes(event, df)
+            self._cache.insert(
+                self._make_raw_pd_desc(event),
+                df,
+                write_swap=True,
+                force_write_swap=True,
+            )
+
+        return True
+
+    @staticmethod
+    def _get_pd_desc_window(pd_desc_nf):
+        """
+        Window of the trace the data described by ``pd_desc_nf`` depends on,
+        or ``None`` if it can depend on the whole trace.
+
+        That is either the ``window`` of a windowed dataframe, or the
+        :attr:`TraceBase.trace_window` of the :class:`TraceView` an analysis
+        was run on.
+        """
+        for key in ('window', 'trace_window'):
+            window = pd_desc_nf.get(key)
+            if window is not None:
+                return window
+
+        return None
+
+    def cache_stats(self):
+        """
+        Statistics of the dataframe cache of the trace, with one row per
+        dataframe: hits and misses, loads from the swap, memory and swap usage
+        and time spent parsing, computing and using the swap.
+
+        This allows finding out which events or analysis are worth
+        optimizing, e.g.::
+
+            trace.cache_stats().sort_values('compute_time', ascending=False)
+
+        .. seealso:: :meth:`TraceCache.get_stats`
+        """
+        return self._cache.get_stats()
+
+    def _df_task_registry(self):
+        """
+        Dataframe with one row per PID/name pair found in the trace, with the
+        first and last time it was seen, in order of first appearance.
+
+        It is computed in one pass over the events and cached in the swap.
+        """
+        pd_desc = PandasDataDesc(spec=dict(
+            module=__name__,
+            func=Trace._df_task_registry.__qualname__,
+            trace_state=self.trace_state,
+        ))
+        try:
+            return self._cache.fetch(pd_desc, insert=True)
+        except KeyError:
+            pass
 
-        name_to_pid = finalize(df, 'name', 'pid', str, int)
-        pid_to_name = finalize(df, 'pid', 'name', int, str)
+        with measure_time() as measure:
+            df_list = []
+            def load(event, name_col, pid_col):
+                df = self.df_events(event)
+                # All events have a __comm and __pid columns, so use it as well
+                for _name_col, _pid_col in (('__comm', '__pid'), (name_col, pid_col)):
+                    df_list.append(pd.DataFrame(
+                        dict(
+                            Time=df.index.values,
+                            pid=df[_pid_col].values.astype(np.int64),
+                            comm=df[_name_col].values.astype(str).astype(object),
+                        ),
+                        copy=False,
+                    ))
+
+            # Import here to avoid circular dependency
+            from lisa.analysis.load_tracking import LoadTrackingAnalysis
+            # All events with a "comm" and "pid" column
+            events = {
+                'sched_wakeup',
+                'sched_wakeup_new',
+                *LoadTrackingAnalysis._SCHED_PELT_SE_NAMES,
+            }
+            for event in sorted(events):
+                # Test each event independently, to make sure they will be parsed
+                # if necessary
+                if event in self.available_events:
+                    load(event, 'comm', 'pid')
+
+            if 'sched_switch' in self.available_events:
+                load('sched_switch', 'prev_comm', 'prev_pid')
+                load('sched_switch', 'next_comm', 'next_pid')
+
+            if not df_list:
+                raise MissingTraceEventError(sorted(events) + ['sched_switch'], available_events=self.available_events)
+
+            df = pd.concat(df_list, ignore_index=True, copy=False)
+
+            forbidden_names = {
+                # <idle> is invented by trace-cmd, no event field contain this
+                # value, so it's useless (and actually harmful, since it will
+                # introduce a task that cannot be found in that trace)
+                '<idle>',
+                # This name appears when trace-cmd could not resolve the task name.
+                # Ignore it since it's not a valid name, and we probably managed
+                # to resolve it by looking at more events anyway.
+                '<...>',
+                # sched entity PELT events for task groups will get a comm="(null)"
+                '(null)',
+            }
+            df = df[~df['comm'].isin(forbidden_names)]
+
+            df = df.groupby(['pid', 'comm'], sort=False)['Time'].agg(['min', 'max'])
+            df.columns = ['first_seen', 'last_seen']
+            # Sort by order of appearance
+            df = df.sort_values('first_seen', kind='mergesort').reset_index()
+
+        # Always write it to the swap, since recomputing it would require
+        # parsing all the events it is built from
+        self._cache.insert(
+            pd_desc,
+            df,
+            compute_cost=measure.exclusive_delta,
+            write_swap=self._write_swap,
+            force_write_swap=True,
+        )
+        return df
 
-        return (name_to_pid, pid_to_name)
+    @property
+    @memoized
+    def task_registry(self):
+        """
+        :class:`TaskRegistry` of the tasks in the trace.
+        """
+        return TaskRegistry(self._df_task_registry())
 
     @property
     def _task_name_map(self):
-        return self._get_task_maps()[0]
+        return self.task_registry.name_pids
 
     @property
     def _task_pid_map(self):
-        return self._get_task_maps()[1]
+        return self.task_registry.pid_names
 
     def has_events(self, events):
         """
@@ -2104,7 +5623,8 @@ class Trace(Loggable, TraceBase):
         is generated it inherits the parent name and then its name is updated
         to represent what the task really is.
 
-        :param name: task name
+        :param name: task name. Names longer than what the kernel records
+            are matched on their truncated version.
         :type name: str
 
         :param ignore_fork: Hide the PIDs of tasks that initially had ``name``
@@ -2115,15 +5635,18 @@ class Trace(Loggable, TraceBase):
 
         :return: a list of PID for tasks which name matches the required one.
         """
-        pids = self._task_name_map[name]
+        registry = self.task_registry
+        name = registry.resolve_name(name)
+        pids = registry.name_pids[name]
 
         if ignore_fork:
+            pid_names = registry.pid_names
             pids = [
                 pid
                 for pid in pids
                 # Only keep the PID if its last name was the name we are
                 # looking for.
-                if self._task_pid_map[pid][-1] == name
+                if pid_names[pid][-1] == name
             ]
 
         return pids
@@ -2151,7 +5674,7 @@ class Trace(Loggable, TraceBase):
         :return: the name of the task which PID matches the required one,
                  the last time they ran in the current trace
         """
-        return self._task_pid_map[pid]
+        return self.task_registry.get_pid_names(pid)
 
     @deprecate('This function raises exceptions when faced with ambiguity instead of giving the choice to the user',
         deprecated_in='2.0',
@@ -2190,7 +5713,9 @@ class Trace(Loggable, TraceBase):
         Similar to :meth:`get_task_id` but returns a list with all the
         combinations, instead of raising an exception.
 
-        :param task: Either the task name, the task PID, or a tuple ``(pid, comm)``
+        :param task: Either the task name, the task PID, or a tuple ``(pid, comm)``.
+            Names longer than what the kernel records are matched on their
+            truncated version.
         :type task: int or str or tuple(int, str)
 
         :param update: If a partially-filled :class:`TaskID` is passed (one of
@@ -2199,31 +5724,18 @@ class Trace(Loggable, TraceBase):
         :type update: bool
         """
 
-        def comm_to_pid(comm):
-            try:
-                pid_list = self._task_name_map[comm]
-            except IndexError:
-                raise ValueError('trace does not have any task named "{}"'.format(comm))
-
-            return pid_list
-
-        def pid_to_comm(pid):
-            try:
-                comm_list = self._task_pid_map[pid]
-            except IndexError:
-                raise ValueError('trace does not have any task PID {}'.format(pid))
-
-            return comm_list
+        registry = self.task_registry
 
         if isinstance(task, str):
+            comm = registry.resolve_name(task)
             task_ids = [
-                TaskID(pid=pid, comm=task)
-                for pid in comm_to_pid(task)
+                TaskID(pid=pid, comm=comm)
+                for pid in registry.name_pids[comm]
             ]
         elif isinstance(task, Number):
             task_ids = [
                 TaskID(pid=task, comm=comm)
-                for comm in pid_to_comm(task)
+                for comm in registry.get_pid_names(task)
             ]
         else:
             pid, comm = task
@@ -2287,7 +5799,7 @@ class Trace(Loggable, TraceBase):
         """
         return [
             TaskID(pid=pid, comm=comm)
-            for pid, comms in sorted(self._task_pid_map.items(), key=itemgetter(0))
+            for pid, comms in self.task_registry.pid_names.items()
             for comm in comms
         ]
 
@@ -2429,6 +5941,326 @@ class Trace(Loggable, TraceBase):
             return df
 
 
+def _resolve_analysis_method(name):
+    """
+    Get the method of a :class:`lisa.analysis.base.TraceAnalysisBase`
+    subclass from its ``"<analysis>.<method>"`` name.
+    """
+    # Delay import to avoid circular dependency
+    from lisa.analysis.base import TraceAnalysisBase
+
+    try:
+        analysis_name, meth_name = name.split('.', 1)
+    except ValueError:
+        raise ValueError('Analysis method name must be "<analysis>.<method>": {}'.format(name))
+
+    try:
+        analysis_cls = TraceAnalysisBase.get_analysis_classes()[analysis_name]
+        return getattr(analysis_cls, meth_name)
+    except (KeyError, AttributeError):
+        raise ValueError('Unknown analysis method: {}'.format(name))
+
+
+def _map_traces(worker, trace_paths, jobs, trace_kwargs, *args):
+    """
+    Call ``worker(trace_path, trace_kwargs, *args)`` for each trace, using a
+    pool of processes.
+
+    :param jobs: Number of traces processed in parallel, in separate
+        processes. If ``None``, one per CPU.
+    :type jobs: int or None
+
+    :returns: The list of values returned by ``worker``, in the order of
+        ``trace_paths``.
+    """
+    trace_paths = list(trace_paths)
+    jobs = min(jobs or os.cpu_count() or 1, len(trace_paths))
+
+    trace_kwargs = dict(trace_kwargs)
+    if jobs > 1:
+        # Worker processes cannot start their own pool of processes
+        trace_kwargs.setdefault('parse_jobs', 1)
+
+    args_list = [
+        (worker, trace_path, trace_kwargs, args)
+        for trace_path in trace_paths
+    ]
+    if jobs > 1:
+        with multiprocessing.Pool(processes=jobs) as pool:
+            return pool.map(_map_traces_star, args_list, chunksize=1)
+    else:
+        return list(map(_map_traces_star, args_list))
+
+
+def _map_traces_star(args):
+    worker, trace_path, trace_kwargs, args = args
+    return worker(trace_path, trace_kwargs, *args)
+
+
+def _prepare_trace(trace_path, trace_kwargs, events, analyses, analyses_events):
+    """
+    Prepare the swap of a single trace, see :func:`prepare_traces`.
+
+    Errors are reported in the returned list rather than raised, so that
+    preparing the other traces is not affected.
+    """
+    def format_error(e):
+        return '{}: {}'.format(e.__class__.__qualname__, e)
+
+    errors = []
+    try:
+        trace = Trace(trace_path, write_swap=True, **trace_kwargs)
+        found_events, df_map = _prepare_trace_events(trace, events, analyses_events)
+    except Exception as e:
+        errors.append(format_error(e))
+        return errors
+
+    errors.extend(
+        'Event not found: {}'.format(event)
+        for event in sorted(set(events) - found_events - df_map.keys())
+    )
+
+    for name in analyses:
+        analysis_name, meth_name = name.split('.', 1)
+        try:
+            meth = getattr(getattr(trace.analysis, analysis_name), meth_name)
+            meth()
+        except MissingTraceEventError as e:
+            errors.append('{}: {}'.format(name, e))
+        except Exception as e:
+            errors.append('{}: {}'.format(name, format_error(e)))
+
+    # Everything that was computed is worth reloading from the swap
+    cache = trace._cache
+    try:
+        cache.write_swap_all(force=True)
+        cache.flush()
+        cache.to_swap_dir()
+    except Exception as e:
+        errors.append('Could not write the swap area: {}'.format(format_error(e)))
+
+    return errors
+
+
+def _prepare_trace_events(trace, events, analyses_events):
+    """
+    Parse the events needed to prepare a trace, see :func:`_prepare_trace`.
+
+    :returns: A tuple of the set of ``events`` parsed one partition at a
+        time and of the mapping of the other events found to their dataframe.
+    """
+    # Partitioned traces are typically too large for the whole dataframe of
+    # the events to fit in memory, so they are parsed one partition at a time
+    if trace._partition_duration:
+        found_events = set()
+        for event in sorted(events):
+            try:
+                for df in trace.iter_df_events(event, raw=True):
+                    pass
+            except MissingTraceEventError:
+                pass
+            else:
+                found_events.add(event)
+        events_to_load = analyses_events - events
+    else:
+        found_events = set()
+        events_to_load = events | analyses_events
+
+    # Parse all the events in one go. Only report the missing events that
+    # were explicitly asked for, since analyses can use optional events.
+    df_map = trace._load_raw_df_map(
+        sorted(events_to_load),
+        write_swap=True,
+        allow_missing_events=True,
+    ) if events_to_load else {}
+
+    return (found_events, df_map)
+
+
+def prepare_traces(trace_paths, events=None, analyses=None, jobs=None, **kwargs):
+    """
+    Parse the events of the given traces and run analysis methods on them in
+    advance, so that the results are reloaded from the swap area of the
+    traces when they are opened later.
+
+    :param trace_paths: Paths of the traces to prepare.
+    :type trace_paths: list(str)
+
+    :param events: Events to parse.
+    :type events: list(str) or None
+
+    :param analyses: Analysis methods to run, as ``"<analysis>.<method>"``,
+        e.g. ``"tasks.df_tasks_runtime"``. The methods are called with their
+        default parameters, so only the ones decorated with
+        :meth:`lisa.analysis.base.TraceAnalysisBase.cache` are useful. The
+        events they use are parsed along with ``events``.
+    :type analyses: list(str) or None
+
+    :param jobs: Number of traces prepared in parallel, in separate
+        processes. If ``None``, one per CPU.
+    :type jobs: int or None
+
+    :Variable keyword arguments: Forwarded to :class:`Trace`, e.g. to choose
+        the ``swap_dir`` or ``max_swap_size``. Note that the swap only keeps
+        the most recent data if ``max_swap_size`` is too small to fit
+        everything. With ``partition_duration``, ``events`` are parsed and
+        stored one partition at a time.
+
+    :returns: A mapping of trace paths to the list of errors encountered:
+        events and analysis methods that could not be prepared, or the reason
+        why the trace could not be prepared at all, e.g. if it does not exist.
+    :rtype: dict(str, list(str))
+
+    :raises ValueError: If one of the ``analyses`` does not exist.
+    """
+    events = set(events or [])
+    analyses = list(analyses or [])
+    analyses_events = set()
+    for name in analyses:
+        meth = _resolve_analysis_method(name)
+        with contextlib.suppress(AttributeError):
+            analyses_events.update(meth.used_events.get_all_events())
+
+    trace_paths = list(trace_paths)
+    errors = _map_traces(_prepare_trace, trace_paths, jobs, kwargs, events, analyses, analyses_events)
+    return dict(zip(trace_paths, errors))
+
+
+def _trace_collection_worker(trace_path, trace_kwargs, f, f_args, f_kwargs):
+    trace = Trace(trace_path, **trace_kwargs)
+    try:
+        return f(trace, *f_args, **f_kwargs)
+    finally:
+        # Make sure the next runs will find everything in the swap
+        trace._cache.flush()
+        trace._cache.to_swap_dir()
+
+
+def _trace_collection_df_events(trace, event, kwargs):
+    return trace.df_events(event, **kwargs)
+
+
+def _trace_collection_call_analysis(trace, meth, kwargs):
+    # Delay import to avoid circular dependency
+    from lisa.analysis.base import TraceAnalysisBase
+
+    if isinstance(meth, str):
+        meth = _resolve_analysis_method(meth)
+    return TraceAnalysisBase.call_on_trace(meth, trace, kwargs)
+
+
+class TraceCollection:
+    """
+    Collection of traces on which the same computations are run in parallel,
+    using a pool of processes.
+
+    :param traces: Paths of the traces. If a mapping is given, its keys are
+        used as trace identifiers in the results instead of the paths.
+    :type traces: list(str) or dict(object, str)
+
+    :param jobs: Number of traces processed in parallel, in separate
+        processes. If ``None``, one per CPU.
+    :type jobs: int or None
+
+    :Variable keyword arguments: Forwarded to :class:`Trace` when creating
+        each trace.
+
+    Each worker creates the :class:`Trace` it needs, so the dataframes are
+    shared between computations and between runs through the swap area of
+    each trace.
+
+    **Example**::
+
+        traces = TraceCollection(glob.glob('results/*/trace.dat'), plat_info=plat_info)
+        df = traces.call_analysis('tasks.df_tasks_runtime')
+    """
+
+    TRACE_INDEX_LEVEL = 'trace'
+    """
+    Name of the index level holding the trace identifiers in the concatenated
+    dataframes.
+    """
+
+    def __init__(self, traces, jobs=None, **kwargs):
+        if isinstance(traces, Mapping):
+            self.traces = dict(traces)
+        else:
+            self.traces = {
+                trace_path: trace_path
+                for trace_path in traces
+            }
+
+        self.jobs = jobs
+        self.trace_kwargs = kwargs
+
+    def map(self, f, *args, **kwargs):
+        """
+        Call ``f(trace, *args, **kwargs)`` on each trace of the collection.
+
+        :param f: Function to call. It must be picklable, i.e. defined at the
+            top level of a module, in order to be sent to the worker
+            processes.
+        :type f: collections.abc.Callable
+
+        :returns: A mapping of trace identifiers to the value returned by
+            ``f``.
+        :rtype: dict
+        """
+        ids = list(self.traces.keys())
+        res = _map_traces(
+            _trace_collection_worker,
+            [self.traces[trace_id] for trace_id in ids],
+            self.jobs,
+            self.trace_kwargs,
+            f, args, kwargs,
+        )
+        return dict(zip(ids, res))
+
+    def _concat(self, res):
+        return pd.concat(res, names=[self.TRACE_INDEX_LEVEL])
+
+    def df_events(self, event, **kwargs):
+        """
+        Same as :meth:`Trace.df_events` on all the traces.
+
+        :returns: The dataframes of all traces, concatenated with an extra
+            outer index level named after :attr:`TRACE_INDEX_LEVEL` holding
+            the trace identifiers.
+        :rtype: pandas.DataFrame
+        """
+        res = self.map(_trace_collection_df_events, event, kwargs)
+        return self._concat(res)
+
+    def call_analysis(self, meth, **kwargs):
+        """
+        Call an analysis method on all the traces.
+
+        :param meth: Method of a subclass of
+            :class:`lisa.analysis.base.TraceAnalysisBase`, or its name as
+            ``"<analysis>.<method>"``, e.g. ``"tasks.df_tasks_runtime"``.
+        :type meth: collections.abc.Callable or str
+
+        :Variable keyword arguments: Forwarded to the method.
+
+        :returns: If the method returns a :class:`pandas.DataFrame` or
+            :class:`pandas.Series`, the results concatenated like for
+            :meth:`df_events`. Otherwise, a mapping of trace identifiers to
+            results.
+        """
+        if isinstance(meth, str):
+            # Check it exists before spawning any process
+            _resolve_analysis_method(meth)
+
+        res = self.map(_trace_collection_call_analysis, meth, kwargs)
+        if res and all(
+            isinstance(x, (pd.DataFrame, pd.Series))
+            for x in res.values()
+        ):
+            return self._concat(res)
+        else:
+            return res
+
+
 class TraceEventCheckerBase(abc.ABC, Loggable):
     """
     ABC for events checker classes.
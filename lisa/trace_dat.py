@@ -0,0 +1,1016 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2019, Arm Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Native reader for the binary ``trace.dat`` format produced by ``trace-cmd``.
+
+This allows building event dataframes straight from the per-CPU ring buffer
+pages stored in the file, without going through ``trace-cmd report`` and
+parsing its textual output.
+"""
+
+import re
+import mmap
+import heapq
+import struct
+from collections import namedtuple
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+import trappy
+from trappy.base import Base
+from trappy.dynamic import DynamicTypeFactory, default_init
+
+from lisa.utils import Loggable, memoized
+
+
+def make_unique_timestamps(time):
+    """
+    Make timestamps unique using the same rule as
+    :class:`trappy.ftrace.FTrace`: a timestamp that is not strictly greater
+    than the previous one is replaced by the next representable float after
+    the previous one.
+
+    :param time: Positive timestamps in seconds, in trace order.
+    :type time: numpy.ndarray
+    """
+    time = np.asarray(time, dtype=np.float64)
+    if not len(time):
+        return time
+
+    # Positive floats are ordered like their bit pattern, and
+    # np.nextafter(x, math.inf) is the float whose bit pattern is one more
+    # than x. Therefore the rule amounts to:
+    # bits[i] = max(bits[i], bits[i-1] + 1)
+    # The sequence starts with a timestamp of 0.
+    bits = time.view(np.int64)
+    idx = np.arange(len(bits), dtype=np.int64)
+    bits = idx + np.maximum(np.maximum.accumulate(bits - idx), 1)
+    return bits.view(np.float64)
+
+
+class TraceDatParseError(ValueError):
+    """
+    Raised when the ``trace.dat`` file cannot be decoded.
+    """
+    pass
+
+
+class TraceDatField(namedtuple('TraceDatField', (
+    'name', 'type', 'offset', 'size', 'signed', 'array_len', 'data_loc'
+))):
+    """
+    Field of a trace event, as described in the event format.
+
+    :param name: Name of the field.
+    :type name: str
+
+    :param type: C type of the field, without the array specifier.
+    :type type: str
+
+    :param offset: Offset of the field in the event record.
+    :type offset: int
+
+    :param size: Size in bytes of the field in the event record.
+    :type size: int
+
+    :param signed: ``True`` if the field is signed.
+    :type signed: bool
+
+    :param array_len: Number of elements of a fixed-size array, or ``None``
+        if the field is not an array.
+    :type array_len: int or None
+
+    :param data_loc: ``'__data_loc'`` or ``'__rel_loc'`` for dynamic
+        arrays, ``None`` otherwise.
+    :type data_loc: str or None
+    """
+    __slots__ = []
+
+    _FIELD_REGEX = re.compile(
+        r'field:\s*(?P<decl>[^;]+);\s*offset:\s*(?P<offset>\d+);\s*size:\s*(?P<size>\d+);(?:\s*signed:\s*(?P<signed>\d+);)?'
+    )
+    _DECL_REGEX = re.compile(r'^(?P<type>.*?)\s*(?P<name>\w+)\s*(?:\[(?P<len>[^\]]*)\])?$')
+
+    @classmethod
+    def from_line(cls, line):
+        """
+        Build a :class:`TraceDatField` from a ``field:`` line of an event
+        format description, or return ``None`` if the line is not describing
+        a field.
+        """
+        match = cls._FIELD_REGEX.search(line)
+        if not match:
+            return None
+
+        decl = match.group('decl').strip()
+        decl_match = cls._DECL_REGEX.match(decl)
+        if not decl_match:
+            raise TraceDatParseError('Could not parse field declaration: {}'.format(decl))
+
+        type_ = decl_match.group('type')
+        size = int(match.group('size'))
+
+        data_loc = None
+        for loc in ('__data_loc', '__rel_loc'):
+            if type_.startswith(loc):
+                data_loc = loc
+                type_ = type_[len(loc):].replace('[]', '').strip()
+                break
+
+        array_len = decl_match.group('len')
+        if array_len is None:
+            pass
+        elif array_len.isdigit():
+            array_len = int(array_len)
+        # Empty or symbolic length, so we infer it from the size
+        else:
+            array_len = 0
+
+        return cls(
+            name=decl_match.group('name'),
+            type=type_,
+            offset=int(match.group('offset')),
+            size=size,
+            signed=bool(int(match.group('signed') or 0)),
+            array_len=array_len,
+            data_loc=data_loc,
+        )
+
+    @property
+    def is_string(self):
+        """
+        ``True`` if the field holds a NULL-terminated string.
+        """
+        return 'char' in self.type.split() and (
+            self.data_loc or
+            self.array_len is not None or
+            # Flexible array member at the end of the record, like the buf
+            # field of the print event
+            self.size == 0
+        )
+
+
+class TraceDatEventFormat(namedtuple('TraceDatEventFormat', (
+    'name', 'system', 'id', 'fields', 'common_fields'
+))):
+    """
+    Format of a trace event, as found in the ``trace.dat`` header.
+
+    :param name: Name of the event.
+    :type name: str
+
+    :param system: Name of the events system (e.g. ``sched``).
+    :type system: str
+
+    :param id: Numeric ID of the event, as stored in the ``common_type``
+        field of the records.
+    :type id: int
+
+    :param fields: List of event-specific fields.
+    :type fields: list(TraceDatField)
+
+    :param common_fields: List of fields common to all events.
+    :type common_fields: list(TraceDatField)
+    """
+    __slots__ = []
+
+    @classmethod
+    def from_text(cls, text, system):
+        """
+        Parse the textual format description of an event.
+        """
+        name = None
+        id_ = None
+        fields = []
+        common_fields = []
+        for line in text.splitlines():
+            if line.startswith('name:'):
+                name = line.split(':', 1)[1].strip()
+            elif line.startswith('ID:'):
+                id_ = int(line.split(':', 1)[1])
+            else:
+                field = TraceDatField.from_line(line)
+                if field is None:
+                    continue
+                elif field.name.startswith('common_'):
+                    common_fields.append(field)
+                else:
+                    fields.append(field)
+
+        if name is None or id_ is None:
+            raise TraceDatParseError('Could not parse event format: {}'.format(text))
+
+        return cls(
+            name=name,
+            system=system,
+            id=id_,
+            fields=fields,
+            common_fields=common_fields,
+        )
+
+
+class TraceDat(Loggable):
+    """
+    Reader for ``trace.dat`` files, version 6.
+
+    :param path: Path to the ``trace.dat`` file.
+    :type path: str
+
+    :param time_unit: Unit of the timestamps, either ``"s"`` for float seconds
+        or ``"ns"`` for integer nanoseconds.
+    :type time_unit: str
+
+    The whole file is memory-mapped and the per-CPU ring buffer pages are
+    decoded once. Event fields are then extracted column-wise with numpy, so
+    the cost of building a dataframe is mostly independent of the number of
+    fields of the event.
+
+    .. note:: With ``time_unit="s"``, timestamps are converted to seconds and
+        made unique the same way as :class:`trappy.ftrace.FTrace` does, so the
+        dataframes can be used interchangeably with the ones obtained by
+        parsing the output of ``trace-cmd report``. With ``time_unit="ns"``,
+        the timestamps are kept as recorded and can therefore be duplicated.
+        Events are merged across CPUs in the same order as ``trace-cmd``,
+        which allows ``__line`` to match as well.
+    """
+
+    MAGIC = b'\x17\x08\x44tracing'
+
+    _OPTION_DATE = 1
+    _OPTION_OFFSET = 7
+
+    # Ring buffer flags stored in the high bits of the page "commit" field
+    _RB_MISSED_EVENTS = 1 << 31
+    _RB_COMMIT_MASK = (1 << 30) - 1
+
+    # Ring buffer event types, stored in the type_len bitfield of each event
+    # header.
+    _TYPE_PADDING = 29
+    _TYPE_TIME_EXTEND = 30
+    _TYPE_TIME_STAMP = 31
+    _TS_SHIFT = 27
+
+    def __init__(self, path, time_unit='s'):
+        if time_unit not in ('s', 'ns'):
+            raise ValueError('Unknown time unit: {}'.format(time_unit))
+
+        self.path = path
+        self.time_unit = time_unit
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # mmap cannot map empty files
+            except ValueError as e:
+                raise TraceDatParseError('Could not map {}: {}'.format(path, e))
+
+        self._buf = np.frombuffer(self._mmap, dtype=np.uint8)
+        self._parse_header()
+
+    def _read_struct(self, fmt):
+        fmt = self._endian + fmt
+        vals = struct.unpack_from(fmt, self._mmap, self._pos)
+        self._pos += struct.calcsize(fmt)
+        return vals if len(vals) > 1 else vals[0]
+
+    def _read_str(self):
+        end = self._mmap.find(b'\0', self._pos)
+        if end < 0:
+            raise TraceDatParseError('Unterminated string at offset {}'.format(self._pos))
+        s = self._mmap[self._pos:end].decode('utf-8', errors='replace')
+        self._pos = end + 1
+        return s
+
+    def _read_bytes(self, size):
+        data = self._mmap[self._pos:self._pos + size]
+        self._pos += size
+        return data
+
+    def _read_sized_text(self, size_fmt):
+        size = self._read_struct(size_fmt)
+        return self._read_bytes(size).decode('utf-8', errors='replace')
+
+    def _parse_header(self):
+        m = self._mmap
+        if m[:len(self.MAGIC)] != self.MAGIC:
+            raise TraceDatParseError('{} is not a trace.dat file'.format(self.path))
+
+        self._pos = len(self.MAGIC)
+        # The endianness is not known yet, but it does not matter for strings
+        self._endian = '<'
+        self.version = self._read_str()
+        if self.version != '6':
+            raise TraceDatParseError('Unsupported trace.dat version: {}'.format(self.version))
+
+        self._endian = '>' if self._read_bytes(1)[0] else '<'
+        self.long_size = self._read_bytes(1)[0]
+        self.page_size = self._read_struct('I')
+
+        for section in ('header_page', 'header_event'):
+            name = self._read_str()
+            if name != section:
+                raise TraceDatParseError('Expected {} section, got: {}'.format(section, name))
+            text = self._read_sized_text('Q')
+            if section == 'header_page':
+                self._header_page = {
+                    field.name: field
+                    for field in map(TraceDatField.from_line, text.splitlines())
+                    if field
+                }
+
+        formats = {}
+
+        def add_format(text, system):
+            fmt = TraceDatEventFormat.from_text(text, system)
+            formats[fmt.name] = fmt
+
+        for _ in range(self._read_struct('I')):
+            add_format(self._read_sized_text('Q'), 'ftrace')
+
+        for _ in range(self._read_struct('I')):
+            system = self._read_str()
+            for _ in range(self._read_struct('I')):
+                add_format(self._read_sized_text('Q'), system)
+
+        self.formats = formats
+        self._formats_by_id = {
+            fmt.id: fmt
+            for fmt in formats.values()
+        }
+
+        # kallsyms and printk formats are not needed
+        for _ in range(2):
+            size = self._read_struct('I')
+            self._pos += size
+
+        cmdlines = self._read_sized_text('Q')
+        self.cmdlines = {}
+        for line in cmdlines.splitlines():
+            # trace-cmd reads that with "%d %s", so the name is truncated at
+            # the first whitespace
+            pid, comm, *_ = line.split() + ['']
+            self.cmdlines[int(pid)] = comm
+
+        self.cpus = self._read_struct('I')
+
+        self._ts_offset = 0
+        section = self._read_bytes(10)
+        if section == b'options  \0':
+            while True:
+                option = self._read_struct('H')
+                if not option:
+                    break
+                data = self._read_bytes(self._read_struct('I'))
+                if option in (self._OPTION_DATE, self._OPTION_OFFSET):
+                    self._ts_offset += int(data.rstrip(b'\0'), base=0)
+            section = self._read_bytes(10)
+
+        if section != b'flyrecord\0':
+            raise TraceDatParseError('Unsupported trace.dat data section: {}'.format(section))
+
+        self._cpu_data = [
+            self._read_struct('QQ')
+            for cpu in range(self.cpus)
+        ]
+
+    def _int_dtype(self, size, signed):
+        return np.dtype('{}{}{}'.format(self._endian, 'i' if signed else 'u', size))
+
+    def _read_page_header_field(self, pages, name):
+        field = self._header_page[name]
+        data = self._gather(pages + field.offset, field.size)
+        return data.view(self._int_dtype(field.size, False)).reshape(-1).astype(np.int64)
+
+    def _decode_pages(self, pages):
+        """
+        Walk the records of the given ring buffer pages.
+
+        All the pages are walked at once, one record per page at each step,
+        so that the work is done by numpy on arrays as long as the number of
+        pages.
+
+        :returns: A tuple of arrays ``(page, type_len, value, offset, size)``,
+            ordered by page and then by position in the page. ``value`` is
+            the time delta of the record, or the absolute timestamp for
+            :attr:`_TYPE_TIME_STAMP` records. ``offset`` and ``size`` are
+            only meaningful for data records.
+        """
+        words = self._words
+        data_offset = self._header_page['data'].offset
+        data_size = self._read_page_header_field(pages, 'commit') & self._RB_COMMIT_MASK
+
+        pos = (pages + data_offset) // 4
+        end = pos + (data_size + 3) // 4
+        page = np.arange(len(pages), dtype=np.int64)
+        active = pos < end
+        pos, end, page = pos[active], end[active], page[active]
+
+        ts_mask = (1 << self._TS_SHIFT) - 1
+        last_word = len(words) - 1
+        steps = []
+        while len(pos):
+            header = words[pos].astype(np.int64)
+            # Word following the header, which meaning depends on the type
+            arg = words[np.minimum(pos + 1, last_word)].astype(np.int64)
+            if self._endian == '>':
+                type_len = header >> self._TS_SHIFT
+                delta = header & ts_mask
+            else:
+                type_len = header & 0x1f
+                delta = header >> 5
+
+            is_sized = type_len == 0
+            is_data = type_len <= 28
+            is_padding = type_len == self._TYPE_PADDING
+            is_time = type_len >= self._TYPE_TIME_EXTEND
+
+            size = np.where(is_sized, arg - 4, type_len * 4)
+            offset = np.where(is_sized, pos + 2, pos + 1) * 4
+            value = np.where(is_time, (arg << self._TS_SHIFT) + delta, delta)
+
+            emit = is_data | is_time
+            steps.append((page[emit], type_len[emit], value[emit], offset[emit], size[emit]))
+
+            advance = np.select(
+                [is_sized, is_data, is_padding],
+                [2 + (size + 3) // 4, 1 + type_len, 1 + (arg + 3) // 4],
+                2,
+            )
+            pos = pos + np.maximum(advance, 1)
+            # A padding with no delta means the rest of the page is unused
+            active = (pos < end) & ~(is_padding & (delta == 0))
+            pos, end, page = pos[active], end[active], page[active]
+
+        if steps:
+            arrays = [np.concatenate(x) for x in zip(*steps)]
+        else:
+            arrays = [np.array([], dtype=np.int64)] * 5
+
+        # The records of each page were emitted one step apart
+        order = np.argsort(arrays[0], kind='stable')
+        return tuple(array[order] for array in arrays)
+
+    def _decode_records(self):
+        """
+        Decode all the records of all CPUs.
+
+        :returns: a tuple of arrays ``(timestamp, offset, size, missed, cpu)``
+            with the records of each CPU in recording order, one CPU after
+            the other.
+        """
+        pages = []
+        page_cpus = []
+        for cpu, (offset, size) in enumerate(self._cpu_data):
+            cpu_pages = np.arange(offset, offset + size, self.page_size, dtype=np.int64)
+            pages.append(cpu_pages)
+            page_cpus.append(np.full(len(cpu_pages), cpu, dtype=np.int64))
+        pages = np.concatenate(pages) if pages else np.array([], dtype=np.int64)
+        page_cpus = np.concatenate(page_cpus) if page_cpus else np.array([], dtype=np.int64)
+
+        page_ts = self._read_page_header_field(pages, 'timestamp')
+        page_missed = (self._read_page_header_field(pages, 'commit') & self._RB_MISSED_EVENTS) != 0
+        page, type_len, value, offsets, sizes = self._decode_pages(pages)
+
+        # The time of each record is the timestamp of its page, plus the deltas
+        # of the records since the start of the page or since the last
+        # absolute timestamp. It is computed as a cumulative sum that is reset
+        # at the start of each of these segments.
+        is_stamp = type_len == self._TYPE_TIME_STAMP
+        delta = np.where(is_stamp, 0, value)
+        page_start = np.ones(len(page), dtype=bool)
+        page_start[1:] = page[1:] != page[:-1]
+        seg_start = np.flatnonzero(page_start | is_stamp)
+        seg = np.cumsum(page_start | is_stamp) - 1
+        base = np.where(is_stamp, value, page_ts[page])[seg_start]
+        cumsum = np.cumsum(delta)
+        seg_cumsum = cumsum[seg_start] - delta[seg_start]
+        ts = base[seg] + cumsum - seg_cumsum[seg]
+
+        is_record = type_len <= 28
+        page = page[is_record]
+        # Only the first record of a page is flagged with the events missed
+        # before it
+        first = np.ones(len(page), dtype=bool)
+        first[1:] = page[1:] != page[:-1]
+
+        return (
+            ts[is_record].astype(np.uint64),
+            offsets[is_record],
+            sizes[is_record],
+            first & page_missed[page],
+            page_cpus[page],
+        )
+
+    @property
+    @memoized
+    def _words(self):
+        # Ring buffer pages are page-aligned in the file, so all the event
+        # headers are 4-bytes aligned
+        nr_words = len(self._buf) // 4
+        return self._buf[:nr_words * 4].view(self._int_dtype(4, False))
+
+    @property
+    @memoized
+    def _records(self):
+        """
+        Decode all the records of the trace and merge them in the same order
+        as ``trace-cmd report`` does.
+        """
+        ts, offsets, sizes, missed, cpus = self._decode_records()
+
+        # trace-cmd picks the oldest record among the head of all the per-CPU
+        # streams, preferring the lowest CPU number in case of equal
+        # timestamps. When each stream is sorted, this boils down to a
+        # stable sort.
+        same_cpu = cpus[1:] == cpus[:-1]
+        if (np.diff(ts.astype(np.int64))[same_cpu] >= 0).all():
+            order = np.lexsort((cpus, ts), axis=0)
+        else:
+            bounds = np.flatnonzero(np.diff(cpus)) + 1
+            order = self._merge_streams(np.split(ts, bounds))
+
+        ts = ts[order] + np.uint64(self._ts_offset)
+        offsets = offsets[order]
+        sizes = sizes[order]
+        cpus = cpus[order]
+        missed = missed[order]
+
+        ids = self._read_int_field(offsets, self._common_field('common_type'))
+        pids = self._read_int_field(offsets, self._common_field('common_pid'))
+
+        # trace-cmd report prints a line when events were dropped, which
+        # trappy accounts for in __line
+        lines = np.arange(len(ts), dtype=np.int64) + np.cumsum(missed)
+
+        return dict(
+            time=(
+                self._unique_timestamps(ts)
+                if self.time_unit == 's' else
+                ts.astype(np.int64)
+            ),
+            offset=offsets,
+            size=sizes,
+            cpu=cpus,
+            id=ids,
+            pid=pids,
+            line=lines,
+        )
+
+    @staticmethod
+    def _merge_streams(streams):
+        """
+        Merge the given streams of timestamps by repeatedly picking the
+        smallest head, even if the streams are not sorted.
+
+        :returns: The indices of the items in the concatenation of the streams,
+            in merged order.
+        """
+        bases = np.cumsum([0] + [len(stream) for stream in streams])
+        # heapq.merge() compares the heads of the streams like trace-cmd,
+        # including when they are not sorted, and favors the first stream in
+        # case of equality.
+        merged = heapq.merge(*(
+            zip(stream.tolist(), range(base, base + len(stream)))
+            for base, stream in zip(bases.tolist(), streams)
+        ), key=itemgetter(0))
+        return np.fromiter(map(itemgetter(1), merged), dtype=np.int64, count=bases[-1])
+
+    @staticmethod
+    def _unique_timestamps(ts):
+        """
+        Convert nanosecond timestamps to seconds, made unique with
+        :func:`make_unique_timestamps`.
+        """
+        if not len(ts):
+            return np.array([], dtype=np.float64)
+
+        # Integers up to 2**53 are exactly representable as float, so the
+        # division is correctly rounded, exactly like parsing the decimal
+        # representation printed by trace-cmd.
+        if ts.max() < 2 ** 53:
+            time = ts.astype(np.float64) / 1e9
+        else:
+            time = np.array([int(x) / 10 ** 9 for x in ts.tolist()], dtype=np.float64)
+
+        return make_unique_timestamps(time)
+
+    def _common_field(self, name):
+        for fmt in self.formats.values():
+            for field in fmt.common_fields:
+                if field.name == name:
+                    return field
+        raise TraceDatParseError('Could not find common field "{}"'.format(name))
+
+    def _gather(self, offsets, size):
+        """
+        Gather ``size`` bytes at the given ``offsets`` into a 2D array.
+        """
+        idx = offsets[:, None] + np.arange(size, dtype=np.int64)
+        return self._buf[idx]
+
+    def _read_int_field(self, offsets, field, elem_size=None):
+        size = elem_size or field.size
+        data = self._gather(offsets + field.offset, field.size)
+        data = data.view(self._int_dtype(size, field.signed))
+        if elem_size is None:
+            return data.reshape(-1)
+        else:
+            return data
+
+    def _decode_strings(self, data):
+        """
+        Decode a 2D array of bytes into an array of NULL-terminated strings.
+        """
+        if not data.shape[1]:
+            return np.full(len(data), '', dtype=object)
+
+        data = data.copy()
+        data[np.maximum.accumulate(data == 0, axis=1)] = 0
+        data = data.view('S{}'.format(data.shape[1])).reshape(-1)
+        return self._decode_bytes(data)
+
+    @staticmethod
+    def _decode_bytes(data):
+        uniq, inverse = np.unique(data, return_inverse=True)
+        decoded = np.array(
+            [x.decode('utf-8', errors='replace') for x in uniq.tolist()],
+            dtype=object,
+        )
+        return decoded[inverse]
+
+    def _read_dynamic_field(self, offsets, sizes, field):
+        """
+        Read a field which length depends on the record, either a
+        ``__data_loc`` array or a flexible array member at the end of the
+        record.
+        """
+        if field.data_loc:
+            loc = self._read_int_field(offsets, field._replace(signed=False)).astype(np.int64)
+            starts = loc & 0xffff
+            lengths = loc >> 16
+            # The offset is relative to the end of the field
+            if field.data_loc == '__rel_loc':
+                starts += field.offset + field.size
+        else:
+            starts = np.full(len(offsets), field.offset, dtype=np.int64)
+            lengths = np.maximum(sizes - field.offset, 0)
+
+        starts = starts + offsets
+        mmap_ = self._mmap
+        return [
+            mmap_[start:start + length]
+            for start, length in zip(starts.tolist(), lengths.tolist())
+        ]
+
+    def _decode_field(self, offsets, sizes, field):
+        """
+        Decode the given field for all the records at ``offsets``.
+
+        :returns: A mapping of column names to arrays. Arrays are exploded
+            into one column per item, like trappy does.
+        """
+        type_ = field.type.split()
+        if field.is_string:
+            if field.data_loc or not field.size:
+                data = np.array([
+                    x.split(b'\0', 1)[0]
+                    for x in self._read_dynamic_field(offsets, sizes, field)
+                ], dtype=object)
+                return {field.name: self._decode_bytes(data.astype(bytes))}
+            else:
+                data = self._gather(offsets + field.offset, field.size)
+                return {field.name: self._decode_strings(data)}
+
+        elif field.data_loc or field.array_len is not None:
+            if field.data_loc:
+                elem_size = self._elem_size(type_) or 1
+                arrays = [
+                    np.frombuffer(x, dtype=self._int_dtype(elem_size, field.signed), count=len(x) // elem_size)
+                    for x in self._read_dynamic_field(offsets, sizes, field)
+                ]
+                array_len = max(map(len, arrays), default=0)
+                data = np.zeros((len(arrays), array_len), dtype=np.int64)
+                for row, array in zip(data, arrays):
+                    row[:len(array)] = array
+            else:
+                array_len = field.array_len or 1
+                elem_size = field.size // array_len
+                if elem_size not in (1, 2, 4, 8):
+                    return {}
+                data = self._read_int_field(offsets, field, elem_size=elem_size)
+
+            return {
+                '{}{}'.format(field.name, i): self._fixup_int(data[:, i])
+                for i in range(data.shape[1])
+            }
+
+        elif field.size in (1, 2, 4, 8):
+            return {field.name: self._fixup_int(self._read_int_field(offsets, field))}
+        else:
+            return {}
+
+    @staticmethod
+    def _elem_size(type_):
+        sizes = {
+            'char': 1, 'u8': 1, 's8': 1, 'bool': 1,
+            'short': 2, 'u16': 2, 's16': 2,
+            'int': 4, 'u32': 4, 's32': 4, 'pid_t': 4,
+            'long': 8, 'u64': 8, 's64': 8,
+        }
+        for word in reversed(type_):
+            try:
+                return sizes[word]
+            except KeyError:
+                continue
+        return None
+
+    @staticmethod
+    def _fixup_int(data):
+        # Use the same dtype as what trappy gives when parsing the textual
+        # output, so that comparisons like "state == -1" work as expected.
+        if data.dtype.kind == 'u' and data.dtype.itemsize == 8:
+            if len(data) and data.max() >= 2 ** 63:
+                return data
+        return data.astype(np.int64)
+
+    @property
+    def available_events(self):
+        """
+        Set of events present in the trace.
+        """
+        ids = set(np.unique(self._records['id']).tolist())
+        return {
+            fmt.name
+            for id_, fmt in self._formats_by_id.items()
+            if id_ in ids
+        }
+
+    @property
+    def basetime(self):
+        """
+        Timestamp of the first event in the trace.
+        """
+        time = self._records['time']
+        return time[0] if len(time) else 0
+
+    @property
+    def endtime(self):
+        """
+        Timestamp of the last event in the trace.
+        """
+        time = self._records['time']
+        return time[-1] if len(time) else 0
+
+    def _select(self, mask):
+        records = self._records
+        return {
+            key: array[mask]
+            for key, array in records.items()
+        }
+
+    def _common_columns(self, records):
+        pids = records['pid']
+        uniq, inverse = np.unique(pids, return_inverse=True)
+        comms = np.array(
+            [
+                '<idle>' if pid == 0 else self.cmdlines.get(pid, '<...>')
+                for pid in uniq.tolist()
+            ],
+            dtype=object,
+        )
+        return {
+            '__comm': comms[inverse],
+            '__pid': pids.astype(np.int64),
+            '__cpu': records['cpu'],
+            '__line': records['line'],
+        }
+
+    def _make_df(self, records, columns):
+        return pd.DataFrame(
+            {
+                **self._common_columns(records),
+                **columns,
+            },
+            index=pd.Index(records['time'], name='Time'),
+        )
+
+    def df_event(self, event):
+        """
+        Dataframe of all the occurrences of the given event in the trace.
+
+        :param event: Name of the event, as found in its format.
+        :type event: str
+
+        The columns are named the same way as trappy does when parsing
+        ``trace-cmd report -r`` output, i.e. the raw value of each field is
+        used.
+        """
+        try:
+            fmt = self.formats[event]
+        except KeyError:
+            raise ValueError('Event "{}" is not described in the trace'.format(event))
+
+        records = self._select(self._records['id'] == fmt.id)
+        columns = {}
+        for field in fmt.fields:
+            columns.update(self._decode_field(records['offset'], records['size'], field))
+
+        return self._make_df(records, columns)
+
+    def df_text_events(self, unique_words):
+        """
+        Dataframes of events logged as text by ``print`` events, the same way
+        :class:`trappy.ftrace.FTrace` parses them.
+
+        :param unique_words: Mapping of names to a tuple ``(unique_word,
+            parse)``, where ``unique_word`` is the string identifying the
+            event in the logged text, and ``parse`` a function that turns the
+            text into a dictionary of fields.
+        :type unique_words: dict(str, tuple(str, collections.abc.Callable))
+
+        :returns: A mapping of names to dataframes.
+
+        Each ``print`` event is dispatched to the first name which unique word
+        is found in the buffer. The ``None`` unique word matches any event.
+        """
+        try:
+            fmt = self.formats['print']
+        except KeyError:
+            return {}
+
+        records = self._select(self._records['id'] == fmt.id)
+        buf_field, = [field for field in fmt.fields if field.name == 'buf']
+        bufs = [
+            x.split(b'\0', 1)[0].decode('utf-8', errors='replace').rstrip()
+            for x in self._read_dynamic_field(records['offset'], records['size'], buf_field)
+        ]
+
+        # Text that follows the "<event>: " prefixes, as the data group of
+        # trappy.ftrace.SPECIAL_FIELDS_RE
+        prefix_regex = re.compile(r'^(\w+:\s+)*')
+
+        matches = {name: [] for name in unique_words.keys()}
+        for i, buf in enumerate(bufs):
+            for name, (unique_word, _) in unique_words.items():
+                if unique_word is None or unique_word in buf:
+                    matches[name].append(i)
+                    break
+
+        df_map = {}
+        for name, idx in matches.items():
+            if not idx:
+                continue
+            _, parse = unique_words[name]
+            idx = np.array(idx, dtype=np.int64)
+            selected = {
+                key: array[idx]
+                for key, array in records.items()
+            }
+            data = pd.DataFrame.from_records([
+                parse(prefix_regex.sub('', bufs[i], count=1))
+                for i in idx.tolist()
+            ])
+            df = self._make_df(selected, {})
+            df_map[name] = pd.concat([df, data.set_index(df.index)], axis=1)
+
+        return df_map
+
+
+class TraceDatFTrace(trappy.BareTrace, Loggable):
+    """
+    Drop-in replacement for :class:`trappy.ftrace.FTrace` that decodes the
+    binary ``trace.dat`` with :class:`TraceDat` rather than parsing the output
+    of ``trace-cmd report``.
+
+    :param path: Path to the ``trace.dat`` file.
+    :type path: str
+
+    :param name: Name of the trace.
+    :type name: str
+
+    :param normalize_time: Make the first timestamp of the trace 0.
+    :type normalize_time: bool
+
+    :param scope: Same as for :class:`trappy.ftrace.FTrace`.
+    :type scope: str
+
+    :param events: List of events to parse on top of the ones selected by
+        ``scope``.
+    :type events: list(str)
+
+    :param time_unit: Forwarded to :class:`TraceDat`.
+    :type time_unit: str
+
+    Events which are not described in the ``trace.dat`` file are looked up in
+    the text logged with ``print`` events, such as the ones coming from
+    ``/sys/kernel/debug/tracing/trace_marker``.
+    """
+
+    disable_cache = True
+
+    def __init__(self, path, name="", normalize_time=True, scope="all", events=[], time_unit='s'):
+        super().__init__(name=name)
+        self.trace_path = path
+        self.time_unit = time_unit
+        self._trace_dat = TraceDat(path, time_unit=time_unit)
+
+        ftrace_cls = trappy.FTrace
+        all_classes = {
+            **ftrace_cls.thermal_classes,
+            **ftrace_cls.sched_classes,
+            **ftrace_cls.dynamic_classes,
+        }
+        if scope == 'thermal':
+            class_definitions = {**ftrace_cls.thermal_classes, **ftrace_cls.dynamic_classes}
+        elif scope == 'sched':
+            class_definitions = {**ftrace_cls.sched_classes, **ftrace_cls.dynamic_classes}
+        elif scope == 'custom':
+            class_definitions = {}
+        else:
+            class_definitions = dict(all_classes)
+
+        for event in events:
+            for cls in all_classes.values():
+                if (event == cls.unique_word) or \
+                   (event + ':' == cls.unique_word) or \
+                   (event == cls.name):
+                    class_definitions[cls.name] = cls
+                    break
+            else:
+                class_definitions[event] = DynamicTypeFactory(event, (Base,), {
+                    '__init__': default_init,
+                    'unique_word': event + ':',
+                    'name': event,
+                })
+
+        self.class_definitions = class_definitions
+        self._parse(class_definitions)
+
+        trace_dat = self._trace_dat
+        self.basetime = trace_dat.basetime
+        self.endtime = trace_dat.endtime
+        if normalize_time:
+            self._normalize_time()
+
+    def _parse(self, class_definitions):
+        trace_dat = self._trace_dat
+        text_events = {}
+        for attr, cls in class_definitions.items():
+            trace_class = cls()
+            trace_class.tracer = self
+            setattr(self, attr, trace_class)
+            self.trace_classes.append(trace_class)
+
+            unique_word = cls.unique_word.strip()
+            event = unique_word[:-1] if unique_word.endswith(':') else unique_word
+
+            # The print event is only used as a container for text that is
+            # parsed by trappy
+            if event in trace_dat.formats and event != 'print':
+                trace_class.data_frame = trace_dat.df_event(event)
+            else:
+                text_events[attr] = trace_class
+
+        if text_events:
+            # Specific unique words are looked up before fallback ones, so
+            # that tracing_mark_write-style parsers only get what is left.
+            unique_words = {
+                attr: (
+                    None if trace_class.unique_word == 'print:' else trace_class.unique_word,
+                    trace_class.generate_data_dict,
+                )
+                for attr, trace_class in sorted(
+                    text_events.items(),
+                    key=lambda item: (
+                        item[1].fallback,
+                        item[1].unique_word == 'print:',
+                        item[0],
+                    )
+                )
+            }
+            for attr, df in trace_dat.df_text_events(unique_words).items():
+                text_events[attr].data_frame = df
+
+        for trace_class in self.trace_classes:
+            trace_class.finalize_object()
+
+    def generate_data_dict(self, data_str):
+        return None
+
+# vim :set tabstop=4 shiftwidth=4 textwidth=80 expandtab
@@ -202,6 +202,10 @@ def lru_memoized(first_param_maxsize=None, other_params_maxsize=1024):
         reference. This suits well the method use-case, since we don't want the
         memoization of methods to prevent garbage collection of the instances
         they are bound to.
+
+    .. note:: The values cached for a given first parameter can be cleared
+        using the ``cache_clear_for(first)`` attribute of the decorated
+        callable.
     """
 
     def decorator(f):
@@ -251,6 +255,14 @@ def lru_memoized(first_param_maxsize=None, other_params_maxsize=1024):
 
                 return partial(*args, **kwargs)
 
+            def cache_clear_for(first):
+                """
+                Clear the values cached for the given first parameter.
+                """
+                cache_map.pop(first, None)
+                insertion_order.pop(first, None)
+
+            wrapper.cache_clear_for = cache_clear_for
             return wrapper
         else:
             return apply_lru(f)
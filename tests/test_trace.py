@@ -17,15 +17,19 @@
 
 import json
 import os
-from unittest import TestCase
+import shutil
+import sqlite3
+import threading
+from unittest import TestCase, mock, skipUnless
 import numpy as np
 import pandas as pd
 import copy
 
 from devlib.target import KernelVersion
 
-from lisa.trace import Trace, TaskID
-from lisa.datautils import df_squash
+from lisa.trace import Trace, TaskID, TraceCache, TraceCollection, prepare_traces, _PackedSwapStore, PandasDataDesc, PandasDataDescNF
+from lisa.trace_dat import TraceDat
+from lisa.datautils import df_squash, df_window, df_window_signals, SignalDesc
 from lisa.platforms.platinfo import PlatformInfo
 from .utils import StorageTestCase, ASSET_DIR
 
@@ -66,6 +70,23 @@ class TraceTestCase(StorageTestCase):
         return Trace(trace_path, self.plat_info, self.events,
                      normalize_time=False, plots_dir=self.res_dir)
 
+    def make_swap_trace_factory(self, trace_path=None, swap_dir_name='swap', **kwargs):
+        """
+        Create an empty swap folder and get a function opening a trace using it
+
+        :returns: A tuple of the swap folder and of a function creating a
+            :class:`~lisa.trace.Trace` of ``trace_path`` (defaults to
+            ``self.trace_path``). Its keyword arguments override ``kwargs``.
+        """
+        trace_path = trace_path or self.trace_path
+        swap_dir = os.path.join(self.res_dir, swap_dir_name)
+        os.makedirs(swap_dir)
+
+        def make_trace(**trace_kwargs):
+            return Trace(trace_path, swap_dir=swap_dir, **{**kwargs, **trace_kwargs})
+
+        return (swap_dir, make_trace)
+
     def get_trace(self, trace_name):
         """
         Get a trace from a separate provided trace file
@@ -144,6 +165,49 @@ class TestTrace(TraceTestCase):
         self.assertEqual(trace.get_task_name_pids('father'), [1234])
         self.assertEqual(trace.get_task_name_pids('father', ignore_fork=False), [1234, 5678])
 
+    def test_task_registry(self):
+        """TestTrace: task_registry records the tasks lifetime and matches truncated names"""
+        in_data = """
+          father-1234  [002] 18765.018235: sched_switch:          prev_comm=father prev_pid=1234 prev_prio=120 prev_state=0 next_comm=father next_pid=5678 next_prio=120
+           child-5678  [002] 18766.018236: sched_switch:          prev_comm=child prev_pid=5678 prev_prio=120 prev_state=1 next_comm=a_very_long_tas next_pid=3367 next_prio=120
+ a_very_long_tas-3367  [002] 18767.018237: sched_switch:          prev_comm=a_very_long_tas prev_pid=3367 prev_prio=120 prev_state=1 next_comm=child next_pid=5678 next_prio=120
+        """
+        trace_path = self.make_trace(in_data).trace_path
+
+        def make_trace():
+            # The default swap size is too small for such a short trace
+            return Trace(trace_path, normalize_time=False, max_swap_size=10**7)
+
+        trace = make_trace()
+        registry = trace.task_registry
+
+        df = registry.df.set_index(['pid', 'comm'])
+        self.assertEqual(df.loc[(5678, 'father'), 'first_seen'], 18765.018235)
+        self.assertEqual(df.loc[(5678, 'father'), 'last_seen'], 18765.018235)
+        self.assertEqual(df.loc[(5678, 'child'), 'first_seen'], 18766.018236)
+        self.assertEqual(df.loc[(5678, 'child'), 'last_seen'], 18767.018237)
+
+        self.assertEqual(registry.get_pid_names(5678), ['father', 'child'])
+        self.assertEqual(registry.get_name_pids('a_very_long_task_name'), [3367])
+        self.assertEqual(
+            trace.get_task_id('a_very_long_task_name'),
+            TaskID(pid=3367, comm='a_very_long_tas'),
+        )
+        with self.assertRaises(KeyError):
+            registry.get_name_pids('a_very_long')
+
+        self.assertEqual(registry.get_prefix_names('a_very_long'), ['a_very_long_tas'])
+        self.assertEqual(registry.get_prefix_names('a_very_long_task_name'), ['a_very_long_tas'])
+        self.assertEqual(registry.get_prefix_names('ch'), ['child'])
+        self.assertEqual(registry.get_prefix_names(''), ['a_very_long_tas', 'child', 'father'])
+        self.assertEqual(registry.get_prefix_names('z'), [])
+
+        # The registry is reloaded from the swap
+        trace = make_trace()
+        self.assertEqual(trace.task_registry.pid_names, registry.pid_names)
+        stats = trace.cache_stats().set_index('func')
+        self.assertEqual(stats.loc['Trace._df_task_registry', 'swap_loads'], 1)
+
     def test_time_range(self):
         """
         TestTrace: time_range is the duration of the trace
@@ -322,6 +386,882 @@ class TestTrace(TraceTestCase):
         """Test parsing sched_load_avg_task events from EAS1.2"""
         self._test_tasks_dfs('sched_load_avg')
 
+    def test_trace_dat_format(self):
+        """Test decoding trace.dat natively gives the same events as trace-cmd report"""
+        trace_path = os.path.join(self.traces_dir, 'sched_load', 'trace.dat')
+        events = ['sched_switch', 'sched_load_se', 'cpu_idle', 'cpu_frequency_devlib']
+
+        def make_trace(**kwargs):
+            return Trace(trace_path, events=events, enable_swap=False, **kwargs)
+
+        trace = make_trace()
+        trace_dat = make_trace(trace_format='TraceDat')
+
+        self.assertEqual(trace.basetime, trace_dat.basetime)
+        self.assertEqual(trace.endtime, trace_dat.endtime)
+        for event in events:
+            df = trace.df_events(event, raw=True)
+            df_dat = trace_dat.df_events(event, raw=True)
+            pd.testing.assert_frame_equal(df, df_dat[df.columns])
+
+    def test_trace_dat_merge_streams(self):
+        """Test the per-CPU streams of trace.dat records are merged like trace-cmd does"""
+        streams = [
+            np.array([5, 1, 7], dtype=np.uint64),
+            np.array([2, 5, 6], dtype=np.uint64),
+            np.array([], dtype=np.uint64),
+        ]
+        # The smallest head is picked, the first stream winning ties, even
+        # though the first stream is not sorted
+        self.assertEqual(TraceDat._merge_streams(streams).tolist(), [3, 0, 1, 4, 5, 2])
+
+    def test_parallel_parse(self):
+        """Test parsing a text trace in chunks gives the same events as parsing it at once"""
+        events = ['sched_switch', 'sched_wakeup', 'sched_overutilized']
+
+        def make_trace(**kwargs):
+            return Trace(self.trace_path, events=events, enable_swap=False, **kwargs)
+
+        trace = make_trace(parse_jobs=1)
+        trace_par = make_trace(parse_jobs=5)
+
+        # Without a swap area, the trace is not indexed just to be parsed
+        self.assertIsNone(trace_par._get_index(build=False))
+        self.assertEqual(trace.basetime, trace_par.basetime)
+        self.assertEqual(trace.endtime, trace_par.endtime)
+        for event in events:
+            pd.testing.assert_frame_equal(
+                trace.df_events(event, raw=True),
+                trace_par.df_events(event, raw=True),
+            )
+
+    def test_trace_index(self):
+        """Test the events index of a text trace avoids parsing"""
+        swap_dir, make_trace = self.make_swap_trace_factory(write_swap=False)
+
+        trace = make_trace()
+        self.assertIn('sched_switch', trace.available_events)
+        self.assertNotIn('sched_load_se', trace.available_events)
+        self.assertEqual(trace._parsed_events, {})
+        self.assertTrue(os.path.isfile(os.path.join(swap_dir, 'trace.index')))
+
+        # The index is reloaded from the swap area
+        trace = make_trace()
+        self.assertEqual(trace.basetime, self.trace.basetime)
+        self.assertEqual(trace.endtime, self.trace.endtime)
+        for event in ['sched_switch', 'sched_wakeup']:
+            pd.testing.assert_frame_equal(
+                trace.df_events(event, raw=True),
+                self.trace.df_events(event, raw=True),
+            )
+
+    def test_swap_trace_id(self):
+        """Test the swap area is validated without a full checksum of the trace"""
+        trace_path = os.path.join(self.res_dir, 'trace.txt')
+        with open(self.trace_path, 'rb') as f:
+            data = bytearray(f.read())
+        with open(trace_path, 'wb') as f:
+            f.write(data)
+
+        _, make_trace = self.make_swap_trace_factory(trace_path)
+
+        trace = make_trace()
+        trace.df_events('sched_switch', raw=True)
+        trace = make_trace()
+        self.assertTrue(trace._cache._swap_content)
+        self.assertIsNone(trace._cache._trace_md5)
+
+        # The fingerprint still matches after the file has been touched
+        stat = os.stat(trace_path)
+        os.utime(trace_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        trace = make_trace()
+        self.assertTrue(trace._cache._swap_content)
+
+        # Modifying the content invalidates the swap
+        data[-2:-1] = b'X'
+        with open(trace_path, 'wb') as f:
+            f.write(data)
+        trace = make_trace()
+        self.assertFalse(trace._cache._swap_content)
+
+    def test_swap_shared(self):
+        """Test a swap area shared by multiple traces opened concurrently"""
+        swap_dir, make_trace = self.make_swap_trace_factory()
+
+        trace1 = make_trace()
+        trace2 = make_trace()
+
+        df = trace1.df_events('sched_switch', raw=True)
+        trace2.df_events('sched_wakeup', raw=True)
+
+        # Entries written by the other trace are picked up
+        swap_entries = {
+            swap_entry.data_filename
+            for swap_entry in trace1._cache._swap_content.values()
+        }
+        trace2._cache._rescan_swap()
+        self.assertLessEqual(
+            swap_entries,
+            {
+                swap_entry.data_filename
+                for swap_entry in trace2._cache._swap_content.values()
+            }
+        )
+
+        # The metadata written by both traces are merged
+        trace1._cache.to_swap_dir()
+        trace2._cache.to_swap_dir()
+        trace = make_trace()
+        self.assertTrue(
+            {'sched_switch', 'sched_wakeup'} <= trace._parsed_events.keys()
+        )
+        pd.testing.assert_frame_equal(trace.df_events('sched_switch', raw=True), df)
+
+        # No temporary file is left behind
+        self.assertFalse([
+            filename
+            for filename in os.listdir(swap_dir)
+            if filename.endswith(TraceCache.SWAP_TEMP_SUFFIX)
+        ])
+
+        # Discarding the swap entries is serialized with the other processes
+        cache = trace._cache
+        lock_swap_dir = cache._lock_swap_dir
+        locked = []
+        def record_lock(swap_dir):
+            locked.append(swap_dir)
+            return lock_swap_dir(swap_dir)
+
+        cache._lock_swap_dir = record_lock
+        cache.discard_all()
+        self.assertEqual(locked, [swap_dir])
+        self.assertFalse(cache._swap_content)
+
+    def test_swap_async(self):
+        """Test writing the swap from a background thread"""
+        _, make_trace = self.make_swap_trace_factory()
+
+        trace = make_trace(async_swap=True)
+        cache = trace._cache
+
+        # Block the writer until the entry has been fetched
+        release = threading.Event()
+
+        def block_writer(cache):
+            write_swap_sync = cache._write_swap_sync
+
+            def blocked_write(*args, **kwargs):
+                release.wait()
+                return write_swap_sync(*args, **kwargs)
+
+            cache._write_swap_sync = blocked_write
+
+        block_writer(cache)
+        df = trace.df_events('sched_switch', raw=True)
+        pd_desc = trace._make_raw_pd_desc('sched_switch')
+
+        # Entries can be fetched while being written
+        cache.clear_event('sched_switch')
+        self.assertNotIn(pd_desc, cache._cache)
+        self.assertIn(pd_desc.normal_form, cache._swap_in_flight)
+        self.assertFalse(cache._swap_content)
+        pd.testing.assert_frame_equal(trace.df_events('sched_switch', raw=True), df)
+
+        release.set()
+        cache.flush()
+        self.assertIsNone(cache._swap_writer)
+        self.assertFalse(cache._swap_in_flight)
+        self.assertTrue(cache._swap_content)
+
+        trace = make_trace()
+        self.assertTrue(trace._cache._swap_content)
+        pd.testing.assert_frame_equal(trace.df_events('sched_switch', raw=True), df)
+
+        # Queued entries are still written after the cache is dropped
+        trace = make_trace(async_swap=True)
+        release.clear()
+        block_writer(trace._cache)
+        trace.df_events('sched_wakeup', raw=True)
+        writer = trace._cache._swap_writer
+        del trace, cache
+        release.set()
+        writer.join()
+
+        trace = make_trace()
+        pd_desc = trace._make_raw_pd_desc('sched_wakeup')
+        self.assertIn(pd_desc.normal_form, trace._cache._swap_content)
+
+    def test_mem_eviction(self):
+        """Test the memory usage of the cache is kept under max_mem_size"""
+        trace = Trace(self.trace_path, enable_swap=False)
+        events = ['sched_switch', 'sched_wakeup', 'sched_overutilized']
+        sizes = {
+            event: trace._cache._data_deep_mem_usage(trace.df_events(event))
+            for event in events
+        }
+
+        max_mem_size = sizes['sched_switch'] + sizes['sched_overutilized'] + 1
+        trace = Trace(self.trace_path, enable_swap=False, max_mem_size=max_mem_size)
+        cache = trace._cache
+        for event in events * 2:
+            trace.df_events(event)
+            self.assertLessEqual(cache._mem_usage, max_mem_size)
+            self.assertEqual(
+                cache._mem_usage,
+                sum(map(cache._data_deep_mem_usage, cache._cache.values()))
+            )
+            self.assertEqual(cache._mem_priority.keys(), cache._cache.keys())
+
+    def test_retention_score_cached(self):
+        """Test the retention score is only computed when the costs change"""
+        _, make_trace = self.make_swap_trace_factory()
+        trace = make_trace()
+        cache = trace._cache
+        df = trace.df_events('sched_switch')
+        pd_desc, = [
+            pd_desc
+            for pd_desc in cache._cache.keys()
+            if pd_desc.get('event') == 'sched_switch'
+        ]
+        score = cache._retention_score(pd_desc, df)
+
+        with mock.patch.object(cache, '_compute_retention_score', wraps=cache._compute_retention_score) as compute:
+            for _ in range(3):
+                trace.df_events('sched_switch')
+            compute.assert_not_called()
+            self.assertEqual(cache._retention_score(pd_desc, df), score)
+
+            # Writing to the swap updates the swap cost estimation
+            trace.df_events('sched_wakeup', raw=True)
+            compute.reset_mock()
+            cache._retention_score(pd_desc, df)
+            compute.assert_called_once()
+
+    def test_swap_packed(self):
+        """Test a swap area packed in a single file"""
+        swap_dir, make_trace = self.make_swap_trace_factory(packed_swap=True)
+
+        trace = make_trace()
+        dfs = {
+            event: trace.df_events(event, raw=True)
+            for event in ['sched_switch', 'sched_wakeup']
+        }
+        self.assertFalse([
+            filename
+            for filename in os.listdir(swap_dir)
+            if filename.endswith('.meta') and filename != 'trace.meta'
+        ])
+
+        trace = make_trace()
+        self.assertEqual(len(trace._cache._swap_content), len(dfs))
+        for event, df in dfs.items():
+            pd.testing.assert_frame_equal(trace.df_events(event, raw=True), df)
+            df = trace.df_events(event, raw=True, columns=['__cpu'], filters={'__cpu': 1})
+            self.assertEqual(len(df), (dfs[event]['__cpu'] == 1).sum())
+
+        # Scrubbing the swap only keeps the most recent entry
+        max_swap_size = max(
+            size
+            for size, mtime in trace._cache._swap_store.get_index().values()
+        )
+        trace = make_trace(max_swap_size=max_swap_size)
+        self.assertEqual(len(trace._cache._swap_content), 1)
+        self.assertEqual(len(trace._cache._swap_store.get_index()), 1)
+
+    @skipUnless(hasattr(sqlite3.Connection, 'setlimit'), 'requires Python >= 3.11')
+    def test_swap_packed_blob_limit(self):
+        """Test a packed swap with entries larger than the SQLite length limit"""
+        _, make_trace = self.make_swap_trace_factory(packed_swap=True)
+        limit = 4096
+        open_db = _PackedSwapStore._open
+
+        def open_limited(self):
+            con = open_db(self)
+            con.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, limit)
+            return con
+
+        with mock.patch.object(_PackedSwapStore, '_open', open_limited):
+            df = make_trace().df_events('sched_switch', raw=True)
+
+            trace = make_trace()
+            store = trace._cache._swap_store
+            sizes = [size for size, mtime in store.get_index().values()]
+            self.assertTrue(sizes)
+            self.assertGreater(max(sizes), limit)
+
+            pd.testing.assert_frame_equal(trace.df_events('sched_switch', raw=True), df)
+            self.assertEqual(trace.cache_stats()['swap_loads'].sum(), 1)
+
+    def test_swap_format_auto(self):
+        """Test that all the swap formats are measured when none is forced"""
+        _, make_trace = self.make_swap_trace_factory()
+        trace = make_trace(max_swap_size=10**9)
+        events = ('sched_switch', 'sched_wakeup')
+        dfs = [
+            trace.df_events(event, raw=True)
+            for event in events
+        ]
+
+        # One entry is written in each format, but the default format is
+        # used until their read cost has actually been measured
+        cache = trace._cache
+        self.assertEqual(
+            {
+                swap_entry.data_format
+                for swap_entry in cache._swap_content.values()
+            },
+            set(cache.DATAFRAME_SWAP_FORMATS),
+        )
+        self.assertEqual(cache._swap_format_read_cost, {})
+        self.assertEqual(cache._choose_swap_format(dfs[0]), cache.DATAFRAME_SWAP_FORMAT)
+
+        trace = make_trace(max_swap_size=10**9)
+        for event in events:
+            trace.df_events(event, raw=True)
+        self.assertEqual(trace._cache._swap_format_read_cost.keys(), set(cache.DATAFRAME_SWAP_FORMATS))
+
+    def test_swap_format(self):
+        """Test reloading dataframes from the swap in all the formats"""
+        for swap_format in ('parquet', 'feather'):
+            _, make_trace = self.make_swap_trace_factory(
+                swap_dir_name='swap-{}'.format(swap_format),
+                swap_format=swap_format,
+            )
+
+            df = make_trace().df_events('sched_switch', raw=True)
+            trace = make_trace()
+            self.assertEqual(
+                {
+                    swap_entry.data_format
+                    for swap_entry in trace._cache._swap_content.values()
+                },
+                {swap_format},
+            )
+            pd.testing.assert_frame_equal(trace.df_events('sched_switch', raw=True), df)
+
+    def test_time_unit_ns(self):
+        """Test the integer nanosecond time unit mode"""
+        trace = Trace(self.trace_path, normalize_time=False, time_unit='ns')
+        ref = Trace(self.trace_path, normalize_time=False)
+
+        self.assertEqual(trace.time_scale, 1e9)
+        self.assertEqual(trace.basetime, round(ref.basetime * 1e9))
+        self.assertEqual(trace.endtime, round(ref.endtime * 1e9))
+
+        df = trace.df_events('sched_switch')
+        ref_df = ref.df_events('sched_switch')
+        self.assertEqual(df.index.dtype, np.int64)
+        self.assertTrue(df.index.is_monotonic_increasing)
+        self.assertEqual(
+            df.index.tolist(),
+            [round(x * 1e9) for x in ref_df.index],
+        )
+
+        with self.assertRaises(ValueError):
+            Trace(self.trace_path, time_unit='ms')
+
+    def test_time_unit_ns_analysis(self):
+        """Test the units of analysis results in nanosecond time unit mode"""
+        trace_path = self.make_trace("""
+          <idle>-0     [000]   100.000000: cpu_frequency:        state=1000 cpu_id=0
+          <idle>-0     [000]   100.000000: cpu_idle:             state=4294967295 cpu_id=0
+          <idle>-0     [000]   100.500000: cpu_idle:             state=0 cpu_id=0
+          <idle>-0     [000]   101.000000: cpu_frequency:        state=2000 cpu_id=0
+          <idle>-0     [000]   101.000000: cpu_idle:             state=4294967295 cpu_id=0
+          <idle>-0     [000]   101.250000: cpu_idle:             state=0 cpu_id=0
+          <idle>-0     [000]   102.000000: cpu_frequency:        state=1000 cpu_id=0
+        """).trace_path
+
+        def make_trace(time_unit):
+            return Trace(trace_path, self.plat_info, normalize_time=False, time_unit=time_unit)
+
+        trace = make_trace('ns')
+        ref = make_trace('s')
+
+        # Rates are per second whatever the time unit
+        pd.testing.assert_frame_equal(
+            trace.analysis.frequency.df_cpu_frequency_transition_rate(0),
+            ref.analysis.frequency.df_cpu_frequency_transition_rate(0),
+        )
+
+        # Durations are in the time unit of the trace
+        df = trace.analysis.idle.df_cpu_idle_state_residency(0)
+        ref_df = ref.analysis.idle.df_cpu_idle_state_residency(0)
+        np.testing.assert_allclose(df.values, ref_df.values * trace.time_scale)
+
+    def test_time_unit_ns_duplicates(self):
+        """Test analyses on events sharing a timestamp in nanosecond time unit mode"""
+        trace_path = self.make_trace("""
+          <idle>-0     [000]   100.000000: cpu_frequency:        state=1000 cpu_id=0
+          <idle>-0     [000]   100.000000: cpu_idle:             state=4294967295 cpu_id=0
+          <idle>-0     [001]   100.000000: cpu_idle:             state=4294967295 cpu_id=1
+          <idle>-0     [000]   100.000000: sched_switch:         prev_comm=swapper/0 prev_pid=0 prev_prio=120 prev_state=0 next_comm=foo next_pid=10 next_prio=120
+          <idle>-0     [000]   100.500000: cpu_idle:             state=0 cpu_id=0
+          <idle>-0     [000]   100.500000: cpu_idle:             state=4294967295 cpu_id=0
+              foo-10   [000]   100.500000: sched_switch:         prev_comm=foo prev_pid=10 prev_prio=120 prev_state=1 next_comm=swapper/0 next_pid=0 next_prio=120
+          <idle>-0     [001]   100.500000: sched_wakeup:         comm=foo pid=10 prio=120 success=1 target_cpu=0
+          <idle>-0     [000]   100.500000: sched_switch:         prev_comm=swapper/0 prev_pid=0 prev_prio=120 prev_state=0 next_comm=foo next_pid=10 next_prio=120
+          <idle>-0     [000]   100.750000: cpu_idle:             state=0 cpu_id=0
+          <idle>-0     [000]   101.000000: cpu_frequency:        state=2000 cpu_id=0
+          <idle>-0     [000]   101.000000: cpu_frequency:        state=3000 cpu_id=0
+              foo-10   [000]   101.000000: sched_switch:         prev_comm=foo prev_pid=10 prev_prio=120 prev_state=1 next_comm=swapper/0 next_pid=0 next_prio=120
+          <idle>-0     [001]   101.250000: cpu_idle:             state=0 cpu_id=1
+          <idle>-0     [000]   101.500000: sched_wakeup:         comm=foo pid=10 prio=120 success=1 target_cpu=0
+          <idle>-0     [000]   101.500000: sched_switch:         prev_comm=swapper/0 prev_pid=0 prev_prio=120 prev_state=0 next_comm=foo next_pid=10 next_prio=120
+          <idle>-0     [000]   102.000000: cpu_frequency:        state=1000 cpu_id=0
+        """).trace_path
+
+        def make_trace(time_unit):
+            # The frequency residency requires the frequency domains, even
+            # in the test cases without them
+            plat_info = TraceTestCase._get_plat_info(self)
+            return Trace(trace_path, plat_info, normalize_time=False, time_unit=time_unit)
+
+        trace = make_trace('ns')
+        ref = make_trace('s')
+        self.assertTrue(trace.df_events('cpu_idle').index.duplicated().any())
+
+        active = trace.analysis.idle.signal_cluster_active([0, 1])
+        self.assertTrue(active.index.is_unique)
+        self.assertEqual(
+            active.tolist(),
+            [1, 1, 1, 0],
+        )
+
+        # Events sharing a timestamp have no duration, and are nudged by a
+        # negligible amount in seconds
+        def assert_close(df, ref_df):
+            np.testing.assert_allclose(
+                df.values,
+                ref_df.values * trace.time_scale,
+                atol=1,
+            )
+
+        assert_close(
+            trace.analysis.frequency.df_cpu_frequency_residency(0),
+            ref.analysis.frequency.df_cpu_frequency_residency(0),
+        )
+
+        # The sleep of no duration does not split the activation
+        df = trace.analysis.tasks.df_task_activation(10)
+        self.assertTrue(df.index.is_unique)
+        self.assertEqual(df['active'].tolist(), [1, 0, 1])
+        self.assertEqual(df['duration'].tolist()[:2], [1e9, 0.5e9])
+        np.testing.assert_allclose(df['duty_cycle'].values, 2 / 3)
+
+    def test_compact_dtypes(self):
+        """Test the raw dataframes use compact data types"""
+        df = self.trace.df_events('sched_switch', raw=True)
+        for col in ('__comm', 'prev_comm', 'next_comm'):
+            self.assertEqual(df[col].dtype.name, 'category')
+        for col in ('__pid', 'prev_pid', 'next_pid'):
+            self.assertEqual(df[col].dtype, np.int32)
+        self.assertEqual(df['__cpu'].dtype, np.int16)
+
+    def test_compact_dtypes_values(self):
+        """Test the data types of the raw dataframes do not depend on the values"""
+        trace = self.make_trace("""
+          <idle>-0     [000]   100.000000: cpu_frequency:        state=2000000 cpu_id=0
+          <idle>-0     [000]   101.000000: cpu_frequency:        state=1000000 cpu_id=0
+        """)
+        df = trace.df_events('cpu_frequency', raw=True)
+        self.assertEqual(df['frequency'].dtype, np.int32)
+        self.assertEqual(df['cpu'].dtype, np.int16)
+        # Frequencies are signed, so they can be subtracted
+        self.assertEqual((df['frequency'] - df['frequency'].shift(fill_value=0)).iloc[-1], -1000000)
+
+        trace = self.make_trace("""
+          <idle>-0     [000]   100.000000: cpu_frequency:        state=5000000000 cpu_id=0
+        """)
+        with self.assertRaises(ValueError):
+            trace.df_events('cpu_frequency', raw=True)
+
+    def test_df_events_filters(self):
+        """Test filtering the rows of df_events()"""
+        _, make_trace = self.make_swap_trace_factory()
+        trace = make_trace()
+        full_df = self.trace.df_events('sched_switch')
+
+        df = trace.df_events('sched_switch', filters={'__cpu': [1, 2]})
+        self.assertEqual(sorted(df['__cpu'].unique()), [1, 2])
+        self.assertEqual(len(df), full_df['__cpu'].isin([1, 2]).sum())
+
+        df = trace.df_events('sched_switch', filters={'__cpu': 1, 'next_pid': 0})
+        self.assertEqual(
+            df['__line'].tolist(),
+            full_df[(full_df['__cpu'] == 1) & (full_df['next_pid'] == 0)]['__line'].tolist(),
+        )
+
+        # Filtered dataframe read from the swap area
+        trace.df_events('sched_switch', raw=True)
+        trace = make_trace()
+        df = trace.df_events('sched_switch', raw=True, filters={'prev_comm': 'sshd'})
+        self.assertEqual(len(df), (full_df['prev_comm'] == 'sshd').sum())
+
+        # Values of different types
+        df = trace.df_events('sched_switch', filters={'__cpu': [1, 2.0]})
+        self.assertEqual(len(df), full_df['__cpu'].isin([1, 2]).sum())
+        with self.assertRaises(ValueError):
+            trace.df_events('sched_switch', filters={'prev_comm': ['sshd', None]})
+
+        # No matching row
+        df = trace.df_events('sched_switch', filters={'__cpu': 1234})
+        self.assertTrue(df.empty)
+
+        with self.assertRaises(ValueError):
+            trace.df_events('sched_switch', filters={'not_a_column': 1})
+
+    def test_df_events_columns(self):
+        """Test selecting the columns of df_events()"""
+        _, make_trace = self.make_swap_trace_factory()
+        full_df = self.trace.df_events('sched_switch')
+        cols = ['prev_pid', 'next_comm']
+
+        trace = make_trace()
+        pd.testing.assert_frame_equal(trace.df_events('sched_switch', columns=cols), full_df[cols])
+
+        # Only the selected columns are read from the swap area
+        trace = make_trace()
+        df = trace.df_events('sched_switch', columns=cols[::-1], filters={'__cpu': 1})
+        pd.testing.assert_frame_equal(df, full_df[full_df['__cpu'] == 1][cols])
+        self.assertNotIn(trace._make_raw_pd_desc('sched_switch'), trace._cache._cache)
+
+        # Projections of a dataframe in memory are not cached on top of it
+        trace = Trace(self.trace_path, enable_swap=False)
+        trace.df_events('sched_switch')
+        df = trace.df_events('sched_switch', columns=cols)
+        pd.testing.assert_frame_equal(df, full_df[cols])
+        self.assertEqual(
+            [
+                pd_desc
+                for pd_desc in trace._cache._cache.keys()
+                if pd_desc.get('event') == 'sched_switch'
+            ],
+            [trace._make_raw_pd_desc('sched_switch')],
+        )
+
+        with self.assertRaises(ValueError):
+            trace.df_events('sched_switch', columns=['not_a_column'])
+
+    def test_df_events_window(self):
+        """Test windowed df_events() are derived from the whole dataframe"""
+        trace = Trace(self.trace_path, enable_swap=False)
+        full_df = trace.df_events('sched_switch')
+        cache = trace._cache
+
+        def cached_windows():
+            return {
+                pd_desc.get('window')
+                for pd_desc in cache._cache.keys()
+                if pd_desc.get('event') == 'sched_switch'
+            }
+
+        for window in [(1, 2), (1.5, 3)]:
+            df = trace.df_events('sched_switch', window=window, signals_init=False)
+            pd.testing.assert_frame_equal(df, df_window(full_df, window, method='pre'))
+
+        # Plain slices are not cached
+        self.assertEqual(cached_windows(), {None})
+
+        # The initial value of signals is found using the signal indices,
+        # which are cached instead of each window
+        signals = SignalDesc.from_event('sched_switch')
+        for window in [(1, 2), (1.5, 3), (3, 3.001)]:
+            df = trace.df_events('sched_switch', window=window)
+            pd.testing.assert_frame_equal(df, df_window_signals(full_df, window, signals))
+        self.assertEqual(cached_windows(), {None})
+        self.assertEqual(
+            sorted(
+                pd_desc['signal_index']
+                for pd_desc in cache._cache.keys()
+                if 'signal_index' in pd_desc
+            ),
+            sorted(signal.fields for signal in signals),
+        )
+
+    def test_df_all_events(self):
+        """Test df_all_events() merges the formatted events in time order"""
+        events = ['sched_switch', 'sched_wakeup', 'sched_overutilized']
+        trace = Trace(self.trace_path, enable_swap=False)
+        df = trace.df_all_events(events)
+
+        self.assertEqual(len(df), sum(len(trace.df_events(event)) for event in events))
+        self.assertTrue(df.index.is_monotonic_increasing)
+
+        row = trace.df_events('sched_wakeup').iloc[0]
+        fields = ' '.join('{}={}'.format(col, val) for col, val in row.items())
+        self.assertEqual(df.loc[row.name, 'info'], 'sched_wakeup      : {}'.format(fields))
+
+        window = (trace.start + 2, trace.start + 4)
+        df_window = trace.df_all_events(events, window=window)
+        self.assertFalse(df_window.empty)
+        pd.testing.assert_frame_equal(
+            df_window,
+            df[(df.index >= window[0]) & (df.index <= window[1])],
+        )
+
+    def test_partitions(self):
+        """Test windows of a partitioned trace only load the partitions they overlap with"""
+        _, make_trace = self.make_swap_trace_factory()
+        trace = Trace(self.trace_path, enable_swap=False)
+        part_trace = make_trace(partition_duration=0.5)
+        start = trace.start
+
+        def assert_equal(df, part_df):
+            # Categories are only the ones found in the loaded partitions
+            pd.testing.assert_frame_equal(df, part_df, check_categorical=False)
+
+        def loaded_partitions(event):
+            return {
+                pd_desc.get('partition')
+                for pd_desc in part_trace._cache._cache.keys()
+                if pd_desc.get('event') == event
+            } - {None}
+
+        # Earlier partitions are scanned for the rows preceding the window,
+        # but the following ones are not loaded
+        part_trace.df_events('sched_wakeup', window=(start + 1.2, start + 1.7), signals_init=False)
+        # Only the partitions overlapping with the window are kept in memory
+        self.assertEqual(loaded_partitions('sched_wakeup'), {2, 3})
+
+        for window in [(start + 1.2, start + 1.7), (start + 4, start + 6.1), (start - 1, start + 0.1)]:
+            for event in ['sched_switch', 'sched_wakeup', 'cpu_frequency_devlib']:
+                for signals_init in (True, False):
+                    assert_equal(
+                        trace.df_events(event, window=window, signals_init=signals_init),
+                        part_trace.df_events(event, window=window, signals_init=signals_init),
+                    )
+
+        df = part_trace._concat_partitions(list(part_trace.iter_df_events('sched_switch')))
+        assert_equal(trace.df_events('sched_switch'), df)
+        # Partitions are evicted from memory once iterated over
+        self.assertEqual(loaded_partitions('sched_switch'), set())
+
+        # Other formats cannot be split without parsing the whole trace
+        trace_path = os.path.join(self.traces_dir, 'sched_load', 'trace.dat')
+        with self.assertRaises(ValueError):
+            Trace(trace_path, partition_duration=0.5, enable_swap=False)
+
+    def test_cache_stats(self):
+        """Test the statistics of the trace cache"""
+        _, make_trace = self.make_swap_trace_factory()
+        recorded = []
+
+        def hook(stat, pd_desc, value):
+            recorded.append((stat, pd_desc.get('event')))
+
+        trace = make_trace(cache_stats_hook=hook)
+        trace.df_events('sched_switch', window=(1, 2))
+        trace.df_events('sched_switch', window=(1, 2))
+
+        def kind(pd_desc):
+            if pd_desc.get('window') is not None:
+                return 'window'
+            elif 'signal_index' in pd_desc:
+                return 'signal_index'
+            else:
+                return 'full'
+
+        stats = trace.cache_stats()
+        stats = stats[stats['event'] == 'sched_switch']
+        stats = stats.groupby(stats['desc'].map(kind)).sum(numeric_only=True)
+        self.assertGreater(stats.loc['full', 'parse_time'], 0)
+        self.assertGreater(stats.loc['full', 'swap_writes'], 0)
+        self.assertGreater(stats.loc['full', 'swap_bytes'], 0)
+        # The window is computed again using the cached signal indices
+        self.assertEqual(stats.loc['window', 'misses'], 2)
+        self.assertGreater(stats.loc['signal_index', 'compute_time'], 0)
+        self.assertGreater(stats.loc['signal_index', 'hits'], 0)
+        self.assertGreater(stats.loc['signal_index', 'mem_bytes'], 0)
+        self.assertIn(('parse_time', 'sched_switch'), recorded)
+
+        # The raw dataframe is reloaded from the swap
+        trace = make_trace()
+        trace.df_events('sched_switch', raw=True)
+        stats = trace.cache_stats()
+        self.assertEqual(stats[stats['event'] == 'sched_switch']['swap_loads'].sum(), 1)
+
+    def test_cache_stats_packed(self):
+        """Test the size of entries of a packed swap are queried at once"""
+        _, make_trace = self.make_swap_trace_factory(packed_swap=True)
+        trace = make_trace()
+        for event in ['sched_switch', 'sched_wakeup']:
+            trace.df_events(event, raw=True)
+
+        store = trace._cache._swap_store
+        with mock.patch.object(store, 'get_index', wraps=store.get_index) as get_index:
+            stats = trace.cache_stats()
+        get_index.assert_called_once()
+        self.assertEqual((stats['swap_bytes'] > 0).sum(), 2)
+
+    def test_prepare_traces(self):
+        """Test preparing the swap of traces ahead of time"""
+        trace_path = os.path.join(self.res_dir, 'trace.txt')
+        shutil.copy(self.trace_path, trace_path)
+
+        errors = prepare_traces(
+            [trace_path],
+            events=['sched_wakeup', 'not_an_event'],
+            analyses=['tasks.df_tasks_runtime'],
+            jobs=1,
+        )
+        self.assertEqual(list(errors.keys()), [trace_path])
+        self.assertEqual(len(errors[trace_path]), 1)
+        self.assertIn('not_an_event', errors[trace_path][0])
+
+        # Everything is reloaded from the swap
+        trace = Trace(trace_path)
+        trace.df_events('sched_wakeup')
+        trace.analysis.tasks.df_tasks_runtime()
+        stats = trace.cache_stats()
+        self.assertEqual(stats['misses'].sum(), 0)
+        self.assertEqual(stats['parse_time'].sum(), 0)
+        self.assertEqual(stats['swap_loads'].sum(), 2)
+
+        with self.assertRaises(ValueError):
+            prepare_traces([trace_path], analyses=['tasks.not_a_method'])
+
+    def test_prepare_traces_errors(self):
+        """Test that a failing trace does not prevent preparing the others"""
+        trace_path = os.path.join(self.res_dir, 'trace.txt')
+        shutil.copy(self.trace_path, trace_path)
+        missing_path = os.path.join(self.res_dir, 'missing.txt')
+
+        errors = prepare_traces(
+            [missing_path, trace_path],
+            events=['sched_wakeup'],
+            # Requires a platform info, which is not provided
+            analyses=['frequency.df_cpus_frequency', 'tasks.df_tasks_runtime'],
+            jobs=1,
+        )
+        self.assertEqual(len(errors[missing_path]), 1)
+        self.assertIn(missing_path, errors[missing_path][0])
+        self.assertEqual(len(errors[trace_path]), 1)
+        self.assertTrue(errors[trace_path][0].startswith('frequency.df_cpus_frequency: '))
+
+        # The trace that could be prepared was written to its swap
+        trace = Trace(trace_path)
+        trace.analysis.tasks.df_tasks_runtime()
+        self.assertEqual(trace.cache_stats()['misses'].sum(), 0)
+
+    def test_trace_collection(self):
+        """Test running the same computations on several traces"""
+        traces = {}
+        for name in ('a', 'b'):
+            trace_dir = os.path.join(self.res_dir, name)
+            os.makedirs(trace_dir)
+            trace_path = os.path.join(trace_dir, 'trace.txt')
+            shutil.copy(self.trace_path, trace_path)
+            traces[name] = trace_path
+
+        collection = TraceCollection(traces, jobs=2)
+        ref = self.trace.df_events('sched_wakeup')
+        df = collection.df_events('sched_wakeup')
+        self.assertEqual(df.index.names, ['trace', ref.index.name])
+        for name in traces.keys():
+            pd.testing.assert_frame_equal(df.loc[name], ref)
+
+        ref = self.trace.analysis.tasks.df_tasks_runtime()
+        df = collection.call_analysis('tasks.df_tasks_runtime')
+        pd.testing.assert_frame_equal(df.loc['b'], ref)
+
+        # The results of the workers are found in the swap of each trace
+        trace = Trace(traces['a'])
+        trace.df_events('sched_wakeup', raw=True)
+        self.assertEqual(trace.cache_stats()['misses'].sum(), 0)
+
+    def test_refresh(self):
+        """Test parsing the lines appended to a text trace with refresh()"""
+        with open(self.trace_path, 'rb') as f:
+            data = f.read()
+
+        trace_path = os.path.join(self.res_dir, 'trace.txt')
+        # Stop in the middle of a line, that will be parsed again
+        cut = len(data) // 2 + 17
+        with open(trace_path, 'wb') as f:
+            f.write(data[:cut])
+
+        trace = Trace(trace_path, events=['sched_switch'])
+        self.assertFalse(trace.refresh())
+        self.assertLess(trace.endtime, self.trace.endtime)
+
+        view = trace[trace.start:(trace.start + trace.end) / 2]
+        view.analysis.cpus.df_context_switches()
+        trace.analysis.cpus.df_context_switches()
+
+        def cached_analysis_states():
+            return {
+                pd_desc['trace_state']
+                for pd_desc in trace._cache._cache.keys()
+                if 'func' in pd_desc
+            }
+
+        self.assertEqual(cached_analysis_states(), {trace.trace_state, view.trace_state})
+
+        with open(trace_path, 'ab') as f:
+            f.write(data[cut:])
+        self.assertTrue(trace.refresh())
+        self.assertFalse(trace.refresh())
+
+        # Only the results that cannot depend on the new lines are kept
+        self.assertEqual(cached_analysis_states(), {view.trace_state})
+
+        self.assertEqual(trace.endtime, self.trace.endtime)
+        for event in ['sched_switch', 'sched_wakeup']:
+            pd.testing.assert_frame_equal(
+                trace.df_events(event, raw=True),
+                self.trace.df_events(event, raw=True),
+            )
+
+        # The swap area is kept up to date
+        trace = Trace(trace_path)
+        pd.testing.assert_frame_equal(
+            trace.df_events('sched_switch', raw=True),
+            self.trace.df_events('sched_switch', raw=True),
+        )
+
+    def test_pd_desc_window(self):
+        """Test finding the window of the trace cached data depend on"""
+        def get_window(spec):
+            pd_desc_nf = PandasDataDesc(spec=spec).normal_form
+            # The descriptors read back from the swap area went through JSON
+            pd_desc_nf_json = PandasDataDescNF.from_json_map(
+                json.loads(json.dumps(pd_desc_nf.to_json_map()))
+            )
+            window = Trace._get_pd_desc_window(pd_desc_nf)
+            self.assertEqual(Trace._get_pd_desc_window(pd_desc_nf_json), window)
+            return window
+
+        view = self.trace[1:2]
+        self.assertEqual(get_window(dict(event='sched_switch', window=[1, None])), (1, None))
+        self.assertEqual(get_window(dict(func='f', trace_window=view.trace_window, trace_state=view.trace_state)), (1, 2))
+        self.assertIsNone(get_window(dict(func='f', trace_window=self.trace.trace_window, trace_state=(1, 2, 3))))
+
+    def test_refresh_no_swap(self):
+        """Test refresh() on a text trace that was parsed without being indexed"""
+        with open(self.trace_path, 'rb') as f:
+            data = f.read()
+
+        trace_path = os.path.join(self.res_dir, 'trace.txt')
+        cut = len(data) // 2 + 17
+        with open(trace_path, 'wb') as f:
+            f.write(data[:cut])
+
+        trace = Trace(trace_path, events=['sched_switch'], enable_swap=False)
+        trace.df_events('sched_switch', raw=True)
+        self.assertIsNone(trace._get_index(build=False))
+
+        with open(trace_path, 'ab') as f:
+            f.write(data[cut:])
+        self.assertTrue(trace.refresh())
+        self.assertFalse(trace.refresh())
+
+        self.assertEqual(trace.endtime, self.trace.endtime)
+        pd.testing.assert_frame_equal(
+            trace.df_events('sched_switch', raw=True),
+            self.trace.df_events('sched_switch', raw=True),
+        )
+
     def df_peripheral_clock_effective_rate(self):
         """
         TestTrace: getPeripheralClockInfo() returns proper effective rate info.